@@ -1,8 +1,11 @@
 import streamlit as st
-import pandas as pd
 import os 
-from preprocessor import get_processed_data
-from helper import get_player, compare_players, plot_comparison_bar, plot_top10, plot_radar, player_card
+import instrument
+import warmup
+
+# pandas, matplotlib and the pipeline (preprocessor / helper / shared) are
+# imported by the pages that use them, so the sidebar and Home page paint
+# without them; warmup.py loads them in the background after that.
 
 # =====================================================
 # CONFIG & PAGE SETUP
@@ -42,23 +45,39 @@ st.markdown("""
 # =====================================================
 # LOAD DATA
 # =====================================================
-@st.cache_data
-def load_all():
-    return get_processed_data()
+# One memory-mapped copy per host, shared by every session (no per-rerun
+# copies). warmup.refresh() re-publishes when the source data changes.
+role_map = {"Forwards": "FW", "Midfielders": "MF", "Fullbacks": "FB", "Centerbacks": "CB", "Goalkeepers": "GK"}
+positions = list(role_map)
+
+@st.cache_resource(max_entries=2)
+def load_all(version):
+    import shared
+    return shared.frames(version)
 
-df_fw, df_mf, df_fullback, df_centerback, df_gk = load_all()
+def load_data():
+    """Data version and position -> frame map; only the pages showing players call this."""
+    with st.spinner("Loading player data..."):
+        version = warmup.refresh()  # waits for the warm-up thread instead of processing twice
+        with instrument.stage("shared_frames_load"):
+            frames = load_all(version)
+    return version, dict(zip(positions, frames))
 
-pos_map = {
-    "Forwards": df_fw, "Midfielders": df_mf,
-    "Fullbacks": df_fullback, "Centerbacks": df_centerback, "Goalkeepers": df_gk
-}
+# Simulated-season ranges for one player's score and percentiles
+@st.cache_data(max_entries=256, show_spinner="Simulating seasons...")
+def player_ranges(version, pos, name):
+    from uncertainty import player_intervals
+    return player_intervals(load_all(version)[positions.index(pos)], role_map[pos], name)
 
 # =====================================================
 # SIDEBAR
 # =====================================================
 st.sidebar.title("⚽ Virtual Scout")
 st.sidebar.markdown("---")
-mode = st.sidebar.radio("Navigate", ["Home", "Single Player Stats", "Compare Two Players", "Top 10 Rankings"])
+pages = ["Home", "Single Player Stats", "Compare Two Players", "Top 10 Rankings"]
+# Hidden page, opened with ?diagnostics=1
+if st.query_params.get("diagnostics") == "1": pages.append("Diagnostics")
+mode = st.sidebar.radio("Navigate", pages)
 st.sidebar.markdown("---")
 st.sidebar.info("Data: Fbref | Season 24/25")
 
@@ -103,9 +122,13 @@ if mode == "Home":
 # SINGLE PLAYER STATS
 # =====================================================
 elif mode == "Single Player Stats":
+    import pandas as pd
+    from helper import get_player, render_chart, player_card, get_alias, ROLE_RADAR_METRICS
+    from uncertainty import interval_level
     st.header("🔎 Single Player Analysis")
+    data_version, pos_map = load_data()
     c1, c2 = st.columns([1, 2])
-    with c1: pos = st.selectbox("Position", list(pos_map.keys()))
+    with c1: pos = st.selectbox("Position", positions)
     df = pos_map[pos]
     player_list = sorted(df["Player"].unique())
     default_idx = None
@@ -140,6 +163,9 @@ elif mode == "Single Player Stats":
             c2.metric("Minutes", card["Minutes"])
             c3.metric("League", card["League"])
             c4.metric("Virtual Score", card["Score"], delta_color="normal")
+            ranges = player_ranges(data_version, pos, player_name)
+            if ranges is not None:
+                c4.caption(f"{interval_level:.0%} range: {ranges['score_lo']:.1f} – {ranges['score_hi']:.1f}")
             
             c1, c2, c3, c4 = st.columns(4)
             if pos == "Goalkeepers":
@@ -186,27 +212,27 @@ elif mode == "Single Player Stats":
             st.markdown("---")
             st.subheader("📈 Player Style Profile")
             
-            if pos == "Forwards":
-                radar_metrics = ["Gls_per90_pct_adj", "xG_per90_pct_adj", "Sh_per90_pct_adj", "KP_per90_pct_adj", "Carries_per90_pct_adj"]
-            elif pos == "Midfielders":
-                radar_metrics = ["KP_per90_pct_adj", "PrgP_per90_pct_adj", "Tkl_per90_pct_adj", "Int_per90_pct_adj", "Carries_per90_pct_adj"]
-            elif pos in ["Fullbacks", "Centerbacks"]:
-                radar_metrics = ["Tkl_per90_pct_adj", "Int_per90_pct_adj", "Clr_per90_pct_adj", "CrsPA_per90_pct_adj", "PrgC_per90_pct_adj"]
-            elif pos == "Goalkeepers":
-                # --- UPDATED GK RADAR: Replaced PSxG+/- with Saves ---
-                radar_metrics = ["Saves_per90_pct_adj", "Save%_pct_adj", "GA90_pct_adj", "CS%_pct_adj", "Cmp%_pct_adj"]
-            else:
-                radar_metrics = ["Gls_per90_pct_adj", "Ast_per90_pct_adj", "PrgP_per90_pct_adj"]
+            radar_metrics = ROLE_RADAR_METRICS[role_map[pos]]
+            st.image(render_chart("radar", df, [player_name], radar_metrics), use_container_width=True)
 
-            fig = plot_radar(df, [player_name], radar_metrics)
-            st.pyplot(fig)
+            if ranges is not None:
+                st.markdown(f"##### 🎯 How sure are these? ({interval_level:.0%} ranges over simulated seasons)")
+                st.caption("Fewer minutes means a wider range: the same rates over a short season could easily have come out differently.")
+                st.dataframe(pd.DataFrame({
+                    "Metric": [get_alias(m) for m in radar_metrics],
+                    "Percentile": [round(row[m], 1) for m in radar_metrics],
+                    "Low": [round(ranges[m + "_lo"], 1) for m in radar_metrics],
+                    "High": [round(ranges[m + "_hi"], 1) for m in radar_metrics],
+                }), use_container_width=True, hide_index=True)
 
 # =====================================================
 # COMPARE PLAYERS
 # =====================================================
 elif mode == "Compare Two Players":
+    from helper import compare_players, comparison_matrix, render_chart, get_alias, ROLE_RADAR_METRICS, ROLE_BAR_METRICS
     st.header("⚔️ Head-to-Head Comparison")
-    pos = st.selectbox("Position", list(pos_map.keys()))
+    _, pos_map = load_data()
+    pos = st.selectbox("Position", positions)
     df = pos_map[pos]
     player_list = sorted(df["Player"].unique())
     c1, c2 = st.columns(2)
@@ -231,12 +257,8 @@ elif mode == "Compare Two Players":
             c1, c2 = st.columns(2)
             with c1:
                 st.subheader("📈 Percentile Ranks")
-                if pos == "Goalkeepers":
-                    bar_metrics = ["GA90", "Save%", "CS%", "Saves_per90", "Cmp%"]
-                else:
-                    bar_metrics = ["Gls_per90", "Ast_per90", "xG_per90", "KP_per90", "Carries_per90"]
-                fig_bar = plot_comparison_bar(df, p1, p2, bar_metrics)
-                st.pyplot(fig_bar)
+                bar_metrics = ROLE_BAR_METRICS[role_map[pos]]
+                st.image(render_chart("comparison_bar", df, p1, p2, bar_metrics), use_container_width=True)
             
             with c2:
                 st.subheader("🛑 Skill Radar")
@@ -244,18 +266,30 @@ elif mode == "Compare Two Players":
                     radar_metrics = ["Saves_per90_pct_adj", "Save%_pct_adj", "GA90_pct_adj", "CS%_pct_adj", "Cmp%_pct_adj"]
                 else:
                     radar_metrics = ["Gls_per90_pct_adj", "G+A_per90_pct_adj", "KP_per90_pct_adj", "Carries_per90_pct_adj", "PrgC_per90_pct_adj"]
-                fig_radar = plot_radar(df, [p1, p2], radar_metrics)
-                st.pyplot(fig_radar)
+                st.image(render_chart("radar", df, [p1, p2], radar_metrics), use_container_width=True)
         else:
             st.warning("Please select two players.")
 
+    st.markdown("---")
+    st.subheader("📋 Shortlist")
+    shortlist = st.multiselect("Players", player_list, max_selections=30)
+    if shortlist:
+        metrics = ROLE_RADAR_METRICS[role_map[pos]]
+        st.image(render_chart("heatmap", df, shortlist, metrics), use_container_width=True)
+        st.image(render_chart("radar_grid", df, shortlist, metrics), use_container_width=True)
+        table = comparison_matrix(df, shortlist, metrics).rename(index=get_alias)
+        st.dataframe(table.round(1), use_container_width=True)
+
 # =====================================================
 # TOP 10 RANKINGS
 # =====================================================
 elif mode == "Top 10 Rankings":
+    from helper import render_chart, top_rows
+    from ranking import nation_code
     st.header("🏆 Top 10 Rankings")
+    _, pos_map = load_data()
     c1, c2 = st.columns([1, 2])
-    with c1: pos = st.selectbox("Position", list(pos_map.keys()))
+    with c1: pos = st.selectbox("Position", positions)
     df = pos_map[pos]
     
     if pos == "Goalkeepers":
@@ -274,6 +308,63 @@ elif mode == "Top 10 Rankings":
     with c2: selected_name = st.selectbox("Rank By", list(metric_options.keys()))
     selected_col = metric_options[selected_name]
 
+    with st.expander("Filters"):
+        f1, f2 = st.columns(2)
+        leagues = f1.multiselect("League", sorted(df["Comp"].unique()))
+        nations = f2.multiselect("Nationality", sorted({nation_code(n) for n in df["Nation"]} - {""}))
+        age_lo, age_hi = int(df["Age"].min()), int(df["Age"].max())
+        ages = f1.slider("Age", age_lo, age_hi, (age_lo, age_hi))
+        min_minutes = f2.number_input("Minimum Minutes", min_value=0, value=0, step=90)
+
+    filters = []
+    if leagues: filters.append(("leagues", tuple(leagues)))
+    if nations: filters.append(("nations", tuple(nations)))
+    if ages != (age_lo, age_hi): filters += [("min_age", ages[0]), ("max_age", ages[1])]
+    if min_minutes: filters.append(("min_minutes", min_minutes))
+
     if st.button("Show Rankings"):
-        fig = plot_top10(df, selected_col)
-        st.pyplot(fig)
+        if top_rows(df, selected_col, 1, **dict(filters)).empty:
+            st.warning("No players match these filters.")
+        else:
+            st.image(render_chart("top10", df, selected_col, tuple(filters)), use_container_width=True)
+
+# =====================================================
+# DIAGNOSTICS (HIDDEN)
+# =====================================================
+elif mode == "Diagnostics":
+    import pandas as pd
+    from preprocessor import get_processed_data
+    from helper import render_chart, ChartCache
+    st.header("🛠️ Pipeline Diagnostics")
+    c1, c2 = st.columns(2)
+    on = c1.toggle("Record timings", value=instrument.enabled)
+    memory = c2.checkbox("Track peak memory (slower)", value=instrument.trace_memory)
+    if on and (not instrument.enabled or memory != instrument.trace_memory):
+        instrument.disable()
+        instrument.enable(memory=memory)
+    elif not on and instrument.enabled:
+        instrument.disable()
+
+    b1, b2 = st.columns(2)
+    if b1.button("Re-run pipeline (no cache)", disabled=not instrument.enabled):
+        frames = get_processed_data(use_cache=False)
+        render_chart("top10", frames[0], "score", cache=ChartCache())  # fresh cache: always draws
+    if b2.button("Clear records"):
+        instrument.clear()
+
+    summary = instrument.summary()
+    if not summary:
+        st.info("No records yet. Turn on recording and use the app, or re-run the pipeline.")
+    else:
+        st.subheader("By stage")
+        st.dataframe(pd.DataFrame(summary), use_container_width=True)
+        st.subheader("Calls")
+        st.dataframe(pd.DataFrame(instrument.records()).iloc[::-1], use_container_width=True)
+        st.download_button("Download JSON", instrument.to_json(), "diagnostics.json", "application/json")
+
+# =====================================================
+# BACKGROUND WARM-UP
+# =====================================================
+# Last, so it starts after the page above has been sent; a no-op once the
+# process has warmed up.
+warmup.start()
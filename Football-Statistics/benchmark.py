@@ -0,0 +1,236 @@
+import os
+import sys
+import gc
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import matplotlib
+matplotlib.use("Agg")
+
+import cache
+import preprocessor as pp
+import helper
+
+# ============================================================
+# SYNTHETIC FBREF-SCHEMA DATA
+# ============================================================
+DEFAULT_SIZES = [2800, 30000, 300000]  # up to 10_000_000 with --sizes
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(HERE, "benchmark_baseline.json")
+
+def synthetic_players(n, seed=0):
+    """
+    `n` raw player-season rows with the columns load_data keeps. Rows are
+    resampled from the bundled season with every stat jittered by +-50%,
+    spread over all weighted leagues, and get unique names.
+    """
+    base = pd.read_csv(pp.resolve_path(), usecols=lambda c: c in pp.required_cols)
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, len(base), n)
+    out = {}
+    for col in base.columns:
+        values = base[col].to_numpy()[idx]
+        if col in ("Min", "90s") or base[col].dtype.kind not in "if":
+            out[col] = values
+            continue
+        jittered = values * rng.uniform(0.5, 1.5, n)
+        out[col] = np.round(jittered) if base[col].dtype.kind == "i" else jittered
+    df = pd.DataFrame(out)
+    for col in base.columns:
+        if base[col].dtype.kind == "i": df[col] = df[col].astype("int64")
+    df["Player"] = df["Player"] + " #" + pd.Series(np.arange(n) // len(base)).astype(str)
+    leagues = [c for c in pp.league_weights if c != "other"]
+    df["Comp"] = np.array(leagues, dtype=object)[rng.integers(0, len(leagues), n)]
+    return df
+
+
+# ============================================================
+# STAGES
+# ============================================================
+def _role_splits(df):
+    clean, codes, bounds = pp.sort_by_role(df)
+    return [(role, clean.iloc[lo:hi].copy()) for role, lo, hi in zip(pp.roles, bounds[:-1], bounds[1:])]
+
+def _reference_stage(fn):
+    # Reference-path step applied to each role split, like process_single_df
+    def run(ctx):
+        for role, part in ctx["parts"]:
+            fn(part, role)
+    return run
+
+def _prepare_reference(ctx, upto):
+    """Role splits with every reference step before `upto` already applied."""
+    steps = [pp.add_per90, pp.add_percentiles, pp.apply_league_weight]
+    parts = []
+    for role, part in _role_splits(ctx["clean"]):
+        for step in steps[:upto]:
+            part = step(part)
+        parts.append((role, part))
+    ctx["parts"] = parts
+
+def _get_processed(ctx, warm):
+    if not warm: cache.clear(ctx["cache_dir"])
+    pp.get_processed_data(ctx["csv"])
+
+def _plot(kind):
+    def run(ctx):
+        fw = ctx["frames"][0]
+        names = fw.sort_values("score", ascending=False)["Player"].head(2).tolist()
+        if kind == "radar":
+            fig = helper.plot_radar(fw, names, helper.ROLE_RADAR_METRICS["FW"])
+        elif kind == "comparison_bar":
+            fig = helper.plot_comparison_bar(fw, names[0], names[-1], helper.ROLE_BAR_METRICS["FW"])
+        elif kind == "shortlist":
+            names = fw.sort_values("score", ascending=False)["Player"].head(30).tolist()
+            helper.comparison_matrix(fw, names, helper.ROLE_RADAR_METRICS["FW"])
+            helper.figure_bytes(helper.plot_heatmap(fw, names, helper.ROLE_RADAR_METRICS["FW"]))
+            fig = helper.plot_radar_grid(fw, names, helper.ROLE_RADAR_METRICS["FW"])
+        else:
+            fig = helper.plot_top10(fw, "score")
+        helper.figure_bytes(fig)  # includes the Agg render
+    return run
+
+# name -> (setup(ctx) or None, run(ctx))
+STAGES = {
+    "load_data": (None, lambda ctx: pp.load_data(ctx["csv"])),
+    "add_per90": (lambda ctx: _prepare_reference(ctx, 0), _reference_stage(lambda df, role: pp.add_per90(df))),
+    "add_percentiles": (lambda ctx: _prepare_reference(ctx, 1), _reference_stage(lambda df, role: pp.add_percentiles(df))),
+    "apply_league_weight": (lambda ctx: _prepare_reference(ctx, 2), _reference_stage(lambda df, role: pp.apply_league_weight(df))),
+    "score_player": (lambda ctx: _prepare_reference(ctx, 3), _reference_stage(pp.score_player)),
+    "process_single_df": (lambda ctx: _prepare_reference(ctx, 0), _reference_stage(pp.process_single_df)),
+    "process_all": (None, lambda ctx: pp.process_all(ctx["clean"])),
+    "get_processed_data_cold": (None, lambda ctx: _get_processed(ctx, warm=False)),
+    "get_processed_data_warm": (lambda ctx: _get_processed(ctx, warm=False), lambda ctx: _get_processed(ctx, warm=True)),
+    "plot_radar": (None, _plot("radar")),
+    "plot_comparison_bar": (None, _plot("comparison_bar")),
+    "plot_top10": (None, _plot("top10")),
+    "plot_shortlist": (None, _plot("shortlist")),
+}
+
+def measure(stage, ctx, repeat, memory=True):
+    """Best-of-`repeat` wall time and (optionally) tracemalloc peak in MB."""
+    setup, run = STAGES[stage]
+    times = []
+    for _ in range(repeat):
+        if setup: setup(ctx)
+        gc.collect()
+        start = time.perf_counter()
+        run(ctx)
+        times.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        if setup: setup(ctx)
+        gc.collect()
+        tracemalloc.start()
+        run(ctx)
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return {"stage": stage, "rows": ctx["rows"], "seconds": min(times), "peak_mb": peak, "repeat": repeat}
+
+def run_suite(sizes, stages, repeat=3, memory=True, seed=0, log=print):
+    results = []
+    work = tempfile.mkdtemp(prefix="fa-bench-")
+    old_cache_dir = cache.CACHE_DIR
+    cache.CACHE_DIR = os.path.join(work, "cache")
+    try:
+        for n in sizes:
+            csv = os.path.join(work, f"players_{n}.csv")
+            synthetic_players(n, seed).to_csv(csv, index=False)
+            ctx = {"rows": n, "csv": csv, "cache_dir": cache.CACHE_DIR}
+            ctx["clean"] = pp.load_data(csv)
+            ctx["frames"] = pp.get_processed_data(csv, use_cache=False)
+            for stage in stages:
+                r = measure(stage, ctx, repeat, memory)
+                results.append(r)
+                mem = f"{r['peak_mb']:9.1f} MB" if r["peak_mb"] is not None else ""
+                log(f"{n:>10,}  {stage:<26} {r['seconds'] * 1000:10.1f} ms {mem}")
+            os.remove(csv)
+    finally:
+        cache.CACHE_DIR = old_cache_dir
+        shutil.rmtree(work, ignore_errors=True)
+    return results
+
+def environment():
+    return {
+        "python": platform.python_version(), "platform": platform.platform(),
+        "cpu_count": os.cpu_count(), "numpy": np.__version__, "pandas": pd.__version__,
+        "matplotlib": matplotlib.__version__, "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    }
+
+
+def speedups(results, stage="process_all", reference="process_single_df"):
+    """{rows: reference seconds / stage seconds} for sizes that ran both."""
+    by = {(r["stage"], r["rows"]): r["seconds"] for r in results}
+    return {rows: by[(reference, rows)] / s for (name, rows), s in by.items()
+            if name == stage and (reference, rows) in by}
+
+
+# ============================================================
+# BASELINE COMPARISON
+# ============================================================
+def compare(results, baseline, tolerance=0.5, mem_tolerance=0.25, min_seconds=0.02):
+    """
+    Regressions against a baseline run: a stage/size that got slower than
+    baseline * (1 + tolerance) (and by more than `min_seconds`) or whose
+    peak memory grew beyond baseline * (1 + mem_tolerance) + 1 MB.
+    """
+    base = {(r["stage"], r["rows"]): r for r in baseline["results"]}
+    failures = []
+    for r in results:
+        b = base.get((r["stage"], r["rows"]))
+        if b is None: continue
+        if r["seconds"] > b["seconds"] * (1 + tolerance) and r["seconds"] - b["seconds"] > min_seconds:
+            failures.append(f"{r['stage']} @ {r['rows']:,} rows: {r['seconds'] * 1000:.1f} ms vs baseline {b['seconds'] * 1000:.1f} ms")
+        if r["peak_mb"] is not None and b.get("peak_mb") is not None and r["peak_mb"] > b["peak_mb"] * (1 + mem_tolerance) + 1:
+            failures.append(f"{r['stage']} @ {r['rows']:,} rows: peak {r['peak_mb']:.1f} MB vs baseline {b['peak_mb']:.1f} MB")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time and memory-profile the data and plotting pipeline on synthetic data.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="Row counts (the bundled season is ~2.8k)")
+    parser.add_argument("--stages", nargs="+", choices=list(STAGES), default=list(STAGES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown, 0.5 = 50%%")
+    parser.add_argument("--mem-tolerance", type=float, default=0.25)
+    parser.add_argument("--min-seconds", type=float, default=0.02, help="Ignore slowdowns smaller than this (timer noise)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.sizes, args.stages, args.repeat, not args.no_memory, args.seed)
+    report = {"environment": environment(), "results": results}
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"results written to {args.out}")
+    for rows, x in speedups(results).items():
+        print(f"process_all vs process_single_df @ {rows:,} rows: {x:.1f}x")
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print("no baseline to compare against (run with --save-baseline)")
+        return 0
+    with open(args.baseline) as f:
+        failures = compare(results, json.load(f), args.tolerance, args.mem_tolerance, args.min_seconds)
+    for line in failures:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    print(f"{len(failures)} regression(s) against {args.baseline}")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
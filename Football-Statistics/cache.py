@@ -0,0 +1,91 @@
+import os
+import shutil
+import tempfile
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+# ============================================================
+# ON-DISK CACHE FOR PROCESSED FRAMES
+# ============================================================
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+FRAME_NAMES = ["fw", "mf", "fullback", "centerback", "gk"]
+
+MAX_ENTRIES = 8  # distinct data versions / queries kept on disk
+
+POINTER = ".current"  # key of the published version (see shared.py), never pruned
+
+def _key_dir(key, cache_dir=None):
+    return os.path.join(cache_dir or CACHE_DIR, key)
+
+def has_frames(key, cache_dir=None):
+    folder = _key_dir(key, cache_dir)
+    return all(os.path.exists(os.path.join(folder, name + ".feather")) for name in FRAME_NAMES)
+
+def current_key(cache_dir=None):
+    try:
+        with open(os.path.join(cache_dir or CACHE_DIR, POINTER)) as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def _table(df):
+    table = pa.Table.from_pandas(df, preserve_index=True)
+    # from_pandas turns NaN into nulls, which forces a copy when reading
+    # back; keep NaN as a float value so those columns map zero-copy too
+    for i, name in enumerate(table.column_names):
+        col = table.column(i)
+        if col.null_count and pa.types.is_floating(col.type) and name in df.columns:
+            table = table.set_column(i, name, pa.array(df[name].to_numpy(), type=col.type, from_pandas=False))
+    return table
+
+def load_frames(key, cache_dir=None, mapped=True):
+    """
+    Return the five processed frames for `key`, or None on a miss. With
+    mapped=True numeric columns are read-only views of the memory-mapped
+    files, so every process loading the same key shares one copy through
+    the page cache (shared.frames). mapped=False reads ordinary writable
+    frames, the same as a freshly processed result.
+    """
+    folder = _key_dir(key, cache_dir)
+    paths = [os.path.join(folder, name + ".feather") for name in FRAME_NAMES]
+    if not all(os.path.exists(p) for p in paths):
+        return None
+
+    frames = []
+    for p in paths:
+        # Uncompressed feather files are mapped straight from the page cache
+        if mapped:
+            table = feather.read_table(p, memory_map=True)
+            frames.append(table.to_pandas(split_blocks=True))
+        else:
+            frames.append(feather.read_table(p, memory_map=False).to_pandas())
+    return tuple(frames)
+
+def save_frames(key, frames, cache_dir=None):
+    root = cache_dir or CACHE_DIR
+    os.makedirs(root, exist_ok=True)
+
+    # Write into a temp folder first so a crash never leaves a half-written key
+    tmp = tempfile.mkdtemp(dir=root, prefix=".tmp-")
+    try:
+        for name, df in zip(FRAME_NAMES, frames):
+            feather.write_feather(_table(df), os.path.join(tmp, name + ".feather"), compression="uncompressed")
+        target = _key_dir(key, root)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    # Drop the least recently written entries beyond MAX_ENTRIES
+    current = current_key(root)
+    entries = [e for e in os.listdir(root) if not e.startswith(".") and e != current]
+    entries.sort(key=lambda e: os.path.getmtime(os.path.join(root, e)), reverse=True)
+    for entry in entries[MAX_ENTRIES - (current is not None):]:
+        shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+def clear(cache_dir=None):
+    shutil.rmtree(cache_dir or CACHE_DIR, ignore_errors=True)
@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+import preprocessor as pp
+import matchlogs as ml
+
+# ============================================================
+# ROLLING FORM (WINDOWED PER-90S, PERCENTILES, SCORES)
+# ============================================================
+# Every match of every player closes one window: the last N matches, or
+# the fewest recent matches adding up to N minutes. Window totals are
+# differences of per-player running sums, so all windows come out of one
+# pass whatever their length. A window is ranked against every complete
+# window of its role group over the logs, with the same per-90, league
+# weight and score maths as the season tables.
+sum_scale = 10**6  # window totals are exact to 1e-6 (match logs carry 1-2 decimals)
+
+def timeline(logs):
+    """Match rows sorted by player then date, and each row's group start."""
+    logs = logs.copy()
+    if "Season" not in logs.columns: logs["Season"] = ""
+    logs["Comp"] = logs["Comp"].fillna("other")
+    group = logs.groupby(ml.key_cols, sort=False, dropna=False).ngroup().to_numpy()
+    dates = pd.to_datetime(logs["Date"]).to_numpy()
+    order = np.lexsort((dates, group))
+    logs = logs.iloc[order].reset_index(drop=True)
+    logs["Date"] = dates[order]
+    group = group[order]
+    start = np.searchsorted(group, group, side="left")
+    return logs, start
+
+def window_bounds(minutes, start, matches=None, min_minutes=None):
+    """
+    First row of the window ending at every row (rows sorted by player
+    and date) and whether the window is complete.
+    """
+    i = np.arange(len(minutes))
+    if matches is not None:
+        lo = np.maximum(start, i - matches + 1)
+        return lo, i - start + 1 >= matches
+    # Latest j with minutes[j:i + 1] >= min_minutes, via the running total
+    prefix = np.concatenate([[0.0], np.cumsum(np.nan_to_num(minutes))])
+    j = np.searchsorted(prefix, prefix[1:] - min_minutes, side="right") - 1
+    complete = j >= start
+    return np.where(complete, j, start), complete
+
+def window_sums(logs, lo):
+    """Totals of ml.sum_cols (plus MP) over rows lo..i for every row i."""
+    cols = [c for c in ml.sum_cols if c in logs.columns]
+    # One contiguous row per column, so each running total is a straight scan
+    values = np.ascontiguousarray(logs[cols].to_numpy(dtype=float).T)
+    seen = ~np.isnan(values)
+    hi = np.arange(len(logs)) + 1
+
+    # Running totals in integer millionths: float prefix differences would
+    # leave rounding noise on xG-style decimals and split tied windows
+    prefix = np.zeros((len(cols), len(logs) + 1), dtype=np.int64)
+    np.cumsum(np.rint(np.where(seen, values, 0.0) * sum_scale).astype(np.int64), axis=1, out=prefix[:, 1:])
+    counts = np.zeros((len(cols), len(logs) + 1), dtype=np.int64)
+    np.cumsum(seen, axis=1, out=counts[:, 1:])
+    sums = (prefix[:, hi] - prefix[:, lo]) / sum_scale
+    # A column no match in the window reports stays missing (like sum(min_count=1))
+    sums[counts[:, hi] - counts[:, lo] == 0] = np.nan
+
+    played = np.concatenate([[0], np.cumsum(logs["Min"].to_numpy(dtype=float) > 0)])
+    out = pd.DataFrame(sums.T, columns=cols, copy=False)
+    out["MP"] = (played[hi] - played[lo]).astype(float)
+    return out
+
+def player_roles(logs):
+    """Role code per match row, from each player's whole-log totals (as the season tables)."""
+    season = ml.season_totals(logs)
+    season["Pos"] = season["Pos"].fillna("").astype(str).str.split(",").str[0].str.strip()
+    codes = pd.Series(pp.role_codes(season), index=pd.MultiIndex.from_frame(season[ml.key_cols]))
+    return codes.reindex(pd.MultiIndex.from_frame(logs[ml.key_cols])).to_numpy()
+
+def rolling_form(logs, matches=None, min_minutes=None):
+    """
+    One row per player-match: the window ending there, its per-90s,
+    league-adjusted percentiles (<metric>_pct_adj) and score. Pass either
+    `matches` (last N matches) or `min_minutes` (last N minutes). Windows
+    that are not complete yet keep their per-90s but get no percentiles
+    or score.
+    """
+    if (matches is None) == (min_minutes is None):
+        raise ValueError("pass exactly one of matches or min_minutes")
+    logs, start = timeline(logs)
+    lo, complete = window_bounds(logs["Min"].to_numpy(dtype=float), start, matches, min_minutes)
+    windows = ml.season_table(window_sums(logs, lo))
+    windows["Comp"] = logs["Comp"]
+
+    per90_cols, rank_cols, _ = pp.derived_layout(windows)
+    per90, to_rank = pp.metric_rows(windows, per90_cols, rank_cols)
+    codes = player_roles(logs)
+
+    # Rank complete windows within their role group, as process_all does
+    ranked = np.flatnonzero(complete & (codes >= 0))
+    ranked = ranked[np.argsort(codes[ranked], kind="stable")]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[ranked], minlength=len(pp.roles)))])
+    adj = np.full((len(rank_cols), len(logs)), np.nan)
+    score = np.full(len(logs), np.nan)
+    if len(ranked):
+        pct = pp.group_pct_rank(to_rank[:, ranked], bounds)
+        adj[:, ranked] = pct * pp.league_weight_vector(logs["Comp"].iloc[ranked])
+        score[ranked] = pp.score_rows(adj[:, ranked], rank_cols, codes[ranked])
+
+    out = logs[ml.key_cols + ["Date"]].copy()
+    out["Role"] = np.append(np.array(pp.roles, dtype=object), None)[codes]
+    out["window_matches"] = np.arange(len(logs)) - lo + 1
+    out["window_Min"] = windows["Min"]
+    out["complete"] = complete
+    derived = {**dict(zip(per90_cols, per90)), **{c + "_pct_adj": a for c, a in zip(rank_cols, adj)}, "score": score}
+    return pd.concat([out, pd.DataFrame(derived, index=out.index)], axis=1)
+
+def form_series(form, player, column="score", squad=None, complete_only=True):
+    """`column` over time (indexed by match date) for one player."""
+    rows = form[form["Player"] == player]
+    if squad is not None: rows = rows[rows["Squad"] == squad]
+    if complete_only: rows = rows[rows["complete"]]
+    return rows.set_index("Date")[column].sort_index()
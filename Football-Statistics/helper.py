@@ -1,6 +1,18 @@
+import io
+import math
+import hashlib
+import threading
+import weakref
+from collections import OrderedDict
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from ranking import RankIndex
+from instrument import timed
 
 METRIC_ALIASES = {
     # Raw Totals
@@ -46,13 +58,89 @@ METRIC_ALIASES = {
     "CrsPA_per90_pct_adj": "Crosses",
 }
 
+# Single-player radar profile per role
+ROLE_RADAR_METRICS = {
+    "FW": ["Gls_per90_pct_adj", "xG_per90_pct_adj", "Sh_per90_pct_adj", "KP_per90_pct_adj", "Carries_per90_pct_adj"],
+    "MF": ["KP_per90_pct_adj", "PrgP_per90_pct_adj", "Tkl_per90_pct_adj", "Int_per90_pct_adj", "Carries_per90_pct_adj"],
+    "FB": ["Tkl_per90_pct_adj", "Int_per90_pct_adj", "Clr_per90_pct_adj", "CrsPA_per90_pct_adj", "PrgC_per90_pct_adj"],
+    "CB": ["Tkl_per90_pct_adj", "Int_per90_pct_adj", "Clr_per90_pct_adj", "CrsPA_per90_pct_adj", "PrgC_per90_pct_adj"],
+    "GK": ["Saves_per90_pct_adj", "Save%_pct_adj", "GA90_pct_adj", "CS%_pct_adj", "Cmp%_pct_adj"],
+}
+
+# Percentile bar metrics per role (plot_comparison_bar adds the _pct_adj)
+ROLE_BAR_METRICS = {
+    "FW": ["Gls_per90", "Ast_per90", "xG_per90", "KP_per90", "Carries_per90"],
+    "MF": ["Gls_per90", "Ast_per90", "xG_per90", "KP_per90", "Carries_per90"],
+    "FB": ["Gls_per90", "Ast_per90", "xG_per90", "KP_per90", "Carries_per90"],
+    "CB": ["Gls_per90", "Ast_per90", "xG_per90", "KP_per90", "Carries_per90"],
+    "GK": ["GA90", "Save%", "CS%", "Saves_per90", "Cmp%"],
+}
+
 def get_alias(metric):
     return METRIC_ALIASES.get(metric, metric)
 
+# id(frame) -> (weakref to frame, memo dict); frames are treated as read-only
+_frame_memo = {}
+
+def _memo(df):
+    key = id(df)
+    hit = _frame_memo.get(key)
+    if hit is not None and hit[0]() is df: return hit[1]
+    memo = {}
+    _frame_memo[key] = (weakref.ref(df, lambda _, k=key: _frame_memo.pop(k, None)), memo)
+    return memo
+
+def _positions(df):
+    """Name -> row position map, built once per frame."""
+    memo = _memo(df)
+    if "positions" not in memo:
+        positions = {}
+        for i, name in enumerate(df["Player"]):
+            positions.setdefault(name, i)
+        memo["positions"] = positions
+    return memo["positions"]
+
+def frame_token(df):
+    """Content hash of a frame, computed once per frame."""
+    memo = _memo(df)
+    if "token" not in memo:
+        hashed = pd.util.hash_pandas_object(df, index=True).to_numpy()
+        memo["token"] = hashlib.sha1(hashed.tobytes() + str(list(df.columns)).encode("utf-8")).hexdigest()[:16]
+    return memo["token"]
+
 def get_player(df, name):
-    row = df[df["Player"] == name]
-    if row.empty: return None
-    return row.iloc[0]
+    pos = _positions(df).get(name)
+    if pos is None: return None
+    return df.iloc[pos]
+
+def _metric_block(df, metrics, absent=np.nan):
+    """Float matrix (rows x metrics) of `metrics`, built once per frame; absent columns hold `absent`."""
+    memo = _memo(df)
+    key = ("block", tuple(metrics), absent)
+    if key not in memo:
+        block = np.full((len(df), len(metrics)), absent, dtype=float)
+        present = [i for i, m in enumerate(metrics) if m in df.columns]
+        if present:
+            block[:, present] = df[[metrics[i] for i in present]].to_numpy(dtype=float)
+        memo[key] = block
+    return memo[key]
+
+def player_positions(df, players):
+    """Row positions and names of the `players` found in `df`, in the given order."""
+    positions = _positions(df)
+    found = [p for p in players if p in positions]
+    return np.array([positions[p] for p in found], dtype=np.int64), found
+
+def comparison_matrix(df, players, metrics):
+    """
+    Metric x player frame for any number of players (unknown names are
+    left out): one take from the frame's metric block, so the cost grows
+    with the shortlist, not the table.
+    """
+    metrics = list(metrics)
+    pos, names = player_positions(df, players)
+    values = _metric_block(df, metrics)[pos]
+    return pd.DataFrame(values.T, index=pd.Index(metrics, name="Metric"), columns=names)
 
 def compare_players(df, player1, player2, metrics):
     p1 = get_player(df, player1)
@@ -63,6 +151,7 @@ def compare_players(df, player1, player2, metrics):
     data = {"Metric": readable_metrics, player1: [p1[m] for m in metrics], player2: [p2[m] for m in metrics]}
     return pd.DataFrame(data)
 
+@timed()
 def plot_comparison_bar(df, player1, player2, metrics):
     pct_metrics = [m + "_pct_adj" for m in metrics if m + "_pct_adj" in df.columns]
     if not pct_metrics: pct_metrics = metrics
@@ -98,6 +187,7 @@ def plot_comparison_bar(df, player1, player2, metrics):
     plt.tight_layout()
     return fig
 
+@timed()
 def plot_radar(df, players, metrics):
     readable_labels = [get_alias(m) for m in metrics]
     num_vars = len(metrics)
@@ -110,13 +200,11 @@ def plot_radar(df, players, metrics):
     
     colors = ["#00B4D8", "#FF006E"]
     
+    block = _metric_block(df, list(metrics), absent=0.0)
+    positions = _positions(df)
     for idx, p in enumerate(players):
-        row = get_player(df, p)
-        if row is None: continue
-        values = []
-        for m in metrics:
-            val = row.get(m, 0) 
-            values.append(val)
+        if p not in positions: continue
+        values = block[positions[p]].tolist()
         values += values[:1]
         ax.plot(angles, values, linewidth=2, linestyle='solid', label=p, color=colors[idx % len(colors)])
         ax.fill(angles, values, alpha=0.25, color=colors[idx % len(colors)])
@@ -140,8 +228,85 @@ def plot_radar(df, players, metrics):
 
     return fig
 
-def plot_top10(df, metric="score"):
-    top = df.sort_values(metric, ascending=False).head(10)
+@timed()
+def plot_radar_grid(df, players, metrics, ncols=5):
+    """Small-multiples radar, one panel per player, with the table median dashed behind."""
+    matrix = comparison_matrix(df, players, metrics)
+    n = matrix.shape[1]
+    if n == 0: return None
+    ncols = min(ncols, n)
+    nrows = math.ceil(n / ncols)
+    angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False).tolist()
+    angles += angles[:1]
+    labels = [get_alias(m) for m in metrics]
+    median = np.nanmedian(_metric_block(df, list(metrics), absent=0.0), axis=0).tolist() if len(df) else [0] * len(metrics)
+    median += median[:1]
+
+    fig, axes = plt.subplots(nrows, ncols, figsize=(2.6 * ncols, 2.9 * nrows), subplot_kw=dict(polar=True), squeeze=False)
+    fig.patch.set_facecolor('none')
+    values = np.nan_to_num(matrix.to_numpy()).T
+    for i, ax in enumerate(axes.flat):
+        if i >= n:
+            ax.set_visible(False)
+            continue
+        v = values[i].tolist()
+        v += v[:1]
+        ax.set_facecolor('#0E1117')
+        ax.plot(angles, median, linewidth=1, linestyle='--', color="#aaaaaa")
+        ax.plot(angles, v, linewidth=1.5, color="#00B4D8")
+        ax.fill(angles, v, alpha=0.25, color="#00B4D8")
+        ax.set_xticks(angles[:-1])
+        ax.set_xticklabels(labels, color='white', size=6)
+        ax.tick_params(axis='x', pad=2)
+        ax.set_yticks([25, 50, 75], [])
+        ax.set_ylim(0, 100)
+        ax.spines['polar'].set_color('#444444')
+        ax.grid(color='#555555', linestyle='--', alpha=0.5)
+        ax.set_title(matrix.columns[i], color='white', size=9, weight='bold', pad=14)
+    fig.subplots_adjust(wspace=0.6, hspace=0.6)
+    return fig
+
+@timed()
+def plot_heatmap(df, players, metrics):
+    """Player x metric percentile heatmap (rows in shortlist order)."""
+    matrix = comparison_matrix(df, players, metrics)
+    if matrix.shape[1] == 0: return None
+    values = matrix.to_numpy().T
+    n, k = values.shape
+
+    fig, ax = plt.subplots(figsize=(2.5 + 0.8 * k, 1.2 + 0.32 * n))
+    fig.patch.set_facecolor('none')
+    ax.set_facecolor('none')
+    image = ax.imshow(values, cmap="viridis", vmin=0, vmax=100, aspect="auto")
+    for (i, j), v in np.ndenumerate(values):
+        if v == v:
+            ax.text(j, i, f"{v:.0f}", ha="center", va="center", fontsize=7, color="black" if v > 60 else "white")
+
+    ax.set_xticks(np.arange(k), [get_alias(m) for m in metrics], rotation=45, ha="right", color="white", fontsize=9)
+    ax.set_yticks(np.arange(n), list(matrix.columns), color="white", fontsize=9)
+    ax.tick_params(length=0)
+    for spine in ax.spines.values():
+        spine.set_visible(False)
+    bar = fig.colorbar(image, ax=ax, fraction=0.04, pad=0.02)
+    bar.set_label("Percentile Rank (0-100)", color="white", fontsize=9)
+    bar.ax.tick_params(colors='white', labelsize=8)
+    bar.outline.set_edgecolor('white')
+    # Fixed margins in inches: tight_layout measures every label and dominates the draw time
+    w, h = fig.get_size_inches()
+    fig.subplots_adjust(left=1.6 / w, right=1 - 0.9 / w, bottom=1.1 / h, top=1 - 0.1 / h)
+    return fig
+
+def top_rows(df, metric="score", n=10, **filters):
+    """Top n rows by `metric` through a RankIndex kept per frame."""
+    memo = _memo(df)
+    if "ranking" not in memo:
+        memo["ranking"] = RankIndex(df, metrics=[])  # orderings built on first use
+    return memo["ranking"].top(metric, n, **filters)
+
+@timed()
+def plot_top10(df, metric="score", filters=()):
+    # filters: (name, value) pairs for RankIndex.mask, hashable for render_chart
+    top = top_rows(df, metric, 10, **dict(filters))
     fig, ax = plt.subplots(figsize=(8, 5))
     fig.patch.set_facecolor('none')
     ax.set_facecolor('none')
@@ -159,6 +324,34 @@ def plot_top10(df, metric="score"):
     ax.spines['left'].set_color('white')
     return fig
 
+@timed()
+def plot_form(form, players, metric="score"):
+    # form: form.rolling_form output; one line per player over match dates
+    fig, ax = plt.subplots(figsize=(8, 4))
+    fig.patch.set_facecolor('none')
+    ax.set_facecolor('none')
+
+    colors = ["#00B4D8", "#FF006E", "#00CC96", "#FFD166", "#B388FF"]
+    for idx, p in enumerate(players):
+        rows = form[(form["Player"] == p) & form["complete"]].sort_values("Date")
+        if rows.empty: continue
+        ax.plot(rows["Date"], rows[metric], linewidth=2, marker="o", markersize=3, label=p, color=colors[idx % len(colors)])
+
+    ax.set_ylabel(get_alias(metric), color="white", fontsize=10)
+    ax.tick_params(axis='x', colors='white', labelrotation=30)
+    ax.tick_params(axis='y', colors='white')
+    ax.grid(axis='y', linestyle='--', alpha=0.3, color='white')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.spines['bottom'].set_color('white')
+    ax.spines['left'].set_color('white')
+
+    if ax.lines:
+        legend = ax.legend(facecolor='#0E1117', edgecolor='white')
+        plt.setp(legend.get_texts(), color='white')
+    plt.tight_layout()
+    return fig
+
 def player_card(player_row):
     if player_row is None: return {}
     return {
@@ -172,4 +365,295 @@ def player_card(player_row):
         "Assists": int(player_row["Ast"]),
         "G+A": int(player_row["G+A"]),
         "Score": round(player_row["score"], 2)
-    }
\ No newline at end of file
+    }
+
+
+class ChartCache:
+    """Bounded LRU of rendered chart bytes, evicted by total size."""
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            data = self.entries.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key, data):
+        with self.lock:
+            if key in self.entries:
+                self.size -= len(self.entries.pop(key))
+            self.entries[key] = data
+            self.size += len(data)
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                _, old = self.entries.popitem(last=False)
+                self.size -= len(old)
+
+    def stats(self):
+        with self.lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries), "bytes": self.size}
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = self.hits = self.misses = 0
+
+chart_cache = ChartCache()
+
+CHARTS = {"radar": plot_radar, "comparison_bar": plot_comparison_bar, "top10": plot_top10, "form": plot_form,
+          "radar_grid": plot_radar_grid, "heatmap": plot_heatmap}
+
+png_compress_level = 1  # zlib level for chart PNGs; pixels are the same at any level
+
+def save_tight(fig, target, fmt="png", dpi=200, **kwargs):
+    """
+    fig.savefig(..., bbox_inches="tight"). For PNG the box is measured
+    directly, which skips the extra layout draw savefig does to find it
+    (same bounds, same pixels).
+    """
+    bbox = "tight"
+    if fmt == "png":
+        if not isinstance(fig.canvas, FigureCanvasAgg): FigureCanvasAgg(fig)
+        dpi0 = fig.dpi
+        fig.dpi = dpi
+        try:
+            bbox = fig.get_tightbbox(fig.canvas.get_renderer()).padded(plt.rcParams["savefig.pad_inches"])
+        finally:
+            fig.dpi = dpi0
+    fig.savefig(target, format=fmt, dpi=dpi, bbox_inches=bbox, **kwargs)
+
+def _chart_bytes(fig, fmt):
+    # Same settings st.pyplot uses
+    buf = io.BytesIO()
+    options = {"pil_kwargs": {"compress_level": png_compress_level}} if fmt == "png" else {}
+    save_tight(fig, buf, fmt, **options)
+    return buf.getvalue()
+
+@timed("render_figure")
+def figure_bytes(fig, fmt="png"):
+    data = _chart_bytes(fig, fmt)
+    plt.close(fig)
+    return data
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)): return tuple(_freeze(v) for v in value)
+    return value
+
+def render_chart(kind, df, *args, version="", fmt="png", cache=chart_cache, templates=True):
+    """
+    PNG/SVG bytes for CHARTS[kind](df, *args), served from `cache` when the
+    same chart over the same data was drawn before. Misses are drawn on a
+    reusable chart template unless templates=False.
+    """
+    key = (kind, version, frame_token(df), _freeze(args), fmt)
+    data = cache.get(key)
+    if data is None:
+        if templates and kind in TEMPLATE_KINDS:
+            data = template_bytes(kind, df, *args, fmt=fmt)
+        else:
+            fig = CHARTS[kind](df, *args)
+            data = figure_bytes(fig, fmt) if fig is not None else None
+        if data is None: return None
+        cache.put(key, data)
+    return data
+
+
+# ============================================================
+# CHART TEMPLATES
+# ============================================================
+# Styled figures built once per chart type and metric layout; drawing a
+# new player only moves polygons / bar heights and swaps label text.
+# Figures are not registered with pyplot, so they are never closed.
+def _template_figure(figsize):
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    fig.patch.set_facecolor('none')
+    return fig
+
+class RadarTemplate:
+    colors = ["#00B4D8", "#FF006E"]
+
+    def __init__(self, metrics, slots):
+        self.metrics = list(metrics)
+        self.lock = threading.Lock()
+        angles = np.linspace(0, 2 * np.pi, len(metrics), endpoint=False).tolist()
+        self.angles = angles + angles[:1]
+
+        self.fig = _template_figure((6, 6))
+        ax = self.ax = self.fig.add_subplot(polar=True)
+        ax.set_facecolor('#0E1117')
+
+        blank = [0] * len(self.angles)
+        self.lines, self.fills = [], []
+        for idx in range(slots):
+            color = self.colors[idx % len(self.colors)]
+            self.lines.append(ax.plot(self.angles, blank, linewidth=2, linestyle='solid', color=color)[0])
+            self.fills.append(ax.fill(self.angles, blank, alpha=0.25, color=color)[0])
+
+        ax.set_xticks(self.angles[:-1])
+        ax.set_xticklabels([get_alias(m) for m in metrics], color='white', size=11, weight='bold')
+        ax.tick_params(axis='x', pad=15)
+        ax.set_rlabel_position(0)
+        ax.set_yticks([20, 40, 60, 80], ["20", "40", "60", "80"], color="#aaaaaa", size=8)
+        ax.set_ylim(0, 100)
+        ax.spines['polar'].set_color('#444444')
+        ax.grid(color='#555555', linestyle='--', alpha=0.5)
+
+    def draw(self, df, players, metrics=None):
+        shown = []
+        block = _metric_block(df, self.metrics, absent=0.0)
+        positions = _positions(df)
+        for idx, (line, fill) in enumerate(zip(self.lines, self.fills)):
+            pos = positions.get(players[idx]) if idx < len(players) else None
+            line.set_visible(pos is not None)
+            fill.set_visible(pos is not None)
+            if pos is None: continue
+            values = block[pos].tolist()
+            values += values[:1]
+            line.set_data(self.angles, values)
+            fill.set_xy(np.column_stack([self.angles, values]))
+            line.set_label(players[idx])
+            shown.append(line)
+
+        legend = self.ax.legend(handles=shown, loc='upper right', bbox_to_anchor=(1.3, 1.1))
+        frame = legend.get_frame()
+        frame.set_facecolor('#0E1117')
+        frame.set_edgecolor('white')
+        plt.setp(legend.get_texts(), color='white')
+        return self.fig
+
+class ComparisonBarTemplate:
+    def __init__(self, pct_metrics):
+        self.metrics = list(pct_metrics)
+        self.lock = threading.Lock()
+        self.fig = _template_figure((8, 5))
+        ax = self.ax = self.fig.add_subplot()
+        ax.set_facecolor('none')
+
+        x = np.arange(len(pct_metrics))
+        width = 0.35
+        blank = np.zeros(len(pct_metrics))
+        self.bars = [
+            ax.bar(x - width/2, blank, width, color="#00B4D8", edgecolor='white', linewidth=0.5),
+            ax.bar(x + width/2, blank, width, color="#FF006E", edgecolor='white', linewidth=0.5),
+        ]
+
+        ax.set_xticks(x)
+        ax.set_xticklabels([get_alias(m) for m in pct_metrics], rotation=45, ha="right", color="white", fontsize=10)
+        ax.set_ylabel("Percentile Rank (0-100)", color="white", fontsize=10)
+        ax.tick_params(axis='y', colors='white')
+        ax.grid(axis='y', linestyle='--', alpha=0.3, color='white')
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['bottom'].set_color('white')
+        ax.spines['left'].set_color('white')
+        self.subplotpars = dict(vars(self.fig.subplotpars))
+
+    def draw(self, df, player1, player2, metrics=None):
+        comp = compare_players(df, player1, player2, self.metrics)
+        if comp is None or comp.empty: return None
+        for bars, player in zip(self.bars, (player1, player2)):
+            for rect, h in zip(bars, comp[player]):
+                rect.set_height(h)
+            bars.set_label(player)
+        self.ax.relim()
+        self.ax.autoscale_view()
+
+        legend = self.ax.legend(handles=self.bars, facecolor='#0E1117', edgecolor='white')
+        plt.setp(legend.get_texts(), color='white')
+        # Tick label widths depend on the y range, so lay out again from the
+        # untouched position (tight_layout depends on where it starts)
+        self.fig.subplots_adjust(**self.subplotpars)
+        self.fig.tight_layout()
+        return self.fig
+
+class Top10Template:
+    slots = 10
+
+    def __init__(self, metric):
+        self.metric = metric
+        self.lock = threading.Lock()
+        self.fig = _template_figure((8, 5))
+        ax = self.ax = self.fig.add_subplot()
+        ax.set_facecolor('none')
+
+        self.bars = ax.barh(np.arange(self.slots), np.zeros(self.slots), color="#00CC96")
+        ax.invert_yaxis()
+        ax.set_xlabel(get_alias(metric), color="white", fontsize=10)
+        ax.tick_params(axis='x', colors='white')
+        ax.tick_params(axis='y', colors='white')
+        ax.spines['top'].set_visible(False)
+        ax.spines['right'].set_visible(False)
+        ax.spines['bottom'].set_color('white')
+        ax.spines['left'].set_color('white')
+
+    def draw(self, df, metric="score", filters=()):
+        top = top_rows(df, self.metric, self.slots, **dict(filters))
+        if top.empty:
+            # Nothing to move the bars to: draw the empty chart afresh (template_bytes closes it)
+            return plot_top10(df, self.metric, filters)
+        values = top[self.metric].to_numpy(dtype=float)
+        for i, rect in enumerate(self.bars):
+            rect.set_visible(i < len(values))
+            rect.set_width(values[i] if i < len(values) else 0)
+        self.ax.set_yticks(np.arange(len(values)), top["Player"].tolist())
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+        return self.fig
+
+TEMPLATE_KINDS = ("radar", "comparison_bar", "top10")
+MAX_TEMPLATES = 64
+_templates = OrderedDict()
+_templates_lock = threading.Lock()
+
+def _template_key(kind, df, *args):
+    if kind == "radar":
+        players, metrics = args
+        return (kind, tuple(metrics), len(players))
+    if kind == "comparison_bar":
+        metrics = args[2]
+        pct_metrics = [m + "_pct_adj" for m in metrics if m + "_pct_adj" in df.columns] or list(metrics)
+        return (kind, tuple(pct_metrics))
+    return (kind, args[0] if args else "score")
+
+def chart_template(kind, df, *args):
+    """The shared template that draws CHARTS[kind](df, *args); lock it while drawing and saving."""
+    key = _template_key(kind, df, *args)
+    with _templates_lock:
+        template = _templates.get(key)
+        if template is None:
+            if kind == "radar": template = RadarTemplate(key[1], key[2])
+            elif kind == "comparison_bar": template = ComparisonBarTemplate(key[1])
+            else: template = Top10Template(key[1])
+            _templates[key] = template
+            if len(_templates) > MAX_TEMPLATES: _templates.popitem(last=False)
+        else:
+            _templates.move_to_end(key)
+        return template
+
+def template_figure(kind, df, *args):
+    """
+    CHARTS[kind](df, *args) drawn on its shared template. The figure is
+    redrawn by the next call for the same layout, so save it first (and
+    hold template.lock when other threads draw too).
+    """
+    return chart_template(kind, df, *args).draw(df, *args)
+
+@timed("render_template")
+def template_bytes(kind, df, *args, fmt="png"):
+    """Same bytes as figure_bytes(CHARTS[kind](df, *args)), drawn on a template."""
+    template = chart_template(kind, df, *args)
+    with template.lock:
+        fig = template.draw(df, *args)
+        if fig is None: return None
+        if fig is not template.fig: return figure_bytes(fig, fmt)  # a one-off pyplot fallback
+        return _chart_bytes(fig, fmt)
@@ -0,0 +1,203 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+import preprocessor as pp
+
+# ============================================================
+# INCREMENTAL RE-RANKING (MATCHWEEK UPDATES)
+# ============================================================
+def player_keys(df):
+    """Stable row key: (Player, Squad) plus Season when the frame has one."""
+    cols = ["Player", "Squad"] + (["Season"] if "Season" in df.columns else [])
+    return list(zip(*(df[c].to_numpy(dtype=object) for c in cols)))
+
+class SortedValues:
+    """
+    Sorted multiset of floats: sorted chunks of at most 2 * `load` values
+    plus a Fenwick tree over the chunk sizes. add / remove shift one chunk
+    and touch log(chunks) tree nodes, and bisect_left / bisect_right give
+    global positions, so no update moves the whole list.
+    """
+    load = 512
+
+    def __init__(self, values=()):
+        values = sorted(values)
+        self.chunks = [values[i:i + self.load] for i in range(0, len(values), self.load)]
+        self._reindex()
+
+    def _reindex(self):
+        self.maxes = [c[-1] for c in self.chunks]
+        n = len(self.chunks)
+        self.tree = [0] * (n + 1)
+        for i, c in enumerate(self.chunks, 1):
+            self.tree[i] += len(c)
+            parent = i + (i & -i)
+            if parent <= n: self.tree[parent] += self.tree[i]
+        self.size = sum(len(c) for c in self.chunks)
+
+    def _grow(self, i, delta):
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def _before(self, i):
+        # Values in chunks 0 .. i-1
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+    def __len__(self):
+        return self.size
+
+    def add(self, v):
+        if not self.chunks:
+            self.chunks = [[v]]
+            self._reindex()
+            return
+        i = min(bisect.bisect_left(self.maxes, v), len(self.chunks) - 1)
+        chunk = self.chunks[i]
+        bisect.insort(chunk, v)
+        self.maxes[i] = chunk[-1]
+        self.size += 1
+        if len(chunk) > 2 * self.load:
+            self.chunks[i:i + 1] = [chunk[:self.load], chunk[self.load:]]
+            self._reindex()
+        else:
+            self._grow(i, 1)
+
+    def remove(self, v):
+        i = bisect.bisect_left(self.maxes, v)
+        chunk = self.chunks[i]
+        del chunk[bisect.bisect_left(chunk, v)]
+        self.size -= 1
+        if not chunk:
+            del self.chunks[i]
+            self._reindex()
+        else:
+            self.maxes[i] = chunk[-1]
+            self._grow(i, -1)
+
+    def bisect_left(self, v):
+        i = bisect.bisect_left(self.maxes, v)
+        if i == len(self.chunks): return self.size
+        return self._before(i) + bisect.bisect_left(self.chunks[i], v)
+
+    def bisect_right(self, v):
+        i = bisect.bisect_right(self.maxes, v)
+        if i == len(self.chunks): return self.size
+        return self._before(i) + bisect.bisect_right(self.chunks[i], v)
+
+    def to_array(self):
+        return np.fromiter((v for c in self.chunks for v in c), dtype=float, count=self.size)
+
+class IncrementalRanker:
+    """
+    One SortedValues per (role, metric). An upsert or removal only moves
+    the changed player's values in those (log-time per value), and
+    any player's _pct / _pct_adj / score is read back with two bisects per
+    metric, so nothing is re-ranked for the rest of the role group.
+    `full_recompute()` runs the normal engine over the same rows and is
+    the reference these numbers must match.
+    """
+    def __init__(self, df, min_minutes=800):
+        self.min_minutes = min_minutes
+        df = pp.clean_data(df, min_minutes=0)
+        self.raw_columns = list(df.columns)
+        self.per90_cols, self.rank_cols, self.columns = pp.derived_layout(df)
+        self.rows = {}      # key -> cleaned raw row
+        self.role = {}      # key -> index into pp.roles
+        self.values = {}    # key -> ranking values (one per rank_col)
+        self.per90 = {}     # key -> per-90 values (one per per90_col)
+        self.weight = {}    # key -> league weight
+        self.sorted = [[SortedValues() for _ in self.rank_cols] for _ in pp.roles]
+        self.upsert(df, clean=False)
+
+    # ----- updates -----
+    def upsert(self, rows, clean=True):
+        """Insert new player rows or replace existing ones (matched by key)."""
+        if clean:
+            rows = pp.clean_data(rows, min_minutes=0)
+        # Every row needs what the ranker was built with, or per-90s and ranks would not match
+        missing = [c for c in self.raw_columns if c not in rows.columns]
+        if missing:
+            raise ValueError(f"upsert rows are missing columns {missing}")
+        rows = rows[self.raw_columns]
+        codes = pp.role_codes(rows)
+        per90, to_rank = pp.metric_rows(rows, self.per90_cols, self.rank_cols)
+        weights = pp.league_weight_vector(rows["Comp"])
+
+        for i, (key, record) in enumerate(zip(player_keys(rows), rows.to_dict("records"))):
+            self._drop(key)
+            if codes[i] < 0 or record["Min"] < self.min_minutes: continue
+            values = to_rank[:, i].copy()
+            for lst, v in zip(self.sorted[codes[i]], values):
+                if v == v: lst.add(v)
+            self.rows[key] = record
+            self.role[key] = int(codes[i])
+            self.values[key] = values
+            self.per90[key] = per90[:, i].copy()
+            self.weight[key] = weights[i]
+
+    def remove(self, keys):
+        for key in keys:
+            self._drop(key)
+
+    def _drop(self, key):
+        if key not in self.role: return
+        for lst, v in zip(self.sorted[self.role[key]], self.values[key]):
+            if v == v: lst.remove(v)
+        for table in (self.rows, self.role, self.values, self.per90, self.weight):
+            del table[key]
+
+    # ----- queries -----
+    def percentiles(self, key):
+        """_pct values for one player, in rank_cols order."""
+        out = np.full(len(self.rank_cols), np.nan)
+        for j, (lst, v) in enumerate(zip(self.sorted[self.role[key]], self.values[key])):
+            if v != v: continue
+            lo, hi = lst.bisect_left(v), lst.bisect_right(v)
+            # Average 1-based rank of the tied run, as in Series.rank(pct=True)
+            out[j] = (lo + hi + 1) / 2 / len(lst) * 100
+        return out
+
+    def player(self, key):
+        """Full processed row (raw columns + per-90 / _pct / _pct_adj / score)."""
+        pct = self.percentiles(key)
+        adj = pct * self.weight[key]
+        score = pp.score_rows(adj[:, None], self.rank_cols, np.array([self.role[key]]))[0]
+        derived = np.concatenate([self.per90[key], pct, [self.weight[key]], adj, [score]])
+        return pd.concat([pd.Series(self.rows[key]), pd.Series(derived, index=self.columns)])
+
+    def frames(self):
+        """All role tables, ranked against the maintained sorted lists."""
+        df, codes, bounds = pp.sort_by_role(self._raw())
+        p, k = len(self.per90_cols), len(self.rank_cols)
+        out = np.zeros((len(self.columns), len(df)))
+        out[:p], to_rank = pp.metric_rows(df, self.per90_cols, self.rank_cols)
+
+        pct = out[p:p + k]
+        for r, lo, hi in zip(range(len(pp.roles)), bounds[:-1], bounds[1:]):
+            for j, lst in enumerate(self.sorted[r]):
+                arr = lst.to_array()
+                vals = to_rank[j, lo:hi]
+                with np.errstate(invalid="ignore", divide="ignore"):
+                    ranks = (np.searchsorted(arr, vals, "left") + np.searchsorted(arr, vals, "right") + 1) / 2
+                    pct[j, lo:hi] = np.where(np.isnan(vals), np.nan, ranks / len(arr) * 100)
+
+        out[p + k] = pp.league_weight_vector(df["Comp"])
+        adj = out[p + k + 1:p + 2 * k + 1]
+        np.multiply(pct, out[p + k], out=adj)
+        out[-1] = pp.score_rows(adj, self.rank_cols, codes)
+        return pp.assemble_frames(df, out, self.columns, bounds)
+
+    def full_recompute(self):
+        """Reference path: rank every role from scratch over the same rows."""
+        return pp.process_all(self._raw())
+
+    def _raw(self):
+        return pd.DataFrame.from_records(list(self.rows.values()), columns=self.raw_columns)
@@ -0,0 +1,161 @@
+import os
+import json
+import time
+import logging
+import threading
+import functools
+import tracemalloc
+from collections import deque
+
+# ============================================================
+# OPT-IN PIPELINE INSTRUMENTATION
+# ============================================================
+# Off by default. With it off, stage() hands back a shared no-op and
+# @timed functions cost one flag check. Turn on with enable() or by
+# setting FA_INSTRUMENT=1 (time only) / FA_INSTRUMENT=memory.
+enabled = False
+trace_memory = False
+
+MAX_RECORDS = 5000
+
+log = logging.getLogger("football_analytics.instrument")
+
+_records = deque(maxlen=MAX_RECORDS)
+_local = threading.local()
+
+def enable(memory=True):
+    """Start recording stages; memory=True also tracks peak memory (slower)."""
+    global enabled, trace_memory
+    trace_memory = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    enabled = True
+
+def disable():
+    global enabled, trace_memory
+    enabled = False
+    if trace_memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    trace_memory = False
+
+def records():
+    return list(_records)
+
+def clear():
+    _records.clear()
+
+def to_json(path=None):
+    text = json.dumps(records(), indent=2)
+    if path is not None:
+        with open(path, "w") as f:
+            f.write(text)
+    return text
+
+def summary():
+    """Per stage: calls, total / mean / max seconds, max peak MB, max rows."""
+    out = {}
+    for r in _records:
+        s = out.setdefault(r["stage"], {"stage": r["stage"], "calls": 0, "total_s": 0.0, "max_s": 0.0, "peak_mb": None, "rows": None})
+        s["calls"] += 1
+        s["total_s"] += r["seconds"]
+        s["max_s"] = max(s["max_s"], r["seconds"])
+        if r["peak_mb"] is not None: s["peak_mb"] = max(s["peak_mb"] or 0.0, r["peak_mb"])
+        if r["rows"] is not None: s["rows"] = max(s["rows"] or 0, r["rows"])
+    for s in out.values():
+        s["mean_s"] = s["total_s"] / s["calls"]
+    return sorted(out.values(), key=lambda s: -s["total_s"])
+
+
+class _NoStage:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+    def shape(self, obj): pass
+    def set(self, **info): pass
+
+_NO_STAGE = _NoStage()
+
+class _Stage:
+    def __init__(self, name, info):
+        self.name = name
+        self.info = info
+        self.rows = self.cols = None
+
+    def shape(self, obj):
+        """Record rows / columns of a DataFrame-like (or a (rows, cols) tuple)."""
+        shape = obj if isinstance(obj, tuple) else getattr(obj, "shape", None)
+        if shape and all(isinstance(x, int) for x in shape):
+            self.rows = int(shape[0])
+            self.cols = int(shape[1]) if len(shape) > 1 else None
+
+    def set(self, **info):
+        self.info.update(info)
+
+    def __enter__(self):
+        stack = _stack()
+        self.parent = stack[-1].name if stack else None
+        self.depth = len(stack)
+        self.memory = trace_memory and tracemalloc.is_tracing()
+        if self.memory:
+            # tracemalloc has one global peak: fold it into the enclosing
+            # stage before resetting it for this one
+            current, peak = tracemalloc.get_traced_memory()
+            if stack: stack[-1].running_peak = max(stack[-1].running_peak, peak)
+            tracemalloc.reset_peak()
+            self.start_mem = self.running_peak = current
+        stack.append(self)
+        self.wall = time.time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        seconds = time.perf_counter() - self.start
+        stack = _stack()
+        stack.pop()
+        peak_mb = None
+        if self.memory:
+            peak = max(self.running_peak, tracemalloc.get_traced_memory()[1])
+            peak_mb = (peak - self.start_mem) / 2**20
+            if stack: stack[-1].running_peak = max(stack[-1].running_peak, peak)
+        record = {
+            "stage": self.name, "parent": self.parent, "depth": self.depth,
+            "start": self.wall, "seconds": seconds, "peak_mb": peak_mb,
+            "rows": self.rows, "cols": self.cols, "thread": threading.current_thread().name,
+            "error": exc_type.__name__ if exc_type else None, **self.info,
+        }
+        _records.append(record)
+        if log.isEnabledFor(logging.INFO):
+            log.info(json.dumps(record, default=str))
+        return False
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+def stage(name, **info):
+    """Context manager timing one pipeline step (no-op unless enabled)."""
+    if not enabled: return _NO_STAGE
+    return _Stage(name, info)
+
+def timed(name=None):
+    """Decorator: run the function inside stage(name), recording its input frame's shape."""
+    def wrap(fn):
+        label = name or fn.__name__
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not enabled: return fn(*args, **kwargs)
+            with _Stage(label, {}) as s:
+                for a in args:
+                    if hasattr(a, "shape"):
+                        s.shape(a)
+                        break
+                result = fn(*args, **kwargs)
+                if s.rows is None and hasattr(result, "shape"): s.shape(result)
+                return result
+        return inner
+    return wrap
+
+_env = os.environ.get("FA_INSTRUMENT", "").lower()
+if _env in ("1", "true", "memory"):
+    enable(memory=_env == "memory")
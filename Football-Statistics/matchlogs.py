@@ -0,0 +1,185 @@
+import os
+import glob
+import hashlib
+import argparse
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+import cache
+import store
+
+# ============================================================
+# MATCH LOGS -> SEASON TOTALS
+# ============================================================
+# One input row is one player in one match. Rows are summed per player,
+# squad, competition and season; rates (Cmp%, Save%, GA90, ...) are then
+# recomputed from the summed counts, giving the FBref season-table schema
+# load_data reads.
+key_cols = ["Season", "Comp", "Squad", "Player"]
+info_cols = ["Nation", "Pos", "Age"]  # last value seen (by Date when present) wins
+sum_cols = [
+    "Min", "Gls", "Ast", "xG", "npxG", "xAG", "Sh", "SoT", "PrgC", "PrgP", "PrgR",
+    "Cmp", "Att", "KP", "1/3", "PPA", "CrsPA", "xA", "Carries",
+    "Tkl", "TklW", "Def 3rd", "Mid 3rd", "Att 3rd", "Int", "Clr", "Err",
+    "GA", "SoTA", "Saves", "PSxG", "CS",
+]
+
+chunk_rows = 250_000  # rows parsed at a time; memory scales with players, not matches
+
+def _read_columns(name):
+    return name in key_cols or name in info_cols or name in sum_cols or name == "Date"
+
+def _combine(parts, has_date):
+    """Merge partial aggregates (or chunk rows) that may share keys."""
+    df = pd.concat(parts, ignore_index=True)
+    if has_date:
+        df = df.sort_values("Date", kind="stable")
+    groups = df.groupby(key_cols, sort=False, dropna=False)
+    sums = groups[[c for c in sum_cols + ["MP"] if c in df.columns]].sum(min_count=1)
+    info = [c for c in info_cols + ["Date"] if c in df.columns]
+    if info:
+        sums = sums.join(groups[info].last())
+    return sums.reset_index()
+
+def aggregate_file(path, season=None, chunksize=None):
+    """
+    Stream one match-log CSV and return its per-player sums. Only one chunk
+    plus the running totals (one row per player) are held at a time.
+    """
+    totals, has_date = None, False
+    reader = pd.read_csv(path, usecols=_read_columns, chunksize=chunksize or chunk_rows,
+                         dtype={c: np.float64 for c in sum_cols})
+    for chunk in reader:
+        if "Season" not in chunk.columns:
+            chunk["Season"] = season or store.season_from_path(path)
+        chunk["Comp"] = chunk["Comp"].fillna("other")
+        # Appearances: matches with minutes on the pitch
+        chunk["MP"] = (chunk["Min"] > 0).astype(np.float64)
+        if "Date" in chunk.columns:
+            chunk["Date"] = pd.to_datetime(chunk["Date"])
+            has_date = True
+        parts = [chunk] if totals is None else [totals, chunk]
+        totals = _combine(parts, has_date)
+    if totals is None:
+        return pd.DataFrame(columns=key_cols)
+    for col in sum_cols + ["MP"]:
+        if col in totals.columns:
+            totals[col] = totals[col].astype(np.float64)
+    return totals
+
+def season_table(totals):
+    """Season rows in the FBref schema: sums plus rates recomputed from them."""
+    df = totals.drop(columns=["Date"], errors="ignore").copy()
+    col = lambda c: df[c] if c in df.columns else None
+    with np.errstate(invalid="ignore", divide="ignore"):
+        df["90s"] = df["Min"] / 90
+        derived = {
+            "G+A": (col("Gls"), col("Ast"), np.add),
+            "npxG+xAG": (col("npxG"), col("xAG"), np.add),
+            "Tkl+Int": (col("Tkl"), col("Int"), np.add),
+            "PSxG+/-": (col("PSxG"), col("GA"), np.subtract),
+            "Sh/90": (col("Sh"), df["90s"], np.divide),
+            "SoT/90": (col("SoT"), df["90s"], np.divide),
+            "GA90": (col("GA"), df["90s"], np.divide),
+            "G/Sh": (col("Gls"), col("Sh"), np.divide),
+            "G/SoT": (col("Gls"), col("SoT"), np.divide),
+            "PSxG/SoT": (col("PSxG"), col("SoTA"), np.divide),
+        }
+        for name, (a, b, op) in derived.items():
+            if a is not None and b is not None:
+                df[name] = op(a, b)
+        percents = {"SoT%": ("SoT", "Sh"), "Cmp%": ("Cmp", "Att"), "Save%": ("Saves", "SoTA"), "CS%": ("CS", "MP")}
+        for name, (a, b) in percents.items():
+            if a in df.columns and b in df.columns:
+                df[name] = df[a] / df[b] * 100
+    # FBref leaves a rate blank when its denominator is 0
+    return df.replace([np.inf, -np.inf], np.nan)
+
+def season_totals(rows):
+    """season_table straight from in-memory match rows."""
+    rows = rows.assign(MP=(rows["Min"] > 0).astype(np.float64))
+    if "Season" not in rows.columns: rows["Season"] = ""
+    return season_table(_combine([rows], "Date" in rows.columns))
+
+
+# ============================================================
+# PER-FILE PARTIALS (ONLY CHANGED FILES ARE RE-READ)
+# ============================================================
+def _partials_dir(cache_dir=None):
+    # Dot-named so cache.save_frames never prunes it
+    return os.path.join(cache_dir or cache.CACHE_DIR, ".matchlogs")
+
+def _partial_path(path, season, cache_dir=None):
+    ident = f"{os.path.abspath(path)}|{season}|{key_cols}|{info_cols}|{sum_cols}"
+    stat = os.stat(path)
+    name = hashlib.sha1(ident.encode("utf-8")).hexdigest()[:16]
+    return os.path.join(_partials_dir(cache_dir), name), f"{stat.st_size}-{stat.st_mtime_ns}"
+
+def file_totals(path, season=None, cache_dir=None, chunksize=None):
+    """(sums for `path`, True when they had to be recomputed)."""
+    prefix, stamp = _partial_path(path, season, cache_dir)
+    target = f"{prefix}-{stamp}.feather"
+    if os.path.exists(target):
+        return feather.read_table(target).to_pandas(), False
+
+    totals = aggregate_file(path, season, chunksize)
+    os.makedirs(os.path.dirname(prefix), exist_ok=True)
+    for stale in glob.glob(prefix + "-*.feather"):
+        os.remove(stale)
+    tmp = target + ".tmp"
+    feather.write_feather(pa.Table.from_pandas(totals, preserve_index=False), tmp)
+    os.replace(tmp, target)
+    return totals, True
+
+def aggregate(paths, season=None, cache_dir=None, chunksize=None, use_cache=True):
+    """
+    Season table for a set of match-log files. Each file's sums are kept on
+    disk keyed by its size and mtime, so a re-run only streams the files
+    that changed (or are new) and merges the rest from their partials.
+    """
+    parts, changed = [], []
+    for path in paths:
+        if use_cache:
+            totals, fresh = file_totals(path, season, cache_dir, chunksize)
+        else:
+            totals, fresh = aggregate_file(path, season, chunksize), True
+        parts.append(totals)
+        if fresh: changed.append(path)
+    parts = [p for p in parts if len(p)]
+    if not parts:
+        return pd.DataFrame(columns=key_cols), changed
+    totals = _combine(parts, any("Date" in p.columns for p in parts))
+    return season_table(totals), changed
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aggregate per-match player logs into season tables.")
+    parser.add_argument("logs", nargs="+", help="Match-log CSV files")
+    parser.add_argument("--season", help="Season label for logs without a Season column (default: from the filename)")
+    parser.add_argument("--out", help="Write the season table to this CSV")
+    parser.add_argument("--store", action="store_true", help="Write into the partitioned store (one season at a time)")
+    parser.add_argument("--store-dir", default=None)
+    parser.add_argument("--chunksize", type=int, default=chunk_rows)
+    parser.add_argument("--no-cache", action="store_true", help="Re-read every file")
+    args = parser.parse_args(argv)
+    if not args.out and not args.store:
+        parser.error("pass --out and/or --store")
+
+    table, changed = aggregate(args.logs, args.season, chunksize=args.chunksize, use_cache=not args.no_cache)
+    print(f"{len(args.logs)} files ({len(changed)} re-read) -> {len(table)} player rows")
+    if args.out:
+        table.to_csv(args.out, index=False)
+        print(f"wrote {args.out}")
+    if args.store:
+        for season, part in table.groupby("Season", sort=True):
+            rows = store.write(part.drop(columns="Season"), season, args.store_dir)
+            print(f"season {season}: {rows} rows -> store")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import numpy as np
+import pandas as pd
+
+import preprocessor as pp
+
+# ============================================================
+# LAZY METRIC GRAPH
+# ============================================================
+class MetricGraph:
+    """
+    Derived columns as nodes: name -> (dependencies, fn(*dependency values)).
+    Names that are not nodes are raw columns. A value of None means "not
+    available" (raw column missing) and flows through the graph, so a
+    metric the data cannot support is simply absent, as in process_all.
+    """
+    def __init__(self):
+        self.nodes = {}
+
+    def define(self, name, deps, fn):
+        self.nodes[name] = (list(deps), fn)
+        return name
+
+    def define_per90(self, source, name=None):
+        """`source` per 90 minutes; 0.0 when the raw column is missing (as add_per90)."""
+        def per90(values, nineties):
+            if values is None: return np.zeros(len(nineties))
+            with np.errstate(invalid="ignore", divide="ignore"):
+                return values / nineties
+        return self.define(name or source + "_per90", [source, "90s"], per90)
+
+    def define_rank(self, metric, higher_is_better=True):
+        """<metric>_pct within the frame plus the league-adjusted <metric>_pct_adj."""
+        def pct(values):
+            if values is None: return None
+            # Missing counts as 0 when higher is better; inverted metrics keep NaN unranked
+            values = np.nan_to_num(values, nan=0.0) if higher_is_better else -values
+            return pp.group_pct_rank(values[None, :], np.array([0, len(values)]))[0]
+        def adjust(p, weight):
+            return None if p is None else p * weight
+        self.define(metric + "_pct", [metric], pct)
+        return self.define(metric + "_pct_adj", [metric + "_pct", "league_weight"], adjust)
+
+    def define_component(self, name, columns):
+        """Row mean of whichever columns are available (NaN-skipping, 0 when none are)."""
+        def mean(zeros, *values):
+            present = [v for v in values if v is not None]
+            if not present: return zeros
+            return pp.nanmean_rows(np.array(present), list(range(len(present))))
+        return self.define(name, ["_zeros"] + list(columns), mean)
+
+    def define_score(self, components, weights):
+        def score(*parts):
+            total = weights[0] * parts[0]
+            for w, part in zip(weights[1:], parts[1:]):
+                total = total + w * part
+            return total
+        return self.define("score", list(components), score)
+
+    def dependencies(self, name):
+        """Nodes `name` needs, in evaluation order (raw columns excluded)."""
+        order = []
+        def visit(n, path):
+            if n in path: raise ValueError("Metric cycle: " + " -> ".join(path + (n,)))
+            if n in order or n not in self.nodes: return
+            for d in self.nodes[n][0]:
+                visit(d, path + (n,))
+            order.append(n)
+        visit(name, ())
+        return order
+
+
+def default_graph(role):
+    """The preprocessor's metric definitions (per-90s, ranks, league weight, score) for one role."""
+    g = MetricGraph()
+    g.define("_zeros", ["Min"], lambda minutes: np.zeros(len(minutes)))
+    g.define("90s", ["Min"], lambda minutes: minutes / 90)  # only when the raw column is missing
+    for source, name in pp.per90_map.items():
+        g.define_per90(source, name)
+    g.define("league_weight", ["Comp"], pp.league_weight_vector)
+    for metric in pp.metrics_to_rank:
+        g.define_rank(metric, higher_is_better=metric != "GA90")
+
+    if role == "GK":
+        components, weights = pp.gk_components, pp.gk_weights
+    else:
+        components, weights = pp.score_components, pp.position_weights.get(role, (0.25, 0.25, 0.25, 0.25))
+    for name, cols in components.items():
+        g.define_component(name, cols)
+    g.define_score(list(components), weights)
+    return g
+
+
+class LazyFrame:
+    """
+    One role's cleaned rows plus its MetricGraph. `lf["Gls_per90_pct_adj"]`
+    evaluates and memoises only that chain; `lf.frame([...])` returns the
+    raw rows with just the requested derived columns, with the same values
+    process_all produces.
+    """
+    def __init__(self, df, role, graph=None):
+        self.df = df
+        self.role = role
+        self.graph = graph or default_graph(role)
+        self.values = {}
+        self._active = set()
+
+    def _value(self, name):
+        if name in self.values: return self.values[name]
+        if name in self.df.columns:
+            # Raw columns win over same-named nodes (e.g. a real "90s" column)
+            col = self.df[name]
+            value = col.to_numpy(dtype=float) if col.dtype.kind in "biuf" else col
+        elif name in self.graph.nodes:
+            if name in self._active: raise ValueError(f"Metric cycle through {name!r}")
+            self._active.add(name)
+            try:
+                deps, fn = self.graph.nodes[name]
+                value = fn(*(self._value(d) for d in deps))
+            finally:
+                self._active.discard(name)
+        else:
+            value = None
+        self.values[name] = value
+        return value
+
+    def __getitem__(self, name):
+        value = self._value(name)
+        if value is None: raise KeyError(f"{name!r} is not available for this data")
+        return value
+
+    def __contains__(self, name):
+        return self._value(name) is not None
+
+    def computed(self):
+        """Derived nodes evaluated so far."""
+        return [n for n in self.values if n in self.graph.nodes and n not in self.df.columns]
+
+    def frame(self, columns=()):
+        """Raw rows plus the requested derived columns (unavailable ones are skipped)."""
+        derived = {c: self._value(c) for c in columns if c not in self.df.columns}
+        derived = {c: v for c, v in derived.items() if v is not None}
+        if not derived: return self.df.copy()
+        return pd.concat([self.df, pd.DataFrame(derived, index=self.df.index)], axis=1)
+
+
+def lazy_frames(df):
+    """Cleaned rows (load_data output) split into one LazyFrame per role."""
+    df, codes, bounds = pp.sort_by_role(df)
+    return {role: LazyFrame(df.iloc[lo:hi], role) for role, lo, hi in zip(pp.roles, bounds[:-1], bounds[1:])}
@@ -0,0 +1,215 @@
+import re
+import bisect
+import hashlib
+import unicodedata
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from preprocessor import roles
+
+# ============================================================
+# NAME NORMALISATION & PLAYER IDS
+# ============================================================
+
+# Letters NFKD does not split into base letter + accent
+_FOLD = str.maketrans({"ø": "o", "ł": "l", "đ": "d", "ð": "d", "þ": "th", "æ": "ae", "œ": "oe", "ı": "i"})
+
+def normalize_name(name):
+    """'Kylian Mbappé' -> 'kylian mbappe'; 'Trent Alexander-Arnold' -> 'trent alexander arnold'."""
+    text = unicodedata.normalize("NFKD", str(name)).casefold().translate(_FOLD)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(re.sub(r"[^\w\s]", " ", text).split())
+
+def player_id(player, squad, comp, season=""):
+    """Stable 12-char ID: same player-season-club always gets the same ID (see player_ids for namesakes)."""
+    raw = "|".join(normalize_name(x) for x in (player, squad, comp, season))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:12]
+
+def _normalized(values):
+    # Normalise each distinct value once (names repeat across seasons)
+    codes, uniques = pd.factorize(pd.Series(values, dtype=object))
+    return np.append(np.array([normalize_name(u) for u in uniques], dtype=object), "")[codes]
+
+def player_ids(player, squad, comp, season):
+    """
+    player_id() for whole columns. Namesakes at the same club in the same
+    season would share an ID, so the 2nd, 3rd, ... such row (in row order)
+    hashes with a #2, #3, ... suffix.
+    """
+    raw = _normalized(player)
+    for col in (squad, comp, season):
+        raw = raw + "|" + _normalized(col)
+    repeat = pd.Series(raw, dtype=object).groupby(raw, sort=False).cumcount().to_numpy()
+    raw = [r if n == 0 else f"{r}#{n + 1}" for r, n in zip(raw, repeat)]
+    return [hashlib.sha1(r.encode("utf-8")).hexdigest()[:12] for r in raw]
+
+def edit_distance(a, b, limit=2):
+    """Damerau-Levenshtein (adjacent swaps count as 1), giving up above `limit`."""
+    if abs(len(a) - len(b)) > limit: return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        cur = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                cur[j] = min(cur[j], prev2[j - 2] + 1)
+        if min(cur) > limit: return limit + 1
+        prev2, prev = prev, cur
+    return prev[-1]
+
+def _deletes(word):
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+# ============================================================
+# PLAYER INDEX
+# ============================================================
+Entry = namedtuple("Entry", ["player_id", "player", "squad", "comp", "role", "minutes", "match"])
+
+# Match quality, best first
+EXACT, TOKEN, PREFIX, TOKEN_PREFIX, FUZZY = range(5)
+
+MAX_PREFIX_KEYS = 500  # keys scanned for very short prefixes
+
+class PlayerIndex:
+    """
+    Built once over the five role tables. Exact lookups are dict hits on
+    the normalised full name or any single name token; prefix search is a
+    bisect over the sorted keys; typo search uses a one-deletion index
+    (SymSpell style) so no query ever scans the players.
+    """
+    def __init__(self, frames):
+        if not isinstance(frames, dict):
+            frames = dict(zip(roles, frames))
+        self.frames = frames
+
+        parts = []
+        for role, df in frames.items():
+            if df.empty: continue
+            parts.append(pd.DataFrame({
+                "player": df["Player"].to_numpy(), "squad": df["Squad"].to_numpy(),
+                "comp": df["Comp"].to_numpy(),
+                "season": df["Season"].to_numpy() if "Season" in df.columns else "",
+                "minutes": df["Min"].to_numpy(dtype=float), "role": role, "pos": np.arange(len(df)),
+            }))
+        meta = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(
+            columns=["player", "squad", "comp", "season", "minutes", "role", "pos"])
+
+        meta["norm"] = _normalized(meta["player"])
+        meta["player_id"] = player_ids(meta["player"], meta["squad"], meta["comp"], meta["season"])
+        # Most-played first, so every posting list is already in display order
+        meta = meta.sort_values("minutes", ascending=False, kind="stable").reset_index(drop=True)
+        self.meta = meta
+
+        self._player = meta["player"].tolist()
+        self._squad = meta["squad"].tolist()
+        self._comp = meta["comp"].tolist()
+        self._role = meta["role"].tolist()
+        self._pos = meta["pos"].tolist()
+        self._minutes = meta["minutes"].tolist()
+        self._pid = meta["player_id"].tolist()
+        self._norm = meta["norm"].tolist()
+        self.by_id = {pid: i for i, pid in enumerate(self._pid)}
+
+        # Row ids grouped by normalised name; ids are minutes-ranked, so
+        # sorting a posting list keeps the most-played players first
+        name_codes, names = pd.factorize(meta["norm"])
+        order = np.argsort(name_codes, kind="stable")
+        groups = np.split(order, np.cumsum(np.bincount(name_codes, minlength=len(names)))[:-1])
+        self.full = {name: rows.tolist() for name, rows in zip(names, groups)}
+        self.token = {}     # single name token -> row ids
+        for name, rows in self.full.items():
+            for tok in set(name.split()):
+                self.token.setdefault(tok, []).extend(rows)
+        for rows in self.token.values():
+            rows.sort()
+        self.full_keys = sorted(self.full)
+        self.token_keys = sorted(self.token)
+
+        self.deletes = {}   # token with one letter removed -> tokens
+        for tok in self.token_keys:
+            for d in _deletes(tok) | {tok}:
+                self.deletes.setdefault(d, []).append(tok)
+
+    # ----- rows -----
+    def _entry(self, i, match):
+        return Entry(self._pid[i], self._player[i], self._squad[i], self._comp[i],
+                     self._role[i], self._minutes[i], match)
+
+    def row(self, entry):
+        """Processed row (Series) for an Entry or a player ID."""
+        i = self.by_id[entry if isinstance(entry, str) else entry.player_id]
+        return self.frames[self._role[i]].iloc[self._pos[i]]
+
+    def get(self, name, role=None):
+        """First (most minutes) exact match for `name` as a row, or None."""
+        hits = self.exact(name, role, limit=1)
+        return self.row(hits[0]) if hits else None
+
+    # ----- queries -----
+    def exact(self, name, role=None, limit=10):
+        """Full-name matches first, then players sharing the single token."""
+        q = normalize_name(name)
+        ranked = [(i, EXACT) for i in self.full.get(q, [])]
+        if " " not in q:
+            ranked += [(i, TOKEN) for i in self.token.get(q, []) if self._norm[i] != q]
+        return self._collect(ranked, role, limit)
+
+    def prefix(self, text, role=None, limit=10):
+        q = normalize_name(text)
+        if not q: return []
+        ranked = []
+        for keys, table, quality in ((self.full_keys, self.full, PREFIX), (self.token_keys, self.token, TOKEN_PREFIX)):
+            lo = bisect.bisect_left(keys, q)
+            hi = min(bisect.bisect_left(keys, q + "\uffff"), lo + MAX_PREFIX_KEYS)
+            for key in keys[lo:hi]:
+                # Posting lists are minutes-sorted, so the head is enough
+                ranked += [(i, quality) for i in table[key][:limit]]
+        return self._collect(ranked, role, limit, by_minutes=True)
+
+    def fuzzy(self, text, role=None, limit=10, max_distance=None):
+        """Every query token must match a name token within the edit budget."""
+        tokens = normalize_name(text).split()
+        if not tokens: return []
+        rows = None
+        cost = {}
+        for q in tokens:
+            budget = max_distance if max_distance is not None else (1 if len(q) < 6 else 2)
+            matched = {}
+            for d in _deletes(q) | {q}:
+                for tok in self.deletes.get(d, ()):
+                    dist = edit_distance(q, tok, budget)
+                    if dist <= budget:
+                        for i in self.token[tok]:
+                            matched[i] = min(matched.get(i, dist), dist)
+            rows = set(matched) if rows is None else rows & set(matched)
+            for i in rows:
+                cost[i] = cost.get(i, 0) + matched[i]
+        ranked = sorted(rows, key=lambda i: (cost[i], -self._minutes[i]))
+        return self._collect([(i, FUZZY) for i in ranked], role, limit)
+
+    def search(self, text, role=None, limit=10):
+        """Exact, then prefix, then typo-tolerant matches, without duplicates."""
+        seen, out = set(), []
+        for hits in (self.exact(text, role, limit), self.prefix(text, role, limit), self.fuzzy(text, role, limit)):
+            for e in hits:
+                if e.player_id not in seen:
+                    seen.add(e.player_id)
+                    out.append(e)
+                if len(out) == limit: return out
+        return out
+
+    # ----- internals -----
+    def _collect(self, ranked, role, limit, by_minutes=False):
+        if by_minutes:
+            ranked = sorted(ranked, key=lambda t: (t[1], -self._minutes[t[0]]))
+        out, seen = [], set()
+        for i, match in ranked:
+            if i in seen or (role is not None and self._role[i] != role): continue
+            seen.add(i)
+            out.append(self._entry(i, match))
+            if limit is not None and len(out) == limit: break
+        return out
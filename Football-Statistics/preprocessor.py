@@ -1,35 +1,60 @@
 import pandas as pd
 import numpy as np
 import os
+import json
+import hashlib
+
+import cache
+import store
+from instrument import stage, timed
 # ============================================================
 # LOAD & CLEAN RAW DATA
 # ============================================================
-def load_data(path="final_dataset.csv"):
-    # 1. Get the folder where THIS python file is located
+required_cols = [
+    "Player", "Nation", "Pos", "Squad", "Comp", "Season", "Age", "MP", "Min", "90s",
+    "Gls", "Ast", "G+A", "xG", "npxG", "xAG", "npxG+xAG",
+    "Sh", "SoT", "SoT%", "Sh/90", "SoT/90", "G/Sh", "G/SoT",
+    "PrgC", "PrgP", "PrgR",
+    "Cmp", "Att", "Cmp%", "KP", "1/3", "PPA", "CrsPA",
+    "xA", "Carries",
+    "Tkl", "TklW", "Def 3rd", "Mid 3rd", "Att 3rd",
+    "Int", "Clr", "Err", "Tkl+Int",
+    "GA", "GA90", "SoTA", "Saves", "Save%",
+    "PSxG", "PSxG/SoT", "PSxG+/-", "CS", "CS%"
+]
+
+def resolve_path(path=None):
+    if path is not None:
+        return path
+    # Default: the sample season that ships next to this file
     current_dir = os.path.dirname(os.path.abspath(__file__))
-    
-    # 2. Join it with the CSV filename
-    csv_path = os.path.join(current_dir, "players_data_light-2024_2025.csv")
-
-    try:
-        df = pd.read_csv(path)
-    except FileNotFoundError:
-        # Fallback using the dynamic path we just created
-        df = pd.read_csv(csv_path)
-
-    required_cols = [
-        "Player", "Nation", "Pos", "Squad", "Comp", "Age", "MP", "Min", "90s",
-        "Gls", "Ast", "G+A", "xG", "npxG", "xAG", "npxG+xAG",
-        "Sh", "SoT", "SoT%", "Sh/90", "SoT/90", "G/Sh", "G/SoT",
-        "PrgC", "PrgP", "PrgR",
-        "Cmp", "Att", "Cmp%", "KP", "1/3", "PPA", "CrsPA",
-        "xA", "Carries",
-        "Tkl", "TklW", "Def 3rd", "Mid 3rd", "Att 3rd",
-        "Int", "Clr", "Err", "Tkl+Int",
-        "GA", "GA90", "SoTA", "Saves", "Save%",
-        "PSxG", "PSxG/SoT", "PSxG+/-", "CS", "CS%"
-    ]
+    return os.path.join(current_dir, "players_data_light-2024_2025.csv")
+
+def use_store(path=None):
+    """The partitioned store is the source unless a CSV path is given."""
+    return path is None and store.has_data()
+
+@timed()
+def load_data(path=None, seasons=None, leagues=None, min_minutes=800):
+    if use_store(path):
+        # Only the matching Season/Comp partitions and columns are read
+        with stage("read_store") as step:
+            df = store.read(seasons, leagues, min_minutes, columns=required_cols)
+            step.shape(df)
+    else:
+        if seasons is not None:
+            raise ValueError("Season filters need the partitioned store (python store.py ingest <csv>)")
+        # Only parse the columns we keep (the raw file has ~165)
+        with stage("read_csv") as step:
+            df = pd.read_csv(resolve_path(path), usecols=lambda c: c in required_cols)
+            step.shape(df)
+        if leagues is not None:
+            df = df[df["Comp"].isin(list(leagues))]
 
+    return clean_data(df, min_minutes)
+
+@timed()
+def clean_data(df, min_minutes=800):
     # Keep existing columns
     existing_cols = [c for c in required_cols if c in df.columns]
     df = df[existing_cols].copy()
@@ -49,30 +74,31 @@ def load_data(path="final_dataset.csv"):
         df = df.drop(columns=["MP"])
     
     # Filter by Minutes
-    df = df[df["Min"] >= 800].reset_index(drop=True)
+    df = df[df["Min"] >= min_minutes].reset_index(drop=True)
     return df
 
 
 # ============================================================
 # PER-90 METRICS
 # ============================================================
+per90_map = {
+    "Gls": "Gls_per90", "Ast": "Ast_per90", "G+A": "G+A_per90",
+    "Sh": "Sh_per90", "SoT": "SoT_per90", "xG": "xG_per90", "xAG": "xAG_per90",
+    "KP": "KP_per90", "CrsPA": "CrsPA_per90", "Carries": "Carries_per90",
+    "PrgC": "PrgC_per90", "PrgP": "PrgP_per90", "PrgR": "PrgR_per90",
+    "Tkl": "Tkl_per90", "Int": "Int_per90", "Clr": "Clr_per90", "Tkl+Int": "Tkl+Int_per90",
+    "Saves": "Saves_per90", "SoTA": "SoTA_per90", "GA": "GA_per90",
+    "PSxG": "PSxG_per90", "PSxG+/-": "PSxG+/-_per90"
+}
+
+@timed()
 def add_per90(df):
     if df.empty: return df
     
     if "90s" not in df.columns:
         df["90s"] = df["Min"] / 90
 
-    metrics_map = {
-        "Gls": "Gls_per90", "Ast": "Ast_per90", "G+A": "G+A_per90",
-        "Sh": "Sh_per90", "SoT": "SoT_per90", "xG": "xG_per90", "xAG": "xAG_per90",
-        "KP": "KP_per90", "CrsPA": "CrsPA_per90", "Carries": "Carries_per90",
-        "PrgC": "PrgC_per90", "PrgP": "PrgP_per90", "PrgR": "PrgR_per90",
-        "Tkl": "Tkl_per90", "Int": "Int_per90", "Clr": "Clr_per90", "Tkl+Int": "Tkl+Int_per90",
-        "Saves": "Saves_per90", "SoTA": "SoTA_per90", "GA": "GA_per90",
-        "PSxG": "PSxG_per90", "PSxG+/-": "PSxG+/-_per90"
-    }
-
-    for col, new_col in metrics_map.items():
+    for col, new_col in per90_map.items():
         if col in df.columns:
             df[new_col] = df[col] / df["90s"]
         else:
@@ -93,6 +119,7 @@ metrics_to_rank = [
     "GA90" 
 ]
 
+@timed()
 def add_percentiles(df):
     if df.empty: return df
     
@@ -117,6 +144,7 @@ league_weights = {
     "tr Süper Lig": 0.60, "other": 0.60
 }
 
+@timed()
 def apply_league_weight(df):
     if df.empty: return df
     
@@ -126,6 +154,27 @@ def apply_league_weight(df):
             df[col + "_adj"] = df[col] * df["league_weight"]
     return df
 
+position_weights = {
+    # (finishing, creation, progression, defending)
+    "FW": (0.70, 0.15, 0.10, 0.05),
+    "MF": (0.20, 0.35, 0.30, 0.15),
+    "FB": (0.15, 0.30, 0.30, 0.25),
+    "CB": (0.05, 0.10, 0.25, 0.60),
+}
+gk_weights = (0.65, 0.35)  # (shot stopping, stability)
+
+score_components = {
+    "finishing": ["Gls_per90_pct_adj","G+A_per90_pct_adj","Sh_per90_pct_adj","SoT_per90_pct_adj","xG_per90_pct_adj"],
+    "creation": ["KP_per90_pct_adj","Ast_per90_pct_adj","Carries_per90_pct_adj","xAG_per90_pct_adj"],
+    "progression": ["Carries_per90_pct_adj","PrgC_per90_pct_adj","PrgP_per90_pct_adj","PrgR_per90_pct_adj"],
+    "defending": ["Tkl_per90_pct_adj","Int_per90_pct_adj","Clr_per90_pct_adj","Tkl+Int_per90_pct_adj"],
+}
+gk_components = {
+    "stopping": ["Saves_per90_pct_adj", "Save%_pct_adj", "GA90_pct_adj"],
+    "stability": ["CS%_pct_adj", "Cmp%_pct_adj"],
+}
+
+@timed()
 def score_player(df, position):
     if df.empty: return pd.Series(dtype=float)
     
@@ -135,24 +184,20 @@ def score_player(df, position):
         return df[valid_cols].mean(axis=1)
 
     if position == "GK":
-        stopping = safe_mean(["Saves_per90_pct_adj", "Save%_pct_adj", "GA90_pct_adj"])
-        stability = safe_mean(["CS%_pct_adj", "Cmp%_pct_adj"])
-        return (0.65 * stopping) + (0.35 * stability)
+        stopping = safe_mean(gk_components["stopping"])
+        stability = safe_mean(gk_components["stability"])
+        w_stop, w_stab = gk_weights
+        return (w_stop * stopping) + (w_stab * stability)
     else:
-        finish = safe_mean(["Gls_per90_pct_adj","G+A_per90_pct_adj","Sh_per90_pct_adj","SoT_per90_pct_adj","xG_per90_pct_adj"])
-        create = safe_mean(["KP_per90_pct_adj","Ast_per90_pct_adj","Carries_per90_pct_adj","xAG_per90_pct_adj"])
-        prog = safe_mean(["Carries_per90_pct_adj","PrgC_per90_pct_adj","PrgP_per90_pct_adj","PrgR_per90_pct_adj"])
-        defend = safe_mean(["Tkl_per90_pct_adj","Int_per90_pct_adj","Clr_per90_pct_adj","Tkl+Int_per90_pct_adj"])
-
-        weights = {
-            "FW": (0.70, 0.15, 0.10, 0.05),
-            "MF": (0.20, 0.35, 0.30, 0.15),
-            "FB": (0.15, 0.30, 0.30, 0.25),
-            "CB": (0.05, 0.10, 0.25, 0.60),
-        }
-        w_fin, w_cre, w_prog, w_def = weights.get(position, (0.25, 0.25, 0.25, 0.25))
+        finish = safe_mean(score_components["finishing"])
+        create = safe_mean(score_components["creation"])
+        prog = safe_mean(score_components["progression"])
+        defend = safe_mean(score_components["defending"])
+
+        w_fin, w_cre, w_prog, w_def = position_weights.get(position, (0.25, 0.25, 0.25, 0.25))
         return (w_fin * finish + w_cre * create + w_prog * prog + w_def * defend)
 
+@timed()
 def process_single_df(df, position_code):
     """Helper to process one dataframe completely to avoid copy issues."""
     if df.empty: return df
@@ -172,23 +217,269 @@ def process_single_df(df, position_code):
     
     return df
 
-def get_processed_data(path="final_dataset.csv"):
-    df = load_data(path)
+# ============================================================
+# SINGLE-PASS ENGINE (ALL ROLES AT ONCE)
+# ============================================================
+roles = ["FW", "MF", "FB", "CB", "GK"]
+
+def role_codes(df):
+    """Index into `roles` for every row (-1 = no role table)."""
+    pos_codes, pos_values = pd.factorize(df["Pos"])
+    pos = np.append(np.asarray(pos_values, dtype=object), None)[pos_codes]
+    crspa = df["CrsPA"].to_numpy(dtype=float)
+    codes = np.full(len(df), -1, dtype=np.int64)
+    codes[pos == "FW"] = roles.index("FW")
+    codes[pos == "MF"] = roles.index("MF")
+    codes[(pos == "DF") & (crspa >= 6)] = roles.index("FB")
+    codes[(pos == "DF") & (crspa < 6)] = roles.index("CB")
+    codes[pos == "GK"] = roles.index("GK")
+    return codes
+
+def group_pct_rank(values, bounds):
+    """
+    Percentile rank (0-100) of every row of `values` (one row per metric)
+    within each group, where group g is columns bounds[g]:bounds[g + 1].
+    Same numbers as Series.rank(pct=True) run group by group (average ties,
+    NaN left out), but each group ranks all of its metrics in one argsort.
+    """
+    k = values.shape[0]
+    out = np.empty(values.shape)
+
+    for lo, hi in zip(bounds[:-1], bounds[1:]):
+        m = hi - lo
+        if m == 0: continue
+        block = values[:, lo:hi]
+        row_offset = (np.arange(k) * m)[:, None]
+        # Flat positions of the sorted entries (1-D takes beat take_along_axis)
+        flat = (np.argsort(block, axis=1) + row_offset).ravel()
+        sorted_vals = block.ravel()[flat].reshape(k, m)
+
+        # Tied values form a run; every member gets the run's average rank
+        run_first = np.ones((k, m), dtype=bool)
+        np.not_equal(sorted_vals[:, 1:], sorted_vals[:, :-1], out=run_first[:, 1:])
+        run_first = run_first.ravel()
+        starts = np.flatnonzero(run_first)
+        ends = np.append(starts[1:], k * m) - 1
+        run_id = np.cumsum(run_first) - 1
+        ranks = (starts + ends)[run_id] / 2 - row_offset.repeat(m) + 1
+
+        missing = np.isnan(block)
+        nobs = (m - missing.sum(axis=1)).repeat(m)
+        pct = np.empty(k * m)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            pct[flat] = ranks / nobs * 100
+        pct = pct.reshape(k, m)
+        pct[missing] = np.nan
+        out[:, lo:hi] = pct
+    return out
+
+def nanmean_rows(matrix, idx):
+    """NaN-skipping mean of rows `idx` of `matrix`, summed left to right like DataFrame.mean(axis=1)."""
+    n = matrix.shape[1]
+    if not idx: return np.zeros(n)
+    total = np.zeros(n)
+    count = np.zeros(n)
+    for i in idx:
+        ok = ~np.isnan(matrix[i])
+        total += np.where(ok, matrix[i], 0.0)
+        count += ok
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, total / count, np.nan)
+
+def derived_layout(df):
+    """(per90_cols, rank_cols, columns): what the engine adds to `df`, in order."""
+    per90_cols = list(per90_map.values())
+    rank_cols = [c for c in metrics_to_rank if c in per90_cols or c in df.columns]
+    columns = (per90_cols + [c + "_pct" for c in rank_cols] + ["league_weight"]
+               + [c + "_pct_adj" for c in rank_cols] + ["score"])
+    return per90_cols, rank_cols, columns
+
+def metric_rows(df, per90_cols, rank_cols):
+    """
+    Per-90 matrix and ranking matrix (one row per metric). Ranking values
+    are ready to sort ascending: NaN filled with 0, GA90 negated and its
+    NaNs kept so they stay out of the ranking.
+    """
+    nineties = (df["90s"] if "90s" in df.columns else df["Min"] / 90).to_numpy(dtype=float)
+    per90 = np.zeros((len(per90_cols), len(df)))
+    present = [i for i, src in enumerate(per90_map) if src in df.columns]
+    sources = [src for src in per90_map if src in df.columns]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        per90[present] = df[sources].to_numpy(dtype=float).T / nineties
+
+    to_rank = np.empty((len(rank_cols), len(df)))
+    for i, col in enumerate(rank_cols):
+        to_rank[i] = per90[per90_cols.index(col)] if col in per90_cols else df[col].to_numpy(dtype=float)
+    missing = np.isnan(to_rank)
+    if "GA90" in rank_cols:
+        ga = rank_cols.index("GA90")
+        missing[ga] = False
+        to_rank[ga] = -to_rank[ga]  # lower is better
+    to_rank[missing] = 0.0
+    return per90, to_rank
+
+def league_weight_vector(comp):
+    comp_codes, comp_values = pd.factorize(comp)
+    return np.append([league_weights.get(c, 0.60) for c in comp_values], 0.60)[comp_codes]
+
+def component_matrix(adj, rank_cols, components):
+    """One row per component: mean of its _pct_adj rows of `adj`."""
+    where = {c + "_pct_adj": i for i, c in enumerate(rank_cols)}
+    return np.array([nanmean_rows(adj, [where[c] for c in cols if c in where])
+                     for cols in components.values()]).reshape(len(components), adj.shape[1])
+
+def score_rows(adj, rank_cols, codes):
+    """Virtual Score for every column of the league-adjusted matrix."""
+    components = {**score_components, **gk_components}
+    comp = dict(zip(components, component_matrix(adj, rank_cols, components)))
+    w = np.array([position_weights.get(r, (0.25, 0.25, 0.25, 0.25)) for r in roles])[codes]
+    outfield = (w[:, 0] * comp["finishing"] + w[:, 1] * comp["creation"]
+                + w[:, 2] * comp["progression"] + w[:, 3] * comp["defending"])
+    w_stop, w_stab = gk_weights
+    keeper = (w_stop * comp["stopping"]) + (w_stab * comp["stability"])
+    return np.where(codes == roles.index("GK"), keeper, outfield)
+
+def assemble_frames(df, out, columns, bounds):
+    """Split role-sorted rows plus derived matrix `out` into one frame per role."""
+    base = df.drop(columns=[c for c in columns if c in df.columns])
+    frames = {}
+    for role, lo, hi in zip(roles, bounds[:-1], bounds[1:]):
+        part = base.iloc[lo:hi]
+        # out[:, lo:hi].T is already in pandas' column-major block layout
+        derived = pd.DataFrame(out[:, lo:hi].T, columns=columns, index=part.index, copy=False)
+        frames[role] = pd.concat([part, derived], axis=1)
+    return frames
+
+def sort_by_role(df):
+    """Rows grouped by role (stable, role-less rows dropped), codes and bounds."""
+    codes = role_codes(df)
+    order = np.argsort(codes, kind="stable")
+    order = order[codes[order] >= 0]
+    df, codes = df.iloc[order], codes[order]
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(roles)))])
+    return df, codes, bounds
+
+@timed()
+def process_all(df):
+    """
+    Per-90s, percentiles, league adjustment and scores for every role in
+    one pass over a single metric matrix. Returns {role: frame} with the
+    same columns and values as process_single_df on each split.
+    """
+    if df.columns.duplicated().any():
+        df = df.loc[:, ~df.columns.duplicated()]
+    # Group the rows by role so every role is one contiguous slice
+    df, codes, bounds = sort_by_role(df)
+    if "90s" not in df.columns:
+        df = df.assign(**{"90s": df["Min"] / 90})
+
+    per90_cols, rank_cols, columns = derived_layout(df)
+    p, k = len(per90_cols), len(rank_cols)
+
+    # One row per derived column, one column per player
+    out = np.zeros((len(columns), len(df)))
+
+    # 1. Per 90 (one matrix divide)
+    with stage("per90"):
+        out[:p], to_rank = metric_rows(df, per90_cols, rank_cols)
+
+    # 2. Percentiles for every ranked metric and every role together
+    pct = out[p:p + k]
+    with stage("percentiles"):
+        pct[:] = group_pct_rank(to_rank, bounds)
+
+    # 3. League weight
+    with stage("league_weight"):
+        out[p + k] = league_weight_vector(df["Comp"])
+        adj = out[p + k + 1:p + 2 * k + 1]
+        np.multiply(pct, out[p + k], out=adj)
+
+    # 4. Score
+    with stage("score"):
+        out[-1] = score_rows(adj, rank_cols, codes)
+    with stage("assemble_frames"):
+        return assemble_frames(df, out, columns, bounds)
+
+# ============================================================
+# COMPACT MODE
+# ============================================================
+compact_rtol = 1e-6         # float32 derived values vs the float64 path (relative)
+category_max_ratio = 0.5    # strings become categoricals below this unique/rows ratio
+
+def derived_columns(df, keep_pct=True):
+    """Columns the engine adds (per-90s, percentiles, league weight, score)."""
+    return [c for c in df.columns if c.endswith(("_per90", "_pct_adj")) or c in ("league_weight", "score")
+            or (keep_pct and c.endswith("_pct"))]
+
+@timed()
+def compact_frame(df, keep_pct=False):
+    """
+    Smaller copy of a processed frame: intermediate _pct columns dropped
+    (only the _pct_adj versions are used), derived metrics as float32 and
+    repetitive text columns (Nation, Squad, Comp, Pos, ...) as categoricals.
+    """
+    if not keep_pct:
+        df = df.drop(columns=[c for c in df.columns if c.endswith("_pct")])
+    dtypes = {c: "float32" for c in derived_columns(df)}
+    for col in df.columns:
+        if col not in dtypes and (df[col].dtype == object or pd.api.types.is_string_dtype(df[col])):
+            if df[col].nunique() <= category_max_ratio * len(df):
+                dtypes[col] = "category"
+    return df.astype(dtypes)
+
+def memory_report(frames):
+    """Rows, columns and deep memory (MB) of each role frame."""
+    if not isinstance(frames, dict):
+        frames = dict(zip(roles, frames))
+    rows = [{"role": role, "rows": len(df), "cols": df.shape[1],
+             "MB": df.memory_usage(deep=True).sum() / 2**20} for role, df in frames.items()]
+    report = pd.DataFrame(rows)
+    total = {"role": "total", "rows": report["rows"].sum(), "cols": None, "MB": report["MB"].sum()}
+    return pd.concat([report, pd.DataFrame([total])], ignore_index=True)
+
+@timed()
+def data_fingerprint(path=None, seasons=None, leagues=None, min_minutes=800, compact=False):
+    """Hash of the source data plus the query and every scoring constant."""
+    h = hashlib.sha256()
+    if use_store(path):
+        h.update(store.fingerprint(seasons, leagues).encode("utf-8"))
+    else:
+        with open(resolve_path(path), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    constants = {
+        "required_cols": required_cols, "metrics_to_rank": metrics_to_rank,
+        "league_weights": league_weights, "position_weights": position_weights,
+        "gk_weights": gk_weights, "per90_map": per90_map,
+        "score_components": score_components, "gk_components": gk_components,
+        "query": [sorted(map(str, seasons)) if seasons is not None else None,
+                  sorted(leagues) if leagues is not None else None, min_minutes],
+    }
+    if compact:
+        constants["compact"] = [category_max_ratio]
+    h.update(json.dumps(constants, sort_keys=True).encode("utf-8"))
+    return h.hexdigest()[:16]
 
-    # Split
-    df_fw = df[df["Pos"] == "FW"].copy()
-    df_mf = df[df["Pos"] == "MF"].copy()
-    df_df = df[df["Pos"] == "DF"].copy()
-    df_gk = df[df["Pos"] == "GK"].copy()
+@timed()
+def get_processed_data(path=None, seasons=None, leagues=None, min_minutes=800, use_cache=True, compact=False):
+    if use_cache:
+        key = data_fingerprint(path, seasons, leagues, min_minutes, compact)
+        with stage("cache_load") as step:
+            # Callers may edit these frames; only shared.frames() hands out the read-only mapping
+            cached = cache.load_frames(key, mapped=False)
+            step.set(hit=cached is not None)
+        if cached is not None:
+            return cached
 
-    df_fullback = df_df[df_df["CrsPA"] >= 6].copy()
-    df_centerback = df_df[df_df["CrsPA"] < 6].copy()
+    df = load_data(path, seasons, leagues, min_minutes)
+    out = process_all(df)
 
-    # Process each one explicitly (No Loop Variable Traps!)
-    df_fw = process_single_df(df_fw, "FW")
-    df_mf = process_single_df(df_mf, "MF")
-    df_fullback = process_single_df(df_fullback, "FB")
-    df_centerback = process_single_df(df_centerback, "CB")
-    df_gk = process_single_df(df_gk, "GK")
+    df_fw, df_mf, df_fullback, df_centerback, df_gk = (out[r] for r in roles)
 
-    return df_fw, df_mf, df_fullback, df_centerback, df_gk 
+    frames = (df_fw, df_mf, df_fullback, df_centerback, df_gk)
+    if compact:
+        frames = tuple(compact_frame(f) for f in frames)
+    if use_cache:
+        with stage("cache_save"):
+            cache.save_frames(key, frames)
+    return frames
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+
+from preprocessor import roles
+
+# ============================================================
+# TOP-N RANKING INDEX
+# ============================================================
+def nation_code(nation):
+    """'eng ENG' -> 'ENG' (also accepts a bare code)."""
+    return str(nation).split()[-1].upper() if isinstance(nation, str) and nation.strip() else ""
+
+class RankIndex:
+    """
+    One role table plus a best-first ordering per numeric column, built
+    once. An unfiltered top-N is a slice of that ordering; a filtered one
+    scans just enough of the ordering to find N matches and falls back to
+    argpartition when the filter is too selective. Rows with no value for
+    the metric are never returned.
+    """
+    def __init__(self, df, metrics=None):
+        self.df = df
+        self.age = df["Age"].to_numpy(dtype=float)
+        self.minutes = df["Min"].to_numpy(dtype=float)
+        self.comp = df["Comp"].to_numpy(dtype=object)
+        nations = df["Nation"] if "Nation" in df.columns else pd.Series("", index=df.index)
+        self.nation = np.array([nation_code(n) for n in nations], dtype=object)
+        self.season = df["Season"].to_numpy(dtype=object) if "Season" in df.columns else None
+        self.values = {}
+        self.order = {}
+        if metrics is None:
+            metrics = df.select_dtypes("number").columns
+        for m in metrics:
+            self._ordering(m)
+
+    def _ordering(self, metric):
+        if metric not in self.order:
+            v = self.df[metric].to_numpy(dtype=float)
+            valid = np.flatnonzero(~np.isnan(v))
+            # Best first; stable, so ties keep table order
+            self.order[metric] = valid[np.argsort(-v[valid], kind="stable")]
+            self.values[metric] = v
+        return self.order[metric]
+
+    def mask(self, leagues=None, min_age=None, max_age=None, min_minutes=None, nations=None, seasons=None):
+        """Boolean row filter, or None when nothing is filtered."""
+        keep = None
+        def both(cond):
+            return cond if keep is None else keep & cond
+        if leagues: keep = both(np.isin(self.comp, list(leagues)))
+        if min_age is not None: keep = both(self.age >= min_age)
+        if max_age is not None: keep = both(self.age <= max_age)
+        if min_minutes is not None: keep = both(self.minutes >= min_minutes)
+        if nations: keep = both(np.isin(self.nation, [nation_code(n) for n in nations]))
+        if seasons and self.season is not None: keep = both(np.isin(self.season, list(seasons)))
+        return keep
+
+    def top_positions(self, metric, n=10, ascending=False, **filters):
+        """Row positions of the top n rows by `metric`, best first."""
+        order = self._ordering(metric)
+        if ascending: order = order[::-1]
+        keep = self.mask(**filters)
+        if keep is None: return order[:n]
+        if n <= 0: return order[:0]
+
+        # Scan a prefix sized from the filter's share of the table
+        share = keep.sum() / max(len(keep), 1)
+        if share == 0: return order[:0]
+        limit = min(len(order), int(n / share * 2) + 64)
+        head = order[:limit]
+        hits = head[keep[head]]
+        if len(hits) >= n or limit == len(order): return hits[:n]
+
+        # Selective filter: partial selection over the matching rows only
+        v = self.values[metric]
+        cand = np.flatnonzero(keep & ~np.isnan(v))
+        return self._select(cand, v[cand] if ascending else -v[cand], n)
+
+    def top(self, metric, n=10, ascending=False, **filters):
+        return self.df.iloc[self.top_positions(metric, n, ascending, **filters)]
+
+    def composite(self, weights, n=10, **filters):
+        """
+        Top n by a weighted mean of several columns, e.g.
+        {"xG_per90_pct_adj": 2, "KP_per90_pct_adj": 1}. Use percentile
+        columns so the metrics share a scale; missing values count as 0.
+        Adds a `composite` column to the returned rows.
+        """
+        metrics = list(weights)
+        w = np.array([weights[m] for m in metrics], dtype=float)
+        if not np.isfinite(w).all() or w.sum() == 0:
+            raise ValueError(f"weights must be finite and not sum to 0, got {dict(weights)}")
+        X = np.nan_to_num(self.df[metrics].to_numpy(dtype=float))
+        scores = X @ (w / w.sum())
+        keep = self.mask(**filters)
+        cand = np.arange(len(scores)) if keep is None else np.flatnonzero(keep)
+        pos = self._select(cand, -scores[cand], n)
+        out = self.df.iloc[pos].copy()
+        out["composite"] = scores[pos]
+        return out
+
+    @staticmethod
+    def _select(cand, keys, n):
+        # argpartition for the n smallest keys, then sort just those
+        if len(cand) > n:
+            part = np.argpartition(keys, n - 1)[:n]
+            cand, keys = cand[part], keys[part]
+        return cand[np.argsort(keys, kind="stable")]
+
+class RankingIndex:
+    """RankIndex for each of the five role tables."""
+    def __init__(self, frames, metrics=None):
+        if not isinstance(frames, dict):
+            frames = dict(zip(roles, frames))
+        self.roles = {role: RankIndex(df, metrics) for role, df in frames.items()}
+
+    def top(self, role, metric="score", n=10, ascending=False, **filters):
+        return self.roles[role].top(metric, n, ascending, **filters)
+
+    def composite(self, role, weights, n=10, **filters):
+        return self.roles[role].composite(weights, n, **filters)
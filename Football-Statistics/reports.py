@@ -0,0 +1,143 @@
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import matplotlib
+matplotlib.use("Agg")  # headless: must be set before helper imports pyplot
+import matplotlib.pyplot as plt
+from matplotlib.backends.backend_pdf import PdfPages
+
+from preprocessor import get_processed_data, roles
+from helper import player_card, template_figure, save_tight, ROLE_RADAR_METRICS, ROLE_BAR_METRICS
+from player_index import player_id
+
+# ============================================================
+# HEADLESS BATCH SCOUTING REPORTS
+# ============================================================
+PAGES = ["card", "radar", "bars"]
+
+def card_figure(card):
+    fig, ax = plt.subplots(figsize=(6, 4))
+    fig.patch.set_facecolor("#0E1117")
+    ax.set_facecolor("#0E1117")
+    ax.axis("off")
+    ax.text(0.0, 0.95, card["Player"], color="white", fontsize=18, weight="bold", va="top")
+    lines = [(k, v) for k, v in card.items() if k != "Player"]
+    for i, (label, value) in enumerate(lines):
+        y = 0.78 - i * 0.085
+        ax.text(0.0, y, label, color="#A0A0A0", fontsize=11, va="top")
+        ax.text(0.45, y, str(value), color="white", fontsize=11, va="top", weight="bold")
+    return fig
+
+def report_figures(df, role, row, benchmark):
+    """
+    Card, radar and percentile bars (vs the role's benchmark player). Radar
+    and bars come from reused chart templates: save each figure before
+    taking the next.
+    """
+    name = row["Player"]
+    yield "card", card_figure(player_card(row))
+    yield "radar", template_figure("radar", df, [name], ROLE_RADAR_METRICS[role])
+    yield "bars", template_figure("comparison_bar", df, name, benchmark, ROLE_BAR_METRICS[role])
+
+def report_paths(out_dir, role, row, fmt):
+    pid = player_id(row["Player"], row["Squad"], row["Comp"], row.get("Season", ""))
+    base = os.path.join(out_dir, role, pid)
+    if fmt == "pdf": return {"pack": base + ".pdf"}
+    return {page: f"{base}_{page}.png" for page in PAGES}
+
+def _write_atomic(path, save):
+    # Write to a temp name and rename, so a killed run never leaves a
+    # file that looks finished
+    tmp = path + ".part"
+    save(tmp)
+    os.replace(tmp, path)
+
+# ----- worker side -----
+_frames = None
+
+def _init_worker(query):
+    global _frames
+    _frames = dict(zip(roles, get_processed_data(**query)))
+
+def render_report(role, pos, benchmark, out_dir, fmt):
+    df = _frames[role]
+    row = df.iloc[pos]
+    paths = report_paths(out_dir, role, row, fmt)
+    os.makedirs(os.path.dirname(next(iter(paths.values()))), exist_ok=True)
+    figures = report_figures(df, role, row, benchmark)
+    if fmt == "pdf":
+        def save(tmp):
+            with PdfPages(tmp) as pdf:
+                for _, fig in figures:
+                    if fig is None: continue
+                    pdf.savefig(fig, facecolor="#0E1117")
+                    plt.close(fig)
+        _write_atomic(paths["pack"], save)
+    else:
+        for page, fig in figures:
+            if fig is None: continue
+            _write_atomic(paths[page], lambda tmp: save_tight(fig, tmp, "png", dpi=150, facecolor="#0E1117"))
+            plt.close(fig)
+    return role, row["Player"]
+
+# ----- driver -----
+def pending_jobs(frames, out_dir, fmt, wanted_roles):
+    """Every player whose report files are not all on disk yet."""
+    jobs, done = [], 0
+    for role in wanted_roles:
+        df = frames[role]
+        if df.empty: continue
+        ranked = df.sort_values("score", ascending=False)["Player"].tolist()
+        for pos in range(len(df)):
+            row = df.iloc[pos]
+            if all(os.path.exists(p) for p in report_paths(out_dir, role, row, fmt).values()):
+                done += 1
+                continue
+            # Bars compare against the best-scored player of the role (or the runner-up)
+            benchmark = ranked[0] if ranked[0] != row["Player"] or len(ranked) == 1 else ranked[1]
+            jobs.append((role, pos, benchmark))
+    return jobs, done
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render scouting report packs for every player.")
+    parser.add_argument("--out", default="reports", help="Output folder (one sub-folder per role)")
+    parser.add_argument("--format", choices=["png", "pdf"], default="pdf")
+    parser.add_argument("--league", action="append", help="Competition (repeatable), e.g. 'eng Premier League'")
+    parser.add_argument("--season", action="append", help="Season from the store (repeatable), e.g. 2024_2025")
+    parser.add_argument("--roles", nargs="+", choices=roles, default=roles)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--limit", type=int, help="Stop after this many reports")
+    parser.add_argument("--compact", action="store_true", help="Categorical/float32 frames (less memory per worker)")
+    args = parser.parse_args(argv)
+
+    query = {"seasons": args.season, "leagues": args.league, "compact": args.compact}
+    frames = dict(zip(roles, get_processed_data(**query)))
+    jobs, done = pending_jobs(frames, args.out, args.format, args.roles)
+    if args.limit is not None: jobs = jobs[:args.limit]
+    print(f"{len(jobs)} reports to render ({done} already on disk), {args.workers} workers")
+    if not jobs: return 0
+
+    start = time.perf_counter()
+    finished = failed = 0
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(query,)) as pool:
+        futures = [pool.submit(render_report, role, pos, bench, args.out, args.format) for role, pos, bench in jobs]
+        for future in as_completed(futures):
+            try:
+                future.result()
+                finished += 1
+            except Exception as e:
+                failed += 1
+                print(f"failed: {e}", file=sys.stderr)
+            if (finished + failed) % 50 == 0:
+                rate = finished / (time.perf_counter() - start)
+                print(f"  {finished + failed}/{len(jobs)}  {rate:.1f} reports/s")
+
+    elapsed = time.perf_counter() - start
+    print(f"done: {finished} reports in {elapsed:.1f}s ({finished / elapsed:.2f} reports/s), {failed} failed")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
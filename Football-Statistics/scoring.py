@@ -0,0 +1,125 @@
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+import preprocessor as pp
+
+# ============================================================
+# CUSTOM-WEIGHT SCORING & SENSITIVITY SWEEPS
+# ============================================================
+SweepResult = namedtuple("SweepResult", ["players", "configs", "ranks"])
+
+def components_for(role):
+    return pp.gk_components if role == "GK" else pp.score_components
+
+def default_weights(role):
+    return np.array(pp.gk_weights if role == "GK" else pp.position_weights.get(role, (0.25, 0.25, 0.25, 0.25)))
+
+def random_weights(role, n, concentration=50, seed=None):
+    """
+    `n` weight vectors scattered around the role's default weights
+    (Dirichlet; higher concentration = closer to the defaults). Rows sum to 1.
+    """
+    rng = np.random.default_rng(seed)
+    return rng.dirichlet(default_weights(role) * concentration, n)
+
+def rank_columns(scores):
+    """Rank (1 = best) of every player within each column; NaN scores rank last."""
+    keys = np.where(np.isnan(scores), -np.inf, scores)
+    order = np.argsort(-keys, axis=0, kind="stable")
+    ranks = np.empty(scores.shape, dtype=np.int32)
+    np.put_along_axis(ranks, order, np.arange(1, len(scores) + 1, dtype=np.int32)[:, None], axis=0)
+    return ranks
+
+class WeightSweep:
+    """
+    Component sub-scores (finishing/creation/progression/defending, or
+    stopping/stability for keepers) of one processed role table, computed
+    once. Scoring any number of weight configurations is then a single
+    (players x components) @ (components x configs) product.
+    """
+    def __init__(self, df, role):
+        self.df = df
+        self.role = role
+        self.components = list(components_for(role))
+        rank_cols = [c[:-len("_pct_adj")] for c in df.columns if c.endswith("_pct_adj")]
+        adj = df[[c + "_pct_adj" for c in rank_cols]].to_numpy(dtype=float).T
+        self.C = pp.component_matrix(adj, rank_cols, components_for(role)).T
+        self.baseline = self.ranks(default_weights(role))[:, 0]
+
+    def _matrix(self, weights):
+        W = np.atleast_2d(np.asarray(weights, dtype=float))
+        if W.shape[1] != len(self.components):
+            raise ValueError(f"{self.role} weights need {len(self.components)} values {self.components}, got {W.shape[1]}")
+        return W
+
+    def score(self, weights):
+        """Scores as (players, configs); weights is one vector or one row per config."""
+        return self.C @ self._matrix(weights).T
+
+    def ranks(self, weights):
+        return rank_columns(self.score(weights))
+
+    def table(self, weights):
+        """The role table re-scored with one weight vector, best first."""
+        out = self.df.copy()
+        out["score"] = self.score(weights)[:, 0]
+        return out.sort_values("score", ascending=False)
+
+    def sweep(self, weights, top=10, batch_size=1000, keep_ranks=True):
+        """
+        Score and rank every player under every configuration.
+
+        players: per-player rank statistics across configurations (mean, std,
+                 best, worst, 5th/95th percentile rank (keep_ranks only),
+                 share of configs in the top `top`) next to the default rank.
+        configs: per configuration, the leader, top-`top` overlap with the
+                 default ranking and Spearman correlation with it.
+        ranks:   (players, configs) int32 rank matrix, or None.
+        """
+        W = self._matrix(weights)
+        n, m = len(self.C), len(W)
+        names = self.df["Player"].to_numpy()
+        base_top = self.baseline <= top
+        base_centered = self.baseline - (n + 1) / 2
+
+        all_ranks = np.empty((n, m), dtype=np.int32) if keep_ranks else None
+        in_top = np.zeros(n)
+        total = np.zeros(n)
+        total_sq = np.zeros(n)
+        best = np.full(n, n, dtype=np.int32)
+        worst = np.zeros(n, dtype=np.int32)
+        leader, overlap, spearman = [], [], []
+
+        for lo in range(0, m, batch_size):
+            R = rank_columns(self.C @ W[lo:lo + batch_size].T)
+            if keep_ranks: all_ranks[:, lo:lo + len(R.T)] = R
+            total += R.sum(1)
+            total_sq += (R.astype(float) ** 2).sum(1)
+            np.minimum(best, R.min(1), out=best)
+            np.maximum(worst, R.max(1), out=worst)
+            in_top += (R <= top).sum(1)
+            leader += names[np.argmin(R, axis=0)].tolist()
+            overlap += ((R <= top) & base_top[:, None]).sum(0).tolist()
+            # Ranks are permutations of 1..n, so Spearman is a plain correlation
+            centered = R - (n + 1) / 2
+            denom = np.sqrt((centered ** 2).sum(0) * (base_centered ** 2).sum())
+            with np.errstate(invalid="ignore", divide="ignore"):
+                spearman += ((centered * base_centered[:, None]).sum(0) / denom).tolist()
+
+        # Rank percentiles need every config's rank, so only with keep_ranks
+        p5, p95 = np.percentile(all_ranks, [5, 95], axis=1) if keep_ranks and m else (np.nan, np.nan)
+        mean = total / m if m else np.full(n, np.nan)
+        players = pd.DataFrame({
+            "Player": names, "Squad": self.df["Squad"].to_numpy(),
+            "Rank (default)": self.baseline, "Mean Rank": mean,
+            "Rank Std": np.sqrt(np.maximum(total_sq / max(m, 1) - mean ** 2, 0)),
+            "Best Rank": best, "Worst Rank": worst, "Rank P5": p5, "Rank P95": p95,
+            f"Top {top} Share": in_top / max(m, 1),
+        }, index=self.df.index).sort_values("Mean Rank")
+        configs = pd.DataFrame(W, columns=self.components)
+        configs["Leader"] = leader
+        configs[f"Top {top} Overlap"] = overlap
+        configs["Spearman"] = spearman
+        return SweepResult(players, configs, all_ranks)
@@ -0,0 +1,316 @@
+import sys
+import json
+import math
+import asyncio
+import logging
+import argparse
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qs
+
+import numpy as np
+
+import matplotlib
+matplotlib.use("Agg")  # helper imports pyplot; the service never draws
+
+import shared
+import preprocessor as pp
+from helper import get_player, compare_players, player_card, ROLE_BAR_METRICS
+from player_index import PlayerIndex
+from ranking import RankingIndex
+from scoring import WeightSweep
+from whatif import WhatIf, total_cols
+
+log = logging.getLogger("football_analytics.service")
+
+# ============================================================
+# DATA VERSION STATE
+# ============================================================
+class DataState:
+    """Everything the endpoints read, built once per published data version."""
+    def __init__(self, version):
+        self.version = version
+        self.frames = dict(zip(pp.roles, shared.frames(version)))
+        self.index = PlayerIndex(self.frames)
+        self.rankings = RankingIndex(self.frames, metrics=[])  # orderings built on first use
+        self._sweeps = {}
+        self._whatif = None
+        self._lock = threading.Lock()
+
+    def sweep(self, role):
+        with self._lock:
+            if role not in self._sweeps:
+                self._sweeps[role] = WeightSweep(self.frames[role], role)
+            return self._sweeps[role]
+
+    def whatif(self):
+        with self._lock:
+            if self._whatif is None:
+                self._whatif = WhatIf(self.frames)
+            return self._whatif
+
+    def frame(self, role):
+        if role not in self.frames:
+            raise ValueError(f"role must be one of {pp.roles}, not {role!r}")
+        return self.frames[role]
+
+
+# ============================================================
+# ENDPOINTS
+# ============================================================
+def _clean(value):
+    """JSON-safe copy: numpy scalars to Python, NaN/inf to null."""
+    if isinstance(value, dict): return {str(k): _clean(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)): return [_clean(v) for v in value]
+    if isinstance(value, np.generic): value = value.item()
+    if isinstance(value, float) and not math.isfinite(value): return None
+    return value
+
+def _records(df):
+    return [_clean(r) for r in df.to_dict("records")]
+
+class NotFound(Exception):
+    """Unknown player or id; answered with 404 (other errors are 400 or 500)."""
+
+def _arg(query, name, default=None, cast=str, minimum=None):
+    values = query.get(name)
+    if not values:
+        if default is KeyError: raise ValueError(f"missing parameter {name!r}")
+        return default
+    try:
+        value = cast(values[-1])
+    except ValueError:
+        raise ValueError(f"bad value for {name!r}: {values[-1]!r}")
+    if minimum is not None and value < minimum:
+        raise ValueError(f"{name!r} must be at least {minimum}, not {value}")
+    return value
+
+def _list(query, name):
+    """Repeated (?x=a&x=b) or comma-separated (?x=a,b) parameter."""
+    return [v for raw in query.get(name, []) for v in raw.split(",") if v] or None
+
+def _filters(query):
+    return {
+        "leagues": _list(query, "league"), "nations": _list(query, "nation"), "seasons": _list(query, "season"),
+        "min_age": _arg(query, "min_age", cast=float), "max_age": _arg(query, "max_age", cast=float),
+        "min_minutes": _arg(query, "min_minutes", cast=float),
+    }
+
+def _player_row(state, query):
+    if "id" in query:
+        pid = _arg(query, "id")
+        if pid not in state.index.by_id: raise NotFound(f"unknown player id {pid!r}")
+        return state.index.row(pid)
+    name, role = _arg(query, "name", KeyError), _arg(query, "role")
+    if role is not None:
+        row = get_player(state.frame(role), name)
+    else:
+        row = state.index.get(name)
+    if row is None: raise NotFound(f"unknown player {name!r}")
+    return row
+
+def ep_health(state, query):
+    return {"status": "ok", "version": state.version, "players": {r: len(df) for r, df in state.frames.items()}}
+
+def ep_search(state, query):
+    hits = state.index.search(_arg(query, "q", KeyError), _arg(query, "role"), _arg(query, "limit", 10, int, minimum=1))
+    return {"results": [_clean(e._asdict()) for e in hits]}
+
+def ep_player(state, query):
+    row = _player_row(state, query)
+    out = {"card": _clean(player_card(row))}
+    if _arg(query, "full", "0") == "1":
+        out["metrics"] = _clean(row.to_dict())
+    return out
+
+def ep_compare(state, query):
+    role = _arg(query, "role", KeyError)
+    df = state.frame(role)
+    a, b = _arg(query, "a", KeyError), _arg(query, "b", KeyError)
+    metrics = _list(query, "metrics") or [m + "_pct_adj" for m in ROLE_BAR_METRICS[role]]
+    missing = [m for m in metrics if m not in df.columns]
+    if missing: raise ValueError(f"unknown metrics {missing}")
+    table = compare_players(df, a, b, metrics)
+    if table is None: raise NotFound(f"unknown player {a!r} or {b!r} in {role}")
+    return {"role": role, "players": [a, b], "metrics": metrics, "rows": _records(table)}
+
+def ep_rankings(state, query):
+    role = _arg(query, "role", KeyError)
+    df = state.frame(role)
+    n = _arg(query, "n", 10, int, minimum=1)
+    weights = _list(query, "weights")
+    columns = ["Player", "Squad", "Comp", "Age", "Min"]
+    if weights:
+        # Composite ranking: weights=metric:weight,metric:weight
+        parsed = {}
+        for item in weights:
+            metric, _, w = item.partition(":")
+            if metric not in df.columns: raise ValueError(f"unknown metric {metric!r}")
+            parsed[metric] = float(w or 1)
+        top = state.rankings.composite(role, parsed, n, **_filters(query))
+        return {"role": role, "weights": parsed, "rows": _records(top[columns + list(parsed) + ["composite"]])}
+    metric = _arg(query, "metric", "score")
+    if metric not in df.columns: raise ValueError(f"unknown metric {metric!r}")
+    top = state.rankings.top(role, metric, n, _arg(query, "ascending", "0") == "1", **_filters(query))
+    return {"role": role, "metric": metric, "rows": _records(top[columns + ([metric] if metric not in columns else [])])}
+
+def ep_score(state, query):
+    """Re-score a role with custom component weights (e.g. weights=0.4,0.3,0.2,0.1)."""
+    role = _arg(query, "role", KeyError)
+    state.frame(role)
+    sweep = state.sweep(role)
+    weights = [float(w) for w in (_list(query, "weights") or [])] or None
+    if weights is None: raise ValueError(f"missing parameter 'weights' ({', '.join(sweep.components)})")
+    table = sweep.table(weights).head(_arg(query, "n", 10, int, minimum=1))
+    return {"role": role, "components": sweep.components, "weights": weights,
+            "rows": _records(table[["Player", "Squad", "Comp", "score"]])}
+
+def ep_whatif(state, query):
+    """Rank a player who is not in the data from raw totals (e.g. Min=1800&Gls=9&xG=7.5&comp=...)."""
+    role = _arg(query, "role", KeyError)
+    state.frame(role)
+    totals = {c: _arg(query, c, cast=float) for c in total_cols if c in query}
+    if "Min" not in totals: raise ValueError("missing parameter 'Min'")
+    return _clean(state.whatif().lookup(role, totals, _arg(query, "comp", "other")))
+
+def ep_rows(state, query):
+    """Raw metric rows of a role, paginated; columns=... picks columns."""
+    df = state.frame(_arg(query, "role", KeyError))
+    columns = _list(query, "columns")
+    if columns:
+        missing = [c for c in columns if c not in df.columns]
+        if missing: raise ValueError(f"unknown columns {missing}")
+        df = df[["Player", "Squad"] + [c for c in columns if c not in ("Player", "Squad")]]
+    offset, limit = _arg(query, "offset", 0, int, minimum=0), min(_arg(query, "limit", 100, int, minimum=1), 1000)
+    return {"total": len(df), "offset": offset, "rows": _records(df.iloc[offset:offset + limit])}
+
+ROUTES = {
+    "/health": ep_health, "/players": ep_search, "/player": ep_player, "/compare": ep_compare,
+    "/rankings": ep_rankings, "/score": ep_score, "/rows": ep_rows, "/whatif": ep_whatif,
+}
+
+
+# ============================================================
+# SERVER
+# ============================================================
+class ResponseCache:
+    """LRU of encoded responses keyed by (data version, path, query)."""
+    def __init__(self, max_entries=4096):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        data = self.entries.get(key)
+        if data is not None: self.entries.move_to_end(key)
+        return data
+
+    def put(self, key, data):
+        self.entries[key] = data
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+class Service:
+    """
+    asyncio HTTP/1.1 (keep-alive) JSON server. Endpoint work runs in a
+    thread pool so slow queries never block the event loop, cached
+    responses are answered on the loop directly, and the published data
+    version is re-checked every `refresh_every` seconds.
+    """
+    def __init__(self, workers=8, refresh_every=30.0, cache_entries=4096):
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="service")
+        self.refresh_every = refresh_every
+        self.cache = ResponseCache(cache_entries)
+        self.state = DataState(shared.refresh())
+
+    def handle(self, path, query_string):
+        """(status, body bytes) for one GET; runs in the pool."""
+        state = self.state
+        route = ROUTES.get(path)
+        if route is None:
+            return 404, {"error": f"unknown endpoint {path!r}", "endpoints": sorted(ROUTES)}
+        try:
+            return 200, route(state, parse_qs(query_string))
+        except NotFound as e:
+            return 404, {"error": str(e)}
+        except ValueError as e:
+            return 400, {"error": str(e)}
+
+    async def respond(self, method, target):
+        if method != "GET":
+            return 405, json.dumps({"error": "only GET is supported"}).encode()
+        url = urlsplit(target)
+        key = (self.state.version, url.path, url.query)
+        body = self.cache.get(key)
+        if body is not None: return 200, body
+        try:
+            status, payload = await asyncio.get_running_loop().run_in_executor(self.pool, self.handle, url.path, url.query)
+        except Exception as e:
+            return 500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+        body = json.dumps(payload, separators=(",", ":")).encode()
+        if status == 200: self.cache.put(key, body)
+        return status, body
+
+    async def connection(self, reader, writer):
+        try:
+            while True:
+                head = await reader.readuntil(b"\r\n\r\n")
+                lines = head.decode("latin-1").split("\r\n")
+                method, target, version = (lines[0].split(" ") + ["", ""])[:3]
+                headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in lines[1:] if l)}
+                length = headers.get("content-length", "0") or "0"
+                if length.isdigit():
+                    if int(length): await reader.readexactly(int(length))
+                    status, body = await self.respond(method, target)
+                    keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                else:
+                    # The body can't be skipped without a length, so answer and close
+                    status, body = 400, json.dumps({"error": f"bad Content-Length {length!r}"}).encode()
+                    keep_alive = False
+                writer.write(
+                    f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\nX-Data-Version: {self.state.version}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode() + body)
+                await writer.drain()
+                if not keep_alive: break
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def watch_version(self):
+        while True:
+            await asyncio.sleep(self.refresh_every)
+            try:
+                version = await asyncio.get_running_loop().run_in_executor(self.pool, shared.refresh)
+                if version != self.state.version:
+                    # Build the new state off the loop, then swap; old cache keys just age out
+                    self.state = await asyncio.get_running_loop().run_in_executor(self.pool, DataState, version)
+            except Exception:
+                # e.g. the CSV is mid-write: keep serving the current version, retry next tick
+                log.exception("data refresh failed; still serving version %s", self.state.version)
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        server = await asyncio.start_server(self.connection, host, port, backlog=1024)
+        print(f"serving data version {self.state.version} on http://{host}:{port}", flush=True)
+        if ready: ready.set()
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.watch_version())
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON API over the processed player tables.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, default=8, help="Threads for endpoint work")
+    parser.add_argument("--refresh", type=float, default=30.0, help="Seconds between data version checks")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(Service(args.workers, args.refresh).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+from urllib.parse import quote
+
+import numpy as np
+
+# ============================================================
+# LOAD TEST FOR service.py
+# ============================================================
+async def fetch(reader, writer, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    length = next(int(l.split(":")[1]) for l in lines if l.lower().startswith("content-length"))
+    body = await reader.readexactly(length)
+    return status, body
+
+async def sample_paths(host, port, n_players=200):
+    """A realistic request mix built from the players the service actually has."""
+    reader, writer = await asyncio.open_connection(host, port)
+    paths = []
+    for role in ["FW", "MF", "FB", "CB", "GK"]:
+        _, body = await fetch(reader, writer, f"/rows?role={role}&columns=Min&limit={n_players}")
+        names = [r["Player"] for r in json.loads(body)["rows"]]
+        for name in names[:n_players]:
+            q = quote(name)
+            paths += [f"/player?name={q}&role={role}", f"/players?q={quote(name[:4])}"]
+        for a, b in zip(names[:20], names[1:21]):
+            paths.append(f"/compare?role={role}&a={quote(a)}&b={quote(b)}")
+        paths += [f"/rankings?role={role}", f"/rankings?role={role}&metric=Min&min_age=21&max_age=25",
+                  f"/rows?role={role}&offset=20&limit=50"]
+    writer.close()
+    return paths
+
+async def user(host, port, paths, deadline, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while time.perf_counter() < deadline:
+            path = random.choice(paths)
+            start = time.perf_counter()
+            status, _ = await fetch(reader, writer, path)
+            latencies.append(time.perf_counter() - start)
+            if status != 200: errors.append((status, path))
+    finally:
+        writer.close()
+
+async def run(host, port, concurrency, duration, seed):
+    random.seed(seed)
+    paths = await sample_paths(host, port)
+    latencies, errors = [], []
+    deadline = time.perf_counter() + duration
+    start = time.perf_counter()
+    await asyncio.gather(*(user(host, port, paths, deadline, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    lat = np.array(latencies) * 1000
+    return {
+        "concurrency": concurrency, "requests": len(lat), "errors": len(errors),
+        "rps": len(lat) / elapsed, "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)), "p99_ms": float(np.percentile(lat, 99)),
+        "max_ms": float(lat.max()), "distinct_paths": len(set(paths)),
+    }
+
+async def wait_for(host, port, proc=None, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc is not None and proc.poll() is not None:
+            raise RuntimeError(f"service.py exited with code {proc.returncode}")
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            await asyncio.sleep(0.2)
+    raise TimeoutError(f"service did not come up on {host}:{port}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hammer service.py with concurrent keep-alive clients.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32, 128])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level")
+    parser.add_argument("--spawn", action="store_true", help="Start service.py for the run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results here")
+    args = parser.parse_args(argv)
+
+    proc, results = None, []
+    if args.spawn:
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "service.py")
+        proc = subprocess.Popen([sys.executable, script, "--host", args.host, "--port", str(args.port)])
+    try:
+        asyncio.run(wait_for(args.host, args.port, proc))
+        print(f"{'clients':>8}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+        for c in args.concurrency:
+            r = asyncio.run(run(args.host, args.port, c, args.duration, args.seed))
+            results.append(r)
+            print(f"{c:>8}{r['requests']:>10}{r['errors']:>8}{r['rps']:>10.0f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}{r['p99_ms']:>9.2f}")
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait()
+    return 1 if any(r["errors"] for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
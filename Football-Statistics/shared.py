@@ -0,0 +1,79 @@
+import os
+import threading
+
+import cache
+import preprocessor as pp
+
+# ============================================================
+# SHARED READ-ONLY FRAMES (ONE COPY PER HOST)
+# ============================================================
+# The published version is a cache key written to cache.POINTER. Every
+# process maps that key's Feather files (zero-copy, shared page cache) and
+# every session in a process gets the same frame objects. Refreshing the
+# data writes a new key and swaps the pointer; readers pick it up on their
+# next frames() call while earlier references stay valid.
+KEEP_LOADED = 2  # versions held per process (current + the one being replaced)
+
+_loaded = {}
+_lock = threading.Lock()
+_versions = {}  # (query, source stat) -> version, so an unchanged CSV is not re-hashed
+
+def current_version(cache_dir=None):
+    return cache.current_key(cache_dir)
+
+def publish(version, cache_dir=None):
+    """Point readers at `version` (an existing cache key), atomically."""
+    root = cache_dir or cache.CACHE_DIR
+    if not cache.has_frames(version, root):
+        raise KeyError(f"No cached frames for version {version!r}")
+    tmp = os.path.join(root, cache.POINTER + ".tmp")
+    with open(tmp, "w") as f:
+        f.write(version)
+    os.replace(tmp, os.path.join(root, cache.POINTER))
+
+def source_version(path=None, seasons=None, leagues=None, min_minutes=800, compact=False):
+    """
+    pp.data_fingerprint() of the query. A CSV source is only re-hashed when
+    its (path, mtime, size) changed since the last call; the store's
+    fingerprint is already built from file stats.
+    """
+    if pp.use_store(path):
+        return pp.data_fingerprint(path, seasons, leagues, min_minutes, compact)
+    source = pp.resolve_path(path)
+    stat = os.stat(source)
+    query = [tuple(q) if q is not None else None for q in (seasons, leagues)]
+    key = (source, stat.st_mtime_ns, stat.st_size, *query, min_minutes, compact)
+    if key not in _versions:
+        version = pp.data_fingerprint(path, seasons, leagues, min_minutes, compact)
+        _versions.clear()  # only the latest stat of a source is worth keeping
+        _versions[key] = version
+    return _versions[key]
+
+def refresh(path=None, seasons=None, leagues=None, min_minutes=800, compact=False):
+    """
+    Make sure the frames for the current source data are cached and
+    published; returns the version. Cheap when nothing changed (a stat of
+    the source), so it can run on every app rerun.
+    """
+    version = source_version(path, seasons, leagues, min_minutes, compact)
+    if not cache.has_frames(version):
+        pp.get_processed_data(path, seasons, leagues, min_minutes, compact=compact)
+    if current_version() != version:
+        publish(version)
+    return version
+
+def frames(version=None):
+    """The five role frames of `version` (default: the published one). Treat as read-only."""
+    version = version or current_version()
+    if version is None:
+        raise LookupError("Nothing published yet (call shared.refresh())")
+    with _lock:
+        if version not in _loaded:
+            data = cache.load_frames(version)
+            if data is None:
+                raise KeyError(f"No cached frames for version {version!r}")
+            _loaded[version] = data
+            # Forget the oldest versions; their maps close once unreferenced
+            for old in list(_loaded)[:-KEEP_LOADED]:
+                del _loaded[old]
+        return _loaded[version]
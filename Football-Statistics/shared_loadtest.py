@@ -0,0 +1,124 @@
+import os
+import sys
+import json
+import time
+import pickle
+import shutil
+import argparse
+import tempfile
+import multiprocessing as mp
+
+import numpy as np
+
+import cache
+import shared
+from benchmark import synthetic_players
+
+# ============================================================
+# LOAD TEST: MEMORY AS SESSIONS / WORKERS GROW
+# ============================================================
+def memory():
+    """Rss / Anonymous / Pss of this process in MB (Linux /proc)."""
+    out = {}
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                key, _, rest = line.partition(":")
+                if key in ("Rss", "Pss", "Anonymous"):
+                    out[key.lower()] = int(rest.split()[0]) / 1024
+    except FileNotFoundError:
+        import resource
+        out["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return out
+
+def touch(frames):
+    # What a page render does at minimum: read every numeric value once
+    return sum(float(np.nansum(df.select_dtypes("number").to_numpy(dtype=float, copy=False))) for df in frames)
+
+def sessions_child(mode, steps, cache_dir, queue):
+    """One process holding more and more sessions, each with its own frames handle."""
+    cache.CACHE_DIR = cache_dir
+    version = shared.current_version()
+    blob = pickle.dumps(cache.load_frames(version)) if mode == "copy" else None
+    held, rows = [], []
+    for n in steps:
+        while len(held) < n:
+            # copy: what st.cache_data does per rerun (unpickle a fresh copy);
+            # shared: shared.frames() hands every session the same mapped frames
+            frames = pickle.loads(blob) if mode == "copy" else shared.frames(version)
+            touch(frames)
+            held.append(frames)
+        rows.append({"mode": mode, "sessions": n, **memory()})
+    queue.put(rows)
+
+def _run(target, *args):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=target, args=args + (queue,))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+def _run_workers(mode, n, cache_dir):
+    ctx = mp.get_context("spawn")
+    queue = ctx.Queue()
+    procs = [ctx.Process(target=_hold_worker, args=(mode, cache_dir, queue)) for _ in range(n)]
+    for p in procs: p.start()
+    results = [queue.get() for _ in range(n)]
+    for p in procs:
+        p.terminate()
+        p.join()
+    total = {k: sum(r.get(k, 0) for r in results) for k in ("rss", "pss", "anonymous")}
+    return {"mode": mode, "workers": n, **total}
+
+def _hold_worker(mode, cache_dir, queue):
+    # Report, then stay alive so every worker is measured while the others run
+    cache.CACHE_DIR = cache_dir
+    frames = shared.frames()
+    if mode == "copy":
+        frames = pickle.loads(pickle.dumps(frames))
+    touch(frames)
+    queue.put(memory())
+    while True: time.sleep(1)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Memory of shared (mapped) vs copied frames as sessions and workers grow.")
+    parser.add_argument("--rows", type=int, default=200000, help="Synthetic raw rows")
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--json", help="Also write the results here")
+    args = parser.parse_args(argv)
+
+    work = tempfile.mkdtemp(prefix="fa-shared-")
+    cache.CACHE_DIR = os.path.join(work, "cache")
+    try:
+        csv = os.path.join(work, "players.csv")
+        synthetic_players(args.rows).to_csv(csv, index=False)
+        version = shared.refresh(csv)
+        size = sum(os.path.getsize(os.path.join(cache.CACHE_DIR, version, f)) for f in os.listdir(os.path.join(cache.CACHE_DIR, version)))
+        print(f"{args.rows:,} raw rows -> {size / 2**20:.0f} MB of frames (version {version})\n")
+
+        results = {"sessions": [], "workers": []}
+        print(f"{'mode':<8}{'sessions':>9}{'RSS MB':>10}{'anon MB':>10}")
+        for mode in ("copy", "shared"):
+            for r in _run(sessions_child, mode, args.sessions, cache.CACHE_DIR):
+                results["sessions"].append(r)
+                print(f"{mode:<8}{r['sessions']:>9}{r.get('rss', 0):>10.0f}{r.get('anonymous', 0):>10.0f}")
+
+        print(f"\n{'mode':<8}{'workers':>9}{'sum PSS MB':>12}{'sum anon MB':>13}")
+        for mode in ("copy", "shared"):
+            for n in args.workers:
+                r = _run_workers(mode, n, cache.CACHE_DIR)
+                results["workers"].append(r)
+                print(f"{mode:<8}{n:>9}{r['pss']:>12.0f}{r['anonymous']:>13.0f}")
+
+        if args.json:
+            with open(args.json, "w") as f:
+                json.dump(results, f, indent=2)
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# SIMILAR-PLAYER SEARCH
+# ============================================================
+INFO_COLS = ["Player", "Squad", "Comp", "Age", "Min", "score"]
+
+def pct_metrics(df):
+    """Default profile: every league-adjusted percentile with data in `df`."""
+    return [c for c in df.columns if c.endswith("_pct_adj") and df[c].notna().any()]
+
+class SimilarityIndex:
+    """
+    Players as vectors of `_pct_adj` columns. A query is one matrix-vector
+    product over the whole table plus an argpartition for the top k, so it
+    stays in the millisecond range at 100k players without a tree.
+    Missing percentiles count as 0.
+    """
+    def __init__(self, df, metrics=None):
+        self.df = df.reset_index(drop=True)
+        self.metrics = list(metrics) if metrics is not None else pct_metrics(df)
+        self.X = np.nan_to_num(self.df[self.metrics].to_numpy(dtype=float))
+        self.age = self.df["Age"].to_numpy(dtype=float)
+        self.minutes = self.df["Min"].to_numpy(dtype=float)
+        self.comp = self.df["Comp"].to_numpy()
+        self.info = self.df[[c for c in INFO_COLS if c in self.df.columns]]
+        self._prepared = {}
+        self.names = {}
+        for i, name in enumerate(self.df["Player"]):
+            self.names.setdefault(name, i)
+
+    def _position(self, player):
+        if isinstance(player, (int, np.integer)): return int(player)
+        if player not in self.names:
+            raise KeyError(f"Unknown player: {player!r}")
+        return self.names[player]
+
+    def _weights(self, weights):
+        """Per-metric weights as an array; dict keys are metric names."""
+        if weights is None: return np.ones(len(self.metrics))
+        if isinstance(weights, dict):
+            return np.array([weights.get(m, 1.0) for m in self.metrics], dtype=float)
+        return np.asarray(weights, dtype=float)
+
+    def mask(self, min_age=None, max_age=None, leagues=None, min_minutes=None):
+        keep = np.ones(len(self.df), dtype=bool)
+        if min_age is not None: keep &= self.age >= min_age
+        if max_age is not None: keep &= self.age <= max_age
+        if min_minutes is not None: keep &= self.minutes >= min_minutes
+        if leagues is not None: keep &= np.isin(self.comp, list(leagues))
+        return keep
+
+    def _prepare(self, w):
+        """Weighted matrix and its row norms, kept per weight vector."""
+        key = w.tobytes()
+        if key not in self._prepared:
+            if len(self._prepared) >= 8: self._prepared.clear()
+            Xw = self.X * np.sqrt(w)
+            sq = (Xw ** 2).sum(1)
+            self._prepared[key] = (Xw, sq, np.sqrt(sq))
+        return self._prepared[key]
+
+    def _distances(self, Q, w, metric):
+        """Distance from each query row in Q to every player (smaller = closer)."""
+        Xw, sq, norms = self._prepare(w)
+        Qw = Q * np.sqrt(w)
+        if metric == "cosine":
+            q_norms = np.linalg.norm(Qw, axis=1)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                sim = (Qw @ Xw.T) / np.outer(q_norms, norms)
+            return 1 - np.nan_to_num(sim)
+        if metric == "euclidean":
+            d2 = (Qw ** 2).sum(1)[:, None] + sq[None, :] - 2 * Qw @ Xw.T
+            return np.sqrt(np.maximum(d2, 0))
+        raise ValueError(f"metric must be 'cosine' or 'euclidean', not {metric!r}")
+
+    def similar(self, player, k=10, metric="cosine", weights=None, **filters):
+        """
+        Top-k players closest to `player` (name or row position). Filters:
+        min_age, max_age, leagues, min_minutes. The player itself is excluded.
+        """
+        i = self._position(player)
+        dist = self._distances(self.X[i:i + 1], self._weights(weights), metric)[0]
+        keep = self.mask(**filters)
+        keep[i] = False
+        candidates = np.flatnonzero(keep)
+        if len(candidates) == 0: return self._result(candidates, dist[candidates])
+        k = min(k, len(candidates))
+        top = candidates[np.argpartition(dist[candidates], k - 1)[:k]]
+        top = top[np.argsort(dist[top], kind="stable")]
+        return self._result(top, dist[top])
+
+    def shortlists(self, k=10, metric="cosine", weights=None, batch_size=2048, **filters):
+        """
+        All-pairs mode: the k nearest players for every player, computed in
+        blocks of `batch_size` queries. Returns a long frame (Player,
+        Neighbour, Rank, Distance, ...) ready to export.
+        """
+        w = self._weights(weights)
+        keep = self.mask(**filters)
+        candidates = np.flatnonzero(keep)
+        k = min(k, max(len(candidates) - 1, 0))
+        out_q, out_n, out_d = [], [], []
+        for lo in range(0, len(self.df), batch_size):
+            q = np.arange(lo, min(lo + batch_size, len(self.df)))
+            dist = self._distances(self.X[q], w, metric)[:, candidates]
+            dist[candidates[None, :] == q[:, None]] = np.inf  # not yourself
+            if k == 0: break
+            part = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            part_d = np.take_along_axis(dist, part, axis=1)
+            order = np.argsort(part_d, axis=1, kind="stable")
+            out_q.append(np.repeat(q, k))
+            out_n.append(candidates[np.take_along_axis(part, order, axis=1)].ravel())
+            out_d.append(np.take_along_axis(part_d, order, axis=1).ravel())
+        if not out_q:
+            return pd.DataFrame(columns=["Player", "Squad", "Rank", "Neighbour", "Neighbour Squad", "Distance"])
+        q, nb, d = np.concatenate(out_q), np.concatenate(out_n), np.concatenate(out_d)
+        return pd.DataFrame({
+            "Player": self.df["Player"].to_numpy()[q], "Squad": self.df["Squad"].to_numpy()[q],
+            "Rank": np.tile(np.arange(1, k + 1), len(q) // k),
+            "Neighbour": self.df["Player"].to_numpy()[nb], "Neighbour Squad": self.df["Squad"].to_numpy()[nb],
+            "Distance": d,
+        })
+
+    def _result(self, rows, dist):
+        out = self.info.iloc[rows].copy()
+        out["Distance"] = dist
+        return out.reset_index(drop=True)
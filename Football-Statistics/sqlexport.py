@@ -0,0 +1,266 @@
+import os
+import json
+import time
+import sqlite3
+import argparse
+
+# pandas / the pipeline are imported inside export() and the benchmark,
+# so query() and `python sqlexport.py query` only need the standard library
+
+# ============================================================
+# SQLITE EXPORT
+# ============================================================
+# All five role tables go into one `players` table (plus a Role column),
+# keyed by role, player, squad, competition and season. Each row carries a
+# hash of its values, so a re-export deletes and inserts only the rows
+# that changed. `meta` records the data version and scoring constants the
+# numbers were made with.
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "players.sqlite")
+
+TABLE = "players"
+batch_rows = 5000  # rows per executemany call; the whole export is one transaction
+# Composite indexes also serve lookups on their leading column (Comp, Role)
+indexes = [("Player",), ("Squad",), ("Comp", "Role", "score"), ("Role", "score"), ("score",)]
+key_cols = ["Role", "Player", "Squad", "Comp", "Season"]
+
+def quote(name):
+    """SQL identifier (column names contain +, %, / and spaces)."""
+    return '"' + name.replace('"', '""') + '"'
+
+def connect(db_path=None):
+    conn = sqlite3.connect(db_path or DB_PATH)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+def scoring_constants():
+    import preprocessor as pp
+    return {
+        "metrics_to_rank": pp.metrics_to_rank, "per90_map": pp.per90_map,
+        "league_weights": pp.league_weights, "position_weights": pp.position_weights,
+        "gk_weights": pp.gk_weights, "score_components": pp.score_components,
+        "gk_components": pp.gk_components,
+    }
+
+def _rows_frame(frames):
+    """Role tables stacked with Role, row_key and row_hash columns."""
+    import numpy as np
+    import pandas as pd
+    import preprocessor as pp
+    if not isinstance(frames, dict):
+        frames = dict(zip(pp.roles, frames))
+    df = pd.concat(list(frames.values()), ignore_index=True)
+    role = pd.Series(np.repeat(list(frames), [len(f) for f in frames.values()]), name="Role", dtype=object)
+    df = pd.concat([role, df], axis=1)
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)  # compact frames
+        elif df[col].dtype == np.float32:
+            df[col] = df[col].astype(np.float64)
+
+    parts = [df[c].astype(str) for c in key_cols if c in df.columns]
+    key = parts[0].str.cat(parts[1:], sep="|")
+    # The same key twice (namesakes at one club) gets a #n suffix
+    repeat = key.groupby(key).cumcount()
+    key = key.where(repeat == 0, key + "#" + repeat.astype(str))
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy().view(np.int64)
+    extra = pd.DataFrame({"row_key": key, "row_hash": hashes}, index=df.index)
+    return pd.concat([extra, df], axis=1)
+
+def _sql_type(dtype):
+    import pandas as pd
+    if pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype): return "INTEGER"
+    if pd.api.types.is_float_dtype(dtype): return "REAL"
+    return "TEXT"
+
+def _schema(df):
+    return [(c, "TEXT PRIMARY KEY" if c == "row_key" else _sql_type(df[c].dtype)) for c in df.columns]
+
+def _create(conn, schema):
+    conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    conn.execute(f"CREATE TABLE {TABLE} ({', '.join(f'{quote(c)} {t}' for c, t in schema)})")
+
+def _index(conn):
+    for cols in indexes:
+        name = quote("idx_" + "_".join(cols).lower())
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {TABLE} ({', '.join(map(quote, cols))})")
+
+def _tuples(df):
+    # Column-wise tolist gives plain Python values (NaN becomes NULL in SQLite)
+    return list(zip(*(df[c].tolist() for c in df.columns)))
+
+def meta(db_path=None):
+    """The `meta` table as a dict (empty when nothing was exported yet)."""
+    if not os.path.exists(db_path or DB_PATH): return {}
+    with sqlite3.connect(db_path or DB_PATH) as conn:
+        try:
+            return {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+        except sqlite3.OperationalError:
+            return {}
+
+def export(db_path=None, frames=None, version=None, force=False, batch_size=batch_rows, **query):
+    """
+    Write the processed tables to SQLite. `frames` defaults to
+    get_processed_data(**query) and `version` to its data fingerprint.
+    Returns {"inserted", "updated", "deleted", "unchanged"} row counts.
+    """
+    import preprocessor as pp
+    if frames is None:
+        frames = pp.get_processed_data(**query)
+        fingerprint_args = {k: v for k, v in query.items() if k in ("path", "seasons", "leagues", "min_minutes", "compact")}
+        version = version or pp.data_fingerprint(**fingerprint_args)
+    df = _rows_frame(frames)
+    schema = _schema(df)
+    constants = scoring_constants()
+
+    conn = connect(db_path)
+    try:
+        with conn:  # one transaction: readers see the old or the new export, never half
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+            old = {k: json.loads(v) for k, v in conn.execute("SELECT key, value FROM meta")}
+            rebuild = force or old.get("schema") != [list(s) for s in schema] or old.get("constants") != json.loads(json.dumps(constants))
+            if rebuild:
+                _create(conn, schema)
+                existing = {}
+            else:
+                existing = dict(conn.execute(f"SELECT row_key, row_hash FROM {TABLE}"))
+
+            keys, hashes = df["row_key"].tolist(), df["row_hash"].tolist()
+            fresh = [i for i, (k, h) in enumerate(zip(keys, hashes)) if existing.get(k) != h]
+            gone = list(existing.keys() - set(keys))
+            changed = [k for k in (keys[i] for i in fresh) if k in existing]
+            stale = changed + gone
+            for lo in range(0, len(stale), batch_size):
+                conn.executemany(f"DELETE FROM {TABLE} WHERE row_key = ?", [(k,) for k in stale[lo:lo + batch_size]])
+
+            insert = f"INSERT INTO {TABLE} VALUES ({', '.join('?' * len(schema))})"
+            rows = df.iloc[fresh]
+            for lo in range(0, len(rows), batch_size):
+                conn.executemany(insert, _tuples(rows.iloc[lo:lo + batch_size]))
+            # A fresh table is indexed after the bulk load (one sort per index)
+            _index(conn)
+
+            info = {
+                "version": version, "exported_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "rows": {role: int(n) for role, n in df["Role"].value_counts(sort=False).items()},
+                "constants": constants, "schema": [list(s) for s in schema],
+            }
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [(k, json.dumps(v)) for k, v in info.items()])
+        if rebuild or stale:
+            conn.execute("PRAGMA optimize")
+    finally:
+        conn.close()
+    return {"inserted": len(fresh) - len(changed), "updated": len(changed), "deleted": len(gone),
+            "unchanged": len(df) - len(fresh)}
+
+
+# ============================================================
+# QUERIES
+# ============================================================
+def query(sql, params=(), db_path=None):
+    """Run one SQL statement against the export; rows come back as dicts."""
+    path = db_path or DB_PATH
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"{path} not found; run `python sqlexport.py export` first")
+    # Read-only, so ad-hoc queries can never modify the export
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    conn.row_factory = sqlite3.Row
+    try:
+        return [dict(r) for r in conn.execute(sql, params)]
+    finally:
+        conn.close()
+
+def player(name, db_path=None):
+    return query(f"SELECT * FROM {TABLE} WHERE Player = ?", (name,), db_path)
+
+def top(role, n=10, comp=None, db_path=None):
+    where, params = "Role = ?", [role]
+    if comp is not None:
+        where, params = where + " AND Comp = ?", params + [comp]
+    return query(f"SELECT Player, Squad, Comp, Age, Min, score FROM {TABLE} WHERE {where} "
+                 f"ORDER BY score DESC LIMIT ?", (*params, n), db_path)
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+def _best(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench(db_path=None, frames=None, repeat=200, log=print):
+    """Indexed SQL lookups against the same questions answered by scanning the frames."""
+    import pandas as pd
+    import preprocessor as pp
+    if frames is None:
+        frames = pp.get_processed_data()
+    frames = dict(zip(pp.roles, frames)) if not isinstance(frames, dict) else frames
+    df = pd.concat(list(frames.values()), ignore_index=True)
+    name = df["Player"].iloc[len(df) // 2]
+    squad, comp = df["Squad"].iloc[0], df["Comp"].iloc[0]
+
+    conn = sqlite3.connect(db_path or DB_PATH)
+    sql = lambda s, p: lambda: conn.execute(s, p).fetchall()
+    cases = [
+        ("player by name", sql(f"SELECT * FROM {TABLE} WHERE Player = ?", (name,)),
+         lambda: df[df["Player"] == name]),
+        ("squad roster", sql(f"SELECT Player, Role, score FROM {TABLE} WHERE Squad = ?", (squad,)),
+         lambda: df.loc[df["Squad"] == squad, ["Player", "score"]]),
+        ("top 10 FW", sql(f"SELECT Player, score FROM {TABLE} WHERE Role = 'FW' ORDER BY score DESC LIMIT 10", ()),
+         lambda: frames["FW"].nlargest(10, "score")[["Player", "score"]]),
+        ("top 10 FW in league", sql(f"SELECT Player, score FROM {TABLE} WHERE Role = 'FW' AND Comp = ? "
+                                    f"ORDER BY score DESC LIMIT 10", (comp,)),
+         lambda: frames["FW"].loc[frames["FW"]["Comp"] == comp].nlargest(10, "score")[["Player", "score"]]),
+    ]
+    rows = []
+    try:
+        for label, run_sql, run_df in cases:
+            rows.append({"query": label, "sql_us": _best(run_sql, repeat) * 1e6,
+                         "pandas_us": _best(run_df, repeat) * 1e6})
+    finally:
+        conn.close()
+    out = pd.DataFrame(rows)
+    out["speedup"] = out["pandas_us"] / out["sql_us"]
+    log(f"{len(df)} rows, best of {repeat}")
+    log(out.round(1).to_string(index=False))
+    return out
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the processed tables to SQLite and query them.")
+    parser.add_argument("--db", default=None, help=f"Database file (default: {DB_PATH})")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="Write (or incrementally refresh) the export")
+    p_export.add_argument("--force", action="store_true", help="Rewrite every row")
+    p_export.add_argument("--min-minutes", type=int, default=800)
+
+    p_query = sub.add_parser("query", help="Run one SQL statement")
+    p_query.add_argument("sql")
+
+    p_bench = sub.add_parser("bench", help="Indexed SQL lookups vs DataFrame scans")
+    p_bench.add_argument("--repeat", type=int, default=200)
+
+    args = parser.parse_args(argv)
+    if args.command == "export":
+        counts = export(args.db, force=args.force, min_minutes=args.min_minutes)
+        print(f"{args.db or DB_PATH}: {counts['inserted']} inserted, {counts['updated']} updated, {counts['deleted']} deleted, "
+              f"{counts['unchanged']} unchanged (version {meta(args.db).get('version')})")
+    elif args.command == "query":
+        rows = query(args.sql, db_path=args.db)
+        if rows:
+            print("\t".join(rows[0]))
+            for r in rows:
+                print("\t".join("" if v is None else str(v) for v in r.values()))
+    elif args.command == "bench":
+        bench(args.db, repeat=args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+import numpy as np
+import pandas as pd
+
+import preprocessor as pp
+from incremental import player_keys
+from scoring import components_for
+
+# ============================================================
+# SQUAD & LEAGUE PROFILES
+# ============================================================
+# A profile is the minutes-weighted mean of the players' per-90 and
+# _pct_adj columns, per role or over the whole squad. Every (squad, role)
+# keeps sum(Min * value) and sum(Min) per metric, so a changed player row
+# only moves its own contribution; profiles are read off the sums and
+# kept until the next change. Leagues are sums of their squads.
+def profile_metrics(df):
+    """Per-90s, league-adjusted percentiles and score."""
+    return [c for c in df.columns if c.endswith(("_per90", "_pct_adj")) or c == "score"]
+
+def tagged_rows(frames):
+    """All role tables in one frame with a Role column."""
+    if not isinstance(frames, dict):
+        frames = dict(zip(pp.roles, frames))
+    rows = pd.concat(list(frames.values()), ignore_index=True)
+    role = np.repeat(list(frames), [len(df) for df in frames.values()])
+    return pd.concat([rows, pd.Series(role, name="Role", dtype=object)], axis=1)
+
+def row_keys(rows):
+    """player_keys, with repeats of a key numbered so every row keeps its own slot."""
+    seen = {}
+    out = []
+    for key in player_keys(rows):
+        n = seen.get(key, 0)
+        seen[key] = n + 1
+        out.append(key if n == 0 else key + (n,))
+    return out
+
+class SquadProfiles:
+    """
+    Squad and league profiles over the processed role tables. Build once
+    with `SquadProfiles(frames)`; `update(frames)` (or `upsert` / `remove`)
+    then only touches the player rows that changed.
+    """
+    def __init__(self, frames, metrics=None):
+        rows = tagged_rows(frames)
+        self.keys = ["Squad", "Comp"] + (["Season"] if "Season" in rows.columns else [])
+        self.metrics = list(metrics) if metrics is not None else profile_metrics(rows)
+        self.rank_cols = [c[:-len("_pct_adj")] for c in self.metrics if c.endswith("_pct_adj")]
+        k = len(self.metrics)
+
+        self.squad_keys, self.squad_index = [], {}   # squad code <-> (Squad, Comp[, Season])
+        self.league_keys, self.league_index = [], {}
+        self.squad_league = np.zeros(0, dtype=np.int64)
+        # Per (squad, role): weighted sums, weights, minutes and player count
+        self.S = np.zeros((0, len(pp.roles), k))
+        self.W = np.zeros((0, len(pp.roles), k))
+        self.M = np.zeros((0, len(pp.roles)))
+        self.N = np.zeros((0, len(pp.roles)), dtype=np.int64)
+
+        # Per player row (slots are never reused; `alive` marks removed ones)
+        self.slot = {}
+        self.X = np.zeros((0, k))
+        self.minutes = np.zeros(0)
+        self.squad = np.zeros(0, dtype=np.int64)
+        self.role = np.zeros(0, dtype=np.int64)
+        self.player = np.zeros(0, dtype=object)
+        self.age = np.zeros(0)
+        self.alive = np.zeros(0, dtype=bool)
+        self._cache = {}
+        self._build(rows)
+
+    # ----- building -----
+    def _squad_codes(self, rows):
+        """Squad code of every row; unseen squads get new (empty) groups."""
+        codes, uniques = pd.MultiIndex.from_frame(rows[self.keys]).factorize()
+        new = []
+        for key in uniques:
+            if key not in self.squad_index:
+                self.squad_index[key] = len(self.squad_keys)
+                self.squad_keys.append(key)
+                new.append(key)
+        if new:
+            leagues = []
+            for key in new:
+                league = key[1:]  # (Comp[, Season])
+                if league not in self.league_index:
+                    self.league_index[league] = len(self.league_keys)
+                    self.league_keys.append(league)
+                leagues.append(self.league_index[league])
+            grow = lambda a: np.concatenate([a, np.zeros((len(new),) + a.shape[1:], dtype=a.dtype)])
+            self.S, self.W, self.M, self.N = grow(self.S), grow(self.W), grow(self.M), grow(self.N)
+            self.squad_league = np.append(self.squad_league, leagues)
+        lookup = np.array([self.squad_index[key] for key in uniques], dtype=np.int64)
+        return lookup[codes]
+
+    def _store(self, rows, keys):
+        """Write rows into their slots (new keys get new slots); returns the slots."""
+        slots = np.empty(len(keys), dtype=np.int64)
+        fresh = 0
+        for i, key in enumerate(keys):
+            if key in self.slot:
+                slots[i] = self.slot[key]
+            else:
+                slots[i] = self.slot[key] = len(self.alive) + fresh
+                fresh += 1
+        if fresh:
+            grow = lambda a: np.concatenate([a, np.zeros((fresh,) + a.shape[1:], dtype=a.dtype)])
+            self.X, self.minutes, self.squad, self.role = grow(self.X), grow(self.minutes), grow(self.squad), grow(self.role)
+            self.player, self.age, self.alive = grow(self.player), grow(self.age), grow(self.alive)
+
+        self.X[slots] = rows[self.metrics].to_numpy(dtype=float)
+        self.minutes[slots] = rows["Min"].to_numpy(dtype=float)
+        self.squad[slots] = self._squad_codes(rows)
+        self.role[slots] = pd.Index(pp.roles).get_indexer(rows["Role"])
+        self.player[slots] = rows["Player"].to_numpy(dtype=object)
+        self.age[slots] = pd.to_numeric(rows["Age"], errors="coerce").to_numpy(dtype=float)
+        self.alive[slots] = True
+        return slots
+
+    def _contributions(self, slots):
+        X, m = self.X[slots], self.minutes[slots]
+        seen = np.isfinite(X)
+        return np.where(seen, X * m[:, None], 0.0), np.where(seen, m[:, None], 0.0), m
+
+    def _build(self, rows):
+        slots = self._store(rows, row_keys(rows))
+        weighted, weights, m = self._contributions(slots)
+        k = len(self.metrics)
+        # One groupby over the (squad, role) groups sums every column at once
+        group = self.squad[slots] * len(pp.roles) + self.role[slots]
+        sums = pd.DataFrame(np.column_stack([weighted, weights, m, np.ones(len(m))])).groupby(group).sum()
+        at = np.unravel_index(sums.index.to_numpy(), self.M.shape)
+        values = sums.to_numpy()
+        self.S[at], self.W[at] = values[:, :k], values[:, k:2 * k]
+        self.M[at], self.N[at] = values[:, 2 * k], values[:, 2 * k + 1].astype(np.int64)
+
+    def _add(self, slots, sign):
+        if not len(slots): return
+        weighted, weights, m = self._contributions(slots)
+        at = (self.squad[slots], self.role[slots])
+        np.add.at(self.S, at, sign * weighted)
+        np.add.at(self.W, at, sign * weights)
+        np.add.at(self.M, at, sign * m)
+        np.add.at(self.N, at, sign)
+        # Emptied groups go back to exact zeros (no rounding residue)
+        empty = self.N == 0
+        self.S[empty] = 0.0
+        self.W[empty] = 0.0
+        self.M[empty] = 0.0
+
+    # ----- updates -----
+    def upsert(self, rows, role=None):
+        """Insert processed player rows or replace existing ones (matched by player key)."""
+        if role is not None:
+            rows = rows.assign(Role=role)
+        self._replace(rows.reset_index(drop=True), row_keys(rows))
+
+    def _replace(self, rows, keys):
+        if not len(rows): return
+        known = [self.slot[k] for k in keys if k in self.slot]
+        self._add(np.array(known, dtype=np.int64), -1)
+        self._add(self._store(rows, keys), 1)
+        self._cache.clear()
+
+    def remove(self, keys):
+        slots = np.array([self.slot.pop(k) for k in keys if k in self.slot], dtype=np.int64)
+        self._add(slots, -1)
+        self.alive[slots] = False
+        self._cache.clear()
+
+    def update(self, frames):
+        """
+        Bring the profiles in line with a new set of role tables, touching
+        only rows that are new, gone or different. Returns the number of
+        rows that changed.
+        """
+        rows = tagged_rows(frames)
+        keys = row_keys(rows)
+        slots = np.array([self.slot.get(k, -1) for k in keys], dtype=np.int64)
+        known = slots >= 0
+        s = slots[known]
+        old, new = self.X[s], rows.loc[known, self.metrics].to_numpy(dtype=float)
+        same = ((old == new) | (np.isnan(old) & np.isnan(new))).all(axis=1)
+        same &= self.minutes[s] == rows.loc[known, "Min"].to_numpy(dtype=float)
+        same &= self.role[s] == pd.Index(pp.roles).get_indexer(rows.loc[known, "Role"])
+        labels = zip(*(rows.loc[known, c].to_numpy(dtype=object) for c in self.keys))
+        same &= self.squad[s] == [self.squad_index.get(key, -1) for key in labels]
+        changed = ~known
+        changed[np.flatnonzero(known)[~same]] = True
+
+        present = set(keys)
+        gone = [k for k in self.slot if k not in present]
+        self.remove(gone)
+        self._replace(rows[changed].reset_index(drop=True), [k for k, c in zip(keys, changed) if c])
+        return int(changed.sum()) + len(gone)
+
+    # ----- profiles -----
+    def _sums(self, role, level):
+        if role is None:
+            S, W, M, N = self.S.sum(axis=1), self.W.sum(axis=1), self.M.sum(axis=1), self.N.sum(axis=1)
+        else:
+            r = pp.roles.index(role)
+            S, W, M, N = self.S[:, r], self.W[:, r], self.M[:, r], self.N[:, r]
+        if level == "league":
+            fold = lambda a: np.bincount(self.squad_league, weights=a, minlength=len(self.league_keys))
+            S = np.array([fold(col) for col in S.T]).T.reshape(len(self.league_keys), -1)
+            W = np.array([fold(col) for col in W.T]).T.reshape(len(self.league_keys), -1)
+            M, N = fold(M), fold(N)
+        elif level != "squad":
+            raise ValueError(f"level must be 'squad' or 'league', not {level!r}")
+        return S, W, M, N
+
+    def profiles(self, role=None, level="squad"):
+        """
+        One row per squad (or league): players, minutes and the
+        minutes-weighted mean of every metric. `role` limits it to one role
+        table; None pools the whole squad.
+        """
+        cached = self._cache.get(("profiles", role, level))
+        if cached is not None: return cached
+        S, W, M, N = self._sums(role, level)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = np.where(W > 0, S / W, np.nan)
+        names = self.keys if level == "squad" else self.keys[1:]
+        labels = self.squad_keys if level == "squad" else self.league_keys
+        out = pd.DataFrame(list(labels), columns=names)
+        out["players"] = N.astype(np.int64)
+        out["Min"] = M
+        out = pd.concat([out, pd.DataFrame(values, columns=self.metrics)], axis=1)
+        out = out[out["players"] > 0]  # index = squad / league code
+        self._cache[("profiles", role, level)] = out
+        return out
+
+    def squads(self, role=None):
+        return self.profiles(role, "squad")
+
+    def leagues(self, role=None):
+        return self.profiles(role, "league")
+
+    def components(self, role=None, level="squad"):
+        """Component sub-scores (finishing, creation, ... or stopping, stability) of each profile."""
+        cached = self._cache.get(("components", role, level))
+        if cached is not None: return cached
+        prof = self.profiles(role, level)
+        comps = components_for(role) if role is not None else {**pp.score_components, **pp.gk_components}
+        adj = prof[[c + "_pct_adj" for c in self.rank_cols]].to_numpy(dtype=float).T
+        out = prof.drop(columns=self.metrics)
+        out[list(comps)] = pp.component_matrix(adj, self.rank_cols, comps).T
+        self._cache[("components", role, level)] = out
+        return out
+
+    # ----- gap analysis -----
+    def squad_code(self, squad, comp=None, season=None):
+        """Code of a squad by name (pass comp / season when the name is ambiguous)."""
+        hits = [i for i, key in enumerate(self.squad_keys) if key[0] == squad
+                and (comp is None or key[1] == comp) and (season is None or key[-1] == season)]
+        if not hits:
+            raise KeyError(f"Unknown squad: {squad!r}")
+        if len(hits) > 1:
+            raise ValueError(f"{squad!r} matches {len(hits)} squads; pass comp (and season)")
+        return hits[0]
+
+    def gaps(self, squad, role, comp=None, season=None):
+        """
+        The squad's role components next to its league's, weakest first.
+        gap = league - squad; a role the squad has no minutes in counts as 0,
+        and a league with no players of the role gives NaN baselines and gaps.
+        """
+        code = self.squad_code(squad, comp, season)
+        comps = list(components_for(role))
+        squads, leagues = self.components(role, "squad"), self.components(role, "league")
+        own = squads.loc[code, comps].to_numpy(dtype=float) if code in squads.index else np.zeros(len(comps))
+        # No players of the role left in the league after the minutes cut: no baseline
+        league_code = self.squad_league[code]
+        league = (leagues.loc[league_code, comps].to_numpy(dtype=float) if league_code in leagues.index
+                  else np.full(len(comps), np.nan))
+        out = pd.DataFrame({"squad": np.nan_to_num(own), "league": league}, index=pd.Index(comps, name="component"))
+        out["gap"] = out["league"] - out["squad"]
+        return out.sort_values("gap", ascending=False, kind="stable")
+
+    def _player_components(self, role):
+        cached = self._cache.get(("players", role))
+        if cached is not None: return cached
+        slots = np.flatnonzero(self.alive & (self.role == pp.roles.index(role)))
+        where = [self.metrics.index(c + "_pct_adj") for c in self.rank_cols]
+        C = pp.component_matrix(self.X[slots][:, where].T, self.rank_cols, components_for(role)).T
+        self._cache[("players", role)] = (slots, C)
+        return slots, C
+
+    def fill_gaps(self, squad, role, n=10, weakest=2, comp=None, season=None,
+                  min_age=None, max_age=None, leagues=None, min_minutes=None):
+        """
+        Players from other squads ranked by how much they lift the squad's
+        `weakest` role components. fit = sum over those components of
+        max(player - squad, 0), weighted by each component's gap to the
+        league (equal weights when the squad is above the league on all).
+        """
+        code = self.squad_code(squad, comp, season)
+        gaps = self.gaps(squad, role, comp, season).head(weakest)
+        comps = list(components_for(role))
+        pick = [comps.index(c) for c in gaps.index]
+        need = gaps["gap"].clip(lower=0).to_numpy()
+        need = need / need.sum() if need.sum() > 0 else np.full(len(need), 1 / len(need))
+
+        slots, C = self._player_components(role)
+        gain = np.maximum(np.nan_to_num(C[:, pick]) - gaps["squad"].to_numpy(), 0.0)
+        fit = gain @ need
+
+        keep = self.squad[slots] != code
+        if min_age is not None: keep &= self.age[slots] >= min_age
+        if max_age is not None: keep &= self.age[slots] <= max_age
+        if min_minutes is not None: keep &= self.minutes[slots] >= min_minutes
+        if leagues is not None:
+            comp_of = np.array([key[1] for key in self.squad_keys], dtype=object)
+            keep &= np.isin(comp_of[self.squad[slots]], list(leagues))
+        cand = np.flatnonzero(keep)
+        if len(cand) > n:
+            cand = cand[np.argpartition(-fit[cand], n - 1)[:n]]
+        cand = cand[np.argsort(-fit[cand], kind="stable")]
+
+        rows = slots[cand]
+        labels = [self.squad_keys[i] for i in self.squad[rows]]
+        out = pd.DataFrame({
+            "Player": self.player[rows], "Squad": [key[0] for key in labels], "Comp": [key[1] for key in labels],
+            "Age": self.age[rows], "Min": self.minutes[rows],
+        })
+        if "score" in self.metrics:
+            out["score"] = self.X[rows, self.metrics.index("score")]
+        for j, c in zip(pick, gaps.index):
+            out[c] = C[cand, j]
+        out["fit"] = fit[cand]
+        return out
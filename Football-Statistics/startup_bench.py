@@ -0,0 +1,127 @@
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+
+# ============================================================
+# DASHBOARD STARTUP BENCHMARK
+# ============================================================
+# Each run is a fresh interpreter that loads app.py through Streamlit's
+# AppTest harness (the same script runner the server uses) and records:
+#   first_paint  - the Home page script finished (sidebar + page sent)
+#   data_ready   - the warm-up thread has the processed frames mapped
+#   charts_ready - ... and the common charts are in the chart cache
+# all measured from the start of the script run. Streamlit itself is
+# imported before the clock starts, as it is in a running server.
+# Every invocation appends the median of its runs to startup_history.jsonl,
+# so the numbers can be followed over time.
+HERE = os.path.dirname(os.path.abspath(__file__))
+APP = os.path.join(HERE, "app.py")
+HISTORY_PATH = os.path.join(HERE, "startup_history.jsonl")
+metrics = ["first_paint", "data_ready", "charts_ready"]
+
+def child(timeout):
+    """One cold start in this process; prints the timings as JSON."""
+    from streamlit.testing.v1 import AppTest
+    sys.path.insert(0, HERE)
+    os.chdir(HERE)
+
+    start = time.perf_counter()
+    at = AppTest.from_file(APP, default_timeout=timeout).run()
+    first_paint = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"app.py raised on the Home page: {at.exception[0].message}")
+
+    import warmup  # the module app.py imported, with its thread already running
+    if not warmup.wait(timeout):
+        raise TimeoutError("data not ready in time")
+    data_ready = time.perf_counter() - start
+    warmup.wait(timeout, charts=True)
+    charts_ready = time.perf_counter() - start
+    if warmup.error is not None:
+        raise RuntimeError(f"warm-up failed: {warmup.error!r}")
+    print(json.dumps({"first_paint": first_paint, "data_ready": data_ready, "charts_ready": charts_ready}))
+
+def run_once(cold, timeout):
+    if cold:
+        import cache
+        cache.clear()  # data_ready then includes processing the CSV
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), "--child", "--timeout", str(timeout)],
+                         capture_output=True, text=True, cwd=HERE)
+    if out.returncode != 0:
+        raise RuntimeError(f"startup run failed:\n{out.stderr}")
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, cwd=HERE)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+def read_history(path=HISTORY_PATH):
+    if not os.path.exists(path): return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def compare(entry, history, window=5, tolerance=0.5, min_seconds=0.05):
+    """
+    Regressions against the median of the last `window` comparable runs
+    (same cold/warm mode): a metric slower than median * (1 + tolerance)
+    and by more than `min_seconds`.
+    """
+    previous = [h for h in history if h["cold"] == entry["cold"]][-window:]
+    failures = []
+    for m in metrics:
+        past = [h[m] for h in previous if h.get(m) is not None]
+        if not past: continue
+        ref = statistics.median(past)
+        if entry[m] > ref * (1 + tolerance) and entry[m] - ref > min_seconds:
+            failures.append(f"{m}: {entry[m] * 1000:.0f} ms vs recent median {ref * 1000:.0f} ms")
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the dashboard's first paint and data warm-up, and track them over time.")
+    parser.add_argument("--runs", type=int, default=3, help="Fresh processes per measurement (the median is kept)")
+    parser.add_argument("--cold", action="store_true", help="Clear the processed-data cache before every run")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument("--window", type=int, default=5, help="Past runs to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed slowdown, 0.5 = 50%%")
+    parser.add_argument("--no-record", action="store_true", help="Measure without appending to the history")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(args.timeout)
+        return 0
+
+    runs = []
+    for i in range(args.runs):
+        runs.append(run_once(args.cold, args.timeout))
+        print(f"run {i + 1}: " + "  ".join(f"{m} {runs[-1][m] * 1000:7.0f} ms" for m in metrics))
+    entry = {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"), "commit": git_commit(),
+        "cold": args.cold, "runs": args.runs, "python": platform.python_version(), "cpu_count": os.cpu_count(),
+        **{m: statistics.median(r[m] for r in runs) for m in metrics},
+    }
+    history = read_history(args.history)
+    failures = compare(entry, history, args.window, args.tolerance)
+    if not args.no_record:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+    print(f"\n{'date':<26}{'commit':<10}" + "".join(f"{m + ' ms':>16}" for m in metrics))
+    for h in [h for h in history if h["cold"] == args.cold][-args.window:] + [entry]:
+        print(f"{h['date']:<26}{h['commit'] or '-':<10}" + "".join(f"{h[m] * 1000:>16.0f}" for m in metrics))
+    for line in failures:
+        print(f"REGRESSION {line}", file=sys.stderr)
+    print(f"{len(failures)} regression(s) against the last {args.window} {'cold' if args.cold else 'warm-cache'} runs")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+import os
+import re
+import json
+import argparse
+import hashlib
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+# ============================================================
+# PARTITIONED MULTI-SEASON STORE
+# ============================================================
+# Layout: <STORE_DIR>/Season=2024_2025/Comp=eng%20Premier%20League/part-0.parquet
+STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "store")
+
+PARTITIONING = ds.partitioning(pa.schema([("Season", pa.string()), ("Comp", pa.string())]), flavor="hive")
+ROW_COL = "_row"  # position in the source file, so reads come back in file order
+
+def season_from_path(path):
+    """'players_data_light-2024_2025.csv' -> '2024_2025'."""
+    match = re.search(r"(\d{4})[-_](\d{4})", os.path.basename(path))
+    if match is None:
+        raise ValueError(f"Cannot infer the season from {path!r}; pass it explicitly")
+    return f"{match.group(1)}_{match.group(2)}"
+
+def _files(store_dir=None):
+    root = store_dir or STORE_DIR
+    if not os.path.isdir(root): return []
+    found = []
+    for folder, _, names in os.walk(root):
+        found.extend(os.path.join(folder, n) for n in names if n.endswith(".parquet"))
+    return sorted(found)
+
+def has_data(store_dir=None):
+    return bool(_files(store_dir))
+
+def _dataset(store_dir=None):
+    return ds.dataset(store_dir or STORE_DIR, format="parquet", partitioning=PARTITIONING)
+
+def _partition_filter(seasons=None, leagues=None):
+    expr = None
+    if seasons is not None:
+        expr = ds.field("Season").isin([str(s) for s in seasons])
+    if leagues is not None:
+        league_expr = ds.field("Comp").isin(list(leagues))
+        expr = league_expr if expr is None else expr & league_expr
+    return expr
+
+def ingest(csv_path, season=None, columns=None, store_dir=None):
+    """Convert one raw FBref season CSV into Season/Comp partitions."""
+    season = season or season_from_path(csv_path)
+    df = pd.read_csv(csv_path, usecols=(lambda c: c in columns) if columns else None)
+    return write(df, season, store_dir)
+
+def write(df, season, store_dir=None):
+    """Write one season of player rows as Season/Comp partitions, replacing those partitions."""
+    df = df.loc[:, ~df.columns.duplicated()].copy()
+
+    # Every file must agree on one schema, so numbers are always float64;
+    # the source dtypes go into the file metadata and read() restores them
+    dtypes = {col: str(df[col].dtype) for col in df.columns if df[col].dtype.kind in "iub"}
+    for col in dtypes:
+        df[col] = df[col].astype(np.float64)
+    df["Comp"] = df["Comp"].fillna("other")
+    df["Season"] = season
+    df[ROW_COL] = np.arange(len(df), dtype=np.int64)
+
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"source_dtypes": json.dumps(dtypes).encode()})
+    ds.write_dataset(
+        table, store_dir or STORE_DIR, format="parquet", partitioning=PARTITIONING,
+        existing_data_behavior="delete_matching",
+    )
+    return len(df)
+
+def read(seasons=None, leagues=None, min_minutes=None, columns=None, store_dir=None):
+    """
+    Load only the matching partitions and columns. Season/Comp filters
+    prune whole folders; the minutes filter is checked against row-group
+    statistics before any rows are decoded.
+    """
+    dataset = _dataset(store_dir)
+    expr = _partition_filter(seasons, leagues)
+    if min_minutes is not None:
+        min_expr = ds.field("Min") >= min_minutes
+        expr = min_expr if expr is None else expr & min_expr
+
+    names = set(dataset.schema.names)
+    if columns is not None:
+        columns = [c for c in columns if c in names] + ([ROW_COL] if ROW_COL in names else [])
+    table = dataset.to_table(columns=columns, filter=expr)
+    return _restore(table.to_pandas(), _source_dtypes(dataset, expr))
+
+def _source_dtypes(dataset, expr=None):
+    """Integer / bool dtypes the ingested files had, from their metadata."""
+    dtypes = {}
+    for fragment in dataset.get_fragments(filter=expr):
+        meta = fragment.physical_schema.metadata or {}
+        if b"source_dtypes" in meta:
+            dtypes.update(json.loads(meta[b"source_dtypes"]))
+    return dtypes
+
+def _restore(df, dtypes):
+    """Source row order (season by season) and dtypes, as if read from the CSVs."""
+    if ROW_COL in df.columns:
+        df = df.sort_values(["Season", ROW_COL] if "Season" in df.columns else [ROW_COL], kind="stable")
+        df = df.drop(columns=ROW_COL).reset_index(drop=True)
+    for col, dtype in dtypes.items():
+        # A season that stored NaN in the column keeps it float
+        if col in df.columns and df[col].notna().all():
+            df[col] = df[col].astype(dtype)
+    return df
+
+def fingerprint(seasons=None, leagues=None, store_dir=None):
+    """Cheap version token for the partitions a query would touch."""
+    dataset = _dataset(store_dir)
+    expr = _partition_filter(seasons, leagues)
+    h = hashlib.sha256()
+    for fragment in sorted(dataset.get_fragments(filter=expr), key=lambda f: f.path):
+        stat = os.stat(fragment.path)
+        h.update(f"{fragment.path}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def partitions(store_dir=None):
+    """One row per Season/Comp partition with its player count."""
+    table = _dataset(store_dir).to_table(columns=["Season", "Comp"])
+    if table.num_rows == 0:
+        return pd.DataFrame(columns=["Season", "Comp", "Players"])
+    return (table.to_pandas().groupby(["Season", "Comp"]).size()
+            .rename("Players").reset_index())
+
+
+# ============================================================
+# CLI
+# ============================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Manage the partitioned player-season store.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_ingest = sub.add_parser("ingest", help="Convert raw FBref season CSVs into the store")
+    p_ingest.add_argument("csv", nargs="+")
+    p_ingest.add_argument("--season", help="Season label, e.g. 2024_2025 (default: from the filename)")
+    p_ingest.add_argument("--all-columns", action="store_true", help="Keep every raw column, not just the ones the pipeline uses")
+    p_ingest.add_argument("--store", default=None)
+
+    p_list = sub.add_parser("list", help="Show the partitions in the store")
+    p_list.add_argument("--store", default=None)
+
+    args = parser.parse_args(argv)
+    if args.command == "ingest":
+        # Imported here so `store` stays usable from preprocessor without a cycle
+        from preprocessor import required_cols
+        for path in args.csv:
+            rows = ingest(path, args.season, None if args.all_columns else required_cols, args.store)
+            print(f"{path}: {rows} rows -> season {args.season or season_from_path(path)}")
+    elif args.command == "list":
+        print(partitions(args.store).to_string(index=False))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cache
+import preprocessor as pp
+import shared
+
+@pytest.fixture()
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    return tmp_path
+
+def edit(frames):
+    for df in frames:
+        if len(df):
+            df.loc[df.index[0], "Gls"] = 99
+            df.loc[df.index[0], "score"] = -1.0
+            assert df["Gls"].iloc[0] == 99
+
+def test_cold_and_warm_frames_are_writable_and_equal(cache_dir):
+    csv = pp.resolve_path()
+    cold = pp.get_processed_data(csv)
+    warm = pp.get_processed_data(csv)
+    assert cache.has_frames(pp.data_fingerprint(csv))
+    for a, b in zip(cold, warm):
+        pd.testing.assert_frame_equal(a, b)
+    edit(cold)
+    edit(warm)
+    # Editing a returned frame never touches the cache
+    for a, b in zip(pp.get_processed_data(csv), pp.get_processed_data(csv, use_cache=False)):
+        pd.testing.assert_frame_equal(a, b)
+
+def test_shared_frames_stay_read_only(cache_dir):
+    version = shared.refresh(pp.resolve_path())
+    fw = shared.frames(version)[0]
+    with pytest.raises(ValueError, match="read-only"):
+        fw["score"].to_numpy()[0] = 0.0
+    assert not np.shares_memory(fw["score"].to_numpy(), pp.get_processed_data(pp.resolve_path())[0]["score"].to_numpy())
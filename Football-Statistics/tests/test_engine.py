@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import preprocessor as pp
+from metrics import lazy_frames
+
+def split_by_role(df):
+    """The per-role splits process_single_df was run on before process_all."""
+    codes = pp.role_codes(df)
+    return {role: df[codes == i].copy() for i, role in enumerate(pp.roles)}
+
+@pytest.fixture(scope="module")
+def clean():
+    df = pp.load_data(pp.resolve_path())
+    # Ties: copy a few players' totals onto others in the same role
+    for role_rows in split_by_role(df).values():
+        idx = role_rows.index[:6]
+        df.loc[idx[3:6], ["Min", "90s", "Gls", "Ast", "KP", "Tkl", "Save%", "Cmp%"]] = \
+            df.loc[idx[:3], ["Min", "90s", "Gls", "Ast", "KP", "Tkl", "Save%", "Cmp%"]].to_numpy()
+    # Keepers with no GA90 stay out of the GA90 ranking
+    gk = df.index[pp.role_codes(df) == pp.roles.index("GK")]
+    df.loc[gk[::7], "GA90"] = np.nan
+    return df
+
+@pytest.mark.parametrize("role", pp.roles)
+def test_process_all_matches_process_single_df(clean, role):
+    expected = pp.process_single_df(split_by_role(clean)[role], role)
+    result = pp.process_all(clean)[role]
+    pd.testing.assert_frame_equal(result, expected[result.columns], check_exact=False, rtol=1e-12)
+    assert list(result.columns) == list(expected.columns)
+
+def test_fixture_has_ties_and_missing_ga90(clean):
+    gk = split_by_role(clean)["GK"]
+    assert gk["GA90"].isna().any()
+    assert pp.process_all(clean)["FW"]["Gls_per90_pct"].duplicated().any()
+
+@pytest.mark.parametrize("role", pp.roles)
+def test_lazy_frame_matches_process_all(clean, role):
+    expected = pp.process_all(clean)[role]
+    lazy = lazy_frames(clean)[role]
+    derived = [c for c in expected.columns if c not in clean.columns]
+    pd.testing.assert_frame_equal(lazy.frame(derived)[expected.columns], expected, check_exact=True)
+
+def test_lazy_frame_computes_only_what_is_asked(clean):
+    lazy = lazy_frames(clean)["FW"]
+    pd.testing.assert_series_equal(lazy.frame(["Gls_per90_pct_adj"])["Gls_per90_pct_adj"],
+                                   pp.process_all(clean)["FW"]["Gls_per90_pct_adj"])
+    assert set(lazy.computed()) == {"Gls_per90", "Gls_per90_pct", "league_weight", "Gls_per90_pct_adj"}
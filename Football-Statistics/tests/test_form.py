@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import form
+import matchlogs as ml
+import preprocessor as pp
+
+windows = [{"matches": 4}, {"matches": 1}, {"min_minutes": 270}, {"min_minutes": 45}]
+
+@pytest.fixture(scope="module")
+def logs():
+    rng = np.random.default_rng(7)
+    n = 900
+    players = pd.DataFrame({
+        "Player": [f"Player {i}" for i in range(30)],
+        "Pos": rng.choice(["FW", "MF", "DF", "GK"], 30),
+        "Squad": rng.choice(["A", "B"], 30),
+        "Comp": rng.choice(["eng Premier League", "es La Liga", "nl Eredivisie"], 30),
+    })
+    df = players.iloc[rng.integers(0, 30, n)].reset_index(drop=True)
+    df["Season"] = "2023-2024"
+    # Repeated dates per player are fine: timeline keeps their file order
+    df["Date"] = pd.Timestamp("2023-08-01") + pd.to_timedelta(rng.integers(0, 200, n), unit="D")
+    df["Min"] = rng.choice([0, 10, 45, 60, 90], n).astype(float)
+    for col in ["Gls", "Ast", "Sh", "SoT", "KP", "CrsPA", "Tkl", "Int", "Cmp", "Att", "PrgP", "PrgC",
+                "GA", "SoTA", "Saves", "CS"]:
+        df[col] = rng.integers(0, 4, n).astype(float)
+    for col in ["xG", "xAG", "npxG"]:
+        df[col] = np.round(rng.random(n), 2)
+        df.loc[rng.random(n) < 0.15, col] = np.nan  # not reported for some matches
+    df.loc[:5, "Min"] = np.nan
+    return df
+
+def brute_windows(logs, start, matches=None, min_minutes=None):
+    minutes = np.nan_to_num(logs["Min"].to_numpy(dtype=float))
+    lo, complete = [], []
+    for i in range(len(logs)):
+        if matches is not None:
+            lo.append(max(start[i], i - matches + 1))
+            complete.append(i - start[i] + 1 >= matches)
+            continue
+        j = next((j for j in range(i, start[i] - 1, -1) if minutes[j:i + 1].sum() >= min_minutes), None)
+        lo.append(start[i] if j is None else j)
+        complete.append(j is not None)
+    return np.array(lo), np.array(complete)
+
+def brute_sums(logs, lo):
+    cols = [c for c in ml.sum_cols if c in logs.columns]
+    rows = []
+    for i, first in enumerate(lo):
+        window = logs.iloc[first:i + 1]
+        sums = window[cols].sum(min_count=1).round(6)
+        sums["MP"] = float((window["Min"] > 0).sum())
+        rows.append(sums)
+    return pd.DataFrame(rows).reset_index(drop=True)
+
+@pytest.mark.parametrize("window", windows)
+def test_window_bounds_and_sums_match_brute_force(logs, window):
+    timeline, start = form.timeline(logs)
+    lo, complete = form.window_bounds(timeline["Min"].to_numpy(dtype=float), start, **window)
+    expected_lo, expected_complete = brute_windows(timeline, start, **window)
+    np.testing.assert_array_equal(lo, expected_lo)
+    np.testing.assert_array_equal(complete, expected_complete)
+    pd.testing.assert_frame_equal(form.window_sums(timeline, lo), brute_sums(timeline, expected_lo),
+                                  check_exact=False, rtol=1e-12)
+
+@pytest.mark.parametrize("window", windows)
+def test_rolling_form_matches_reference_pipeline(logs, window):
+    result = form.rolling_form(logs, **window)
+    timeline, start = form.timeline(logs)
+    lo, complete = brute_windows(timeline, start, **window)
+    assert (result["complete"].to_numpy() == complete).all()
+    np.testing.assert_array_equal(result["window_matches"], np.arange(len(timeline)) - lo + 1)
+
+    # Complete windows of each role ranked as season rows by the reference path
+    table = ml.season_table(brute_sums(timeline, lo))
+    table["Comp"] = timeline["Comp"]
+    codes = form.player_roles(timeline)
+    for i, role in enumerate(pp.roles):
+        rows = np.flatnonzero(complete & (codes == i))
+        if not len(rows): continue
+        expected = pp.process_single_df(table.iloc[rows].copy(), role)
+        got = result.iloc[rows]
+        assert (got["Role"] == role).all()
+        columns = [c for c in expected.columns if c.endswith("_per90") or c.endswith("_pct_adj")] + ["score"]
+        pd.testing.assert_frame_equal(got[columns].reset_index(drop=True), expected[columns].reset_index(drop=True),
+                                      check_exact=False, rtol=1e-9)
+    assert result.loc[~complete, "score"].isna().all()
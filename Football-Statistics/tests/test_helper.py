@@ -0,0 +1,70 @@
+import io
+
+import matplotlib
+matplotlib.use("Agg")
+import numpy as np
+import pytest
+from PIL import Image
+
+import helper
+import preprocessor as pp
+
+@pytest.fixture(scope="module")
+def fw():
+    return pp.get_processed_data(use_cache=False)[0]
+
+def pixels(data):
+    return np.asarray(Image.open(io.BytesIO(data)))
+
+def best(fw, n):
+    return fw.sort_values("score", ascending=False)["Player"].head(n).tolist()
+
+def assert_same_render(kind, df, *args):
+    a = helper.template_bytes(kind, df, *args)
+    b = helper.figure_bytes(helper.CHARTS[kind](df, *args))
+    assert np.array_equal(pixels(a), pixels(b)), (kind, args)
+
+def test_radar_template_matches_plot_radar(fw):
+    metrics = helper.ROLE_RADAR_METRICS["FW"]
+    for players in [best(fw, 1), best(fw, 3), best(fw, 2)]:
+        assert_same_render("radar", fw, players, metrics)
+
+def test_comparison_bar_template_matches_plot(fw):
+    metrics = helper.ROLE_BAR_METRICS["FW"]
+    a, b, c = best(fw, 3)
+    assert_same_render("comparison_bar", fw, a, b, metrics)
+    assert_same_render("comparison_bar", fw, c, a, metrics)
+
+@pytest.mark.parametrize("filters", [
+    (),
+    (("min_age", 25.0),),
+    (("min_age", 99.0),),  # nothing left
+    (),                    # a full chart again after the empty one
+])
+def test_top10_template_matches_plot_top10(fw, filters):
+    assert_same_render("top10", fw, "score", filters)
+
+def test_chart_cache_evicts_least_recently_used():
+    cache = helper.ChartCache(max_bytes=10)
+    cache.put("a", b"xxxx")
+    cache.put("b", b"xxxx")
+    assert cache.get("a") == b"xxxx"  # b is now the oldest
+    cache.put("c", b"xxxx")
+    assert cache.get("b") is None and cache.get("a") and cache.get("c")
+    assert cache.size == 8
+    cache.put("big", b"x" * 20)  # larger than the budget: kept alone
+    assert list(cache.entries) == ["big"] and cache.size == 20
+    cache.put("big", b"xx")
+    assert cache.size == 2
+
+def test_render_chart_keys_on_version_and_frame(fw):
+    cache = helper.ChartCache()
+    args = ("score", ())
+    first = helper.render_chart("top10", fw, *args, version="v1", cache=cache)
+    assert helper.render_chart("top10", fw, *args, version="v1", cache=cache) == first
+    assert cache.stats()["hits"] == 1
+    helper.render_chart("top10", fw, *args, version="v2", cache=cache)
+    changed = fw.copy()
+    changed.loc[changed.index[0], "score"] = -1.0
+    helper.render_chart("top10", changed, *args, version="v1", cache=cache)
+    assert cache.stats() == {"hits": 1, "misses": 3, "entries": 3, "bytes": cache.size}
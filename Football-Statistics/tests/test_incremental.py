@@ -0,0 +1,102 @@
+import bisect
+import random
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import preprocessor as pp
+from incremental import IncrementalRanker, SortedValues, player_keys
+
+def assert_matches_full_recompute(ranker):
+    full = ranker.full_recompute()
+    for role, df in ranker.frames().items():
+        pd.testing.assert_frame_equal(df, full[role], obj=role)
+
+@pytest.fixture()
+def raw():
+    return pd.read_csv(pp.resolve_path(), usecols=lambda c: c in pp.required_cols)
+
+@pytest.fixture()
+def ranker(raw):
+    return IncrementalRanker(raw)
+
+def test_initial_build(ranker):
+    assert_matches_full_recompute(ranker)
+
+def test_upsert_new_player(ranker, raw):
+    row = raw[raw["Min"] >= 800].head(1).copy()
+    row["Player"] = "New Signing"
+    row["Gls"] = row["Gls"] + 7
+    ranker.upsert(row)
+    assert ("New Signing", row["Squad"].iloc[0]) in ranker.rows
+    assert_matches_full_recompute(ranker)
+
+def test_upsert_changed_player(ranker, raw):
+    row = raw[raw["Min"] >= 800].iloc[[10]].copy()
+    row[["Min", "Gls", "KP", "Tkl"]] = row[["Min", "Gls", "KP", "Tkl"]] + [90, 1, 3, 2]
+    ranker.upsert(row)
+    assert_matches_full_recompute(ranker)
+
+def test_upsert_creates_ties(ranker, raw):
+    eligible = raw[raw["Min"] >= 800]
+    source = eligible.iloc[[0]]
+    copies = eligible.iloc[1:4].copy()
+    tied = ["Pos", "CrsPA", "Min", "90s", "Gls", "Ast", "xG", "KP", "Tkl", "Int", "Cmp%"]
+    copies[tied] = source[tied].to_numpy().repeat(len(copies), axis=0)
+    ranker.upsert(copies)
+    assert_matches_full_recompute(ranker)
+
+def test_remove(ranker, raw):
+    keys = player_keys(raw[raw["Min"] >= 800].iloc[::50])
+    ranker.remove(keys)
+    assert not any(k in ranker.rows for k in keys)
+    assert_matches_full_recompute(ranker)
+
+def test_sequence_of_updates(ranker, raw):
+    eligible = raw[raw["Min"] >= 800]
+    ranker.upsert(eligible.iloc[[5]].assign(Gls=eligible["Gls"].iloc[5] + 2))
+    assert_matches_full_recompute(ranker)
+    ranker.remove(player_keys(eligible.iloc[[6, 7]]))
+    assert_matches_full_recompute(ranker)
+    ranker.upsert(eligible.iloc[[6]])  # back in
+    assert_matches_full_recompute(ranker)
+    ranker.upsert(eligible.iloc[[8]].assign(Min=500))  # drops under the minutes cut
+    assert_matches_full_recompute(ranker)
+
+def test_upsert_missing_rank_column(ranker, raw):
+    row = raw[raw["Min"] >= 800].head(1).drop(columns=["Cmp%"])
+    with pytest.raises(ValueError, match="Cmp%"):
+        ranker.upsert(row)
+    assert_matches_full_recompute(ranker)
+
+def test_empty_ranker(raw):
+    ranker = IncrementalRanker(raw.iloc[:0])
+    frames = ranker.frames()
+    assert list(frames) == pp.roles and all(df.empty for df in frames.values())
+    assert_matches_full_recompute(ranker)
+
+def test_remove_everyone(ranker):
+    ranker.remove(list(ranker.rows))
+    assert all(df.empty for df in ranker.frames().values())
+    assert_matches_full_recompute(ranker)
+
+def test_sorted_values_matches_a_sorted_list(monkeypatch):
+    monkeypatch.setattr(SortedValues, "load", 4)  # many chunk splits and merges
+    rng = random.Random(0)
+    values, reference = SortedValues([rng.choice([0.0, 1.5, 2.0]) for _ in range(20)]), []
+    reference = sorted(values.to_array().tolist())
+    for _ in range(2000):
+        if reference and rng.random() < 0.45:
+            v = rng.choice(reference)
+            values.remove(v)
+            reference.remove(v)
+        else:
+            v = rng.choice([0.0, 1.5, 2.0, rng.random() * 3])
+            values.add(v)
+            bisect.insort(reference, v)
+        probe = rng.random() * 3 if rng.random() < 0.5 else rng.choice([0.0, 1.5, 2.0])
+        assert values.bisect_left(probe) == bisect.bisect_left(reference, probe)
+        assert values.bisect_right(probe) == bisect.bisect_right(reference, probe)
+        assert len(values) == len(reference)
+    assert np.array_equal(values.to_array(), reference)
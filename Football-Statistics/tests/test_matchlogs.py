@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import matchlogs
+
+def match_rows(n, seed):
+    rng = np.random.default_rng(seed)
+    players = [f"Player {i}" for i in range(40)]
+    df = pd.DataFrame({
+        "Season": "2023-2024",
+        "Comp": rng.choice(["Premier League", "La Liga"], n),
+        "Squad": rng.choice(["A", "B", "C"], n),
+        "Player": rng.choice(players, n),
+        "Pos": rng.choice(["FW", "MF", "GK"], n),
+        "Age": rng.integers(18, 36, n),
+        "Date": pd.Timestamp("2023-08-01") + pd.to_timedelta(rng.permutation(n), unit="D"),
+        "Min": rng.choice([0, 15, 45, 90], n).astype(float),
+    })
+    for col in ["Gls", "Ast", "Sh", "SoT", "Cmp", "Att", "GA", "SoTA", "Saves", "CS"]:
+        df[col] = rng.integers(0, 6, n).astype(float)
+    df["xG"] = np.where(rng.random(n) < 0.1, np.nan, rng.random(n))
+    return df
+
+@pytest.fixture()
+def logs(tmp_path):
+    paths = []
+    for i in range(2):
+        path = tmp_path / f"logs_{i}.csv"
+        match_rows(600, seed=i).to_csv(path, index=False)
+        paths.append(str(path))
+    return paths
+
+def one_shot(paths):
+    rows = pd.concat([pd.read_csv(p, parse_dates=["Date"]) for p in paths], ignore_index=True)
+    rows["MP"] = (rows["Min"] > 0).astype(float)
+    sums = rows.groupby(matchlogs.key_cols)[[c for c in matchlogs.sum_cols + ["MP"] if c in rows.columns]].sum(min_count=1)
+    return sums.sort_index()
+
+def by_key(table):
+    return table.set_index(matchlogs.key_cols).sort_index()
+
+def test_chunked_aggregation_matches_one_shot_groupby(logs, tmp_path):
+    table, _ = matchlogs.aggregate(logs, chunksize=97, cache_dir=str(tmp_path / "cache"))
+    expected = one_shot(logs)
+    pd.testing.assert_frame_equal(by_key(table)[expected.columns], expected, check_dtype=False)
+    # Info columns are the last value by date
+    rows = pd.concat([pd.read_csv(p, parse_dates=["Date"]) for p in logs]).sort_values("Date", kind="stable")
+    last = rows.groupby(matchlogs.key_cols)["Pos"].last().sort_index()
+    assert (by_key(table)["Pos"] == last).all()
+
+def test_rates_come_from_summed_counts(logs, tmp_path):
+    table = by_key(matchlogs.aggregate(logs, chunksize=101, cache_dir=str(tmp_path / "cache"))[0])
+    sums = one_shot(logs)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        expected = {
+            "Cmp%": sums["Cmp"] / sums["Att"] * 100,
+            "Save%": sums["Saves"] / sums["SoTA"] * 100,
+            "GA90": sums["GA"] / (sums["Min"] / 90),
+        }
+    for name, values in expected.items():
+        values = values.replace([np.inf, -np.inf], np.nan)
+        pd.testing.assert_series_equal(table[name], values, check_names=False)
+
+def test_unchanged_files_are_not_read_again(logs, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+    first, changed = matchlogs.aggregate(logs, chunksize=200, cache_dir=cache_dir)
+    assert changed == logs
+
+    def no_read(*args, **kwargs):
+        raise AssertionError("an unchanged file was read")
+    monkeypatch.setattr(matchlogs, "aggregate_file", no_read)
+    monkeypatch.setattr(matchlogs.pd, "read_csv", no_read)
+    again, changed = matchlogs.aggregate(logs, chunksize=200, cache_dir=cache_dir)
+    assert changed == []
+    pd.testing.assert_frame_equal(by_key(again), by_key(first))
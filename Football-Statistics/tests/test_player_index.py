@@ -0,0 +1,56 @@
+import pandas as pd
+import pytest
+
+import preprocessor as pp
+from player_index import PlayerIndex, normalize_name, player_id, player_ids, EXACT, PREFIX, FUZZY
+
+@pytest.fixture(scope="module")
+def frames():
+    return dict(zip(pp.roles, pp.get_processed_data()))
+
+@pytest.fixture(scope="module")
+def index(frames):
+    return PlayerIndex(frames)
+
+@pytest.mark.parametrize("raw, folded", [
+    ("Kylian Mbappé", "kylian mbappe"),
+    ("Trent Alexander-Arnold", "trent alexander arnold"),
+    ("Martin Ødegaard", "martin odegaard"),
+    ("Łukasz Fabiański", "lukasz fabianski"),
+    ("İlkay Gündoğan", "ilkay gundogan"),
+    ("  ÉDER   Militão ", "eder militao"),
+])
+def test_normalize_name_folds_accents(raw, folded):
+    assert normalize_name(raw) == folded
+
+def test_exact_lookup_ignores_accents_and_case(index):
+    hits = index.exact("KYLIAN MBAPPE")
+    assert hits and hits[0].player == "Kylian Mbappé" and hits[0].match == EXACT
+
+def test_prefix_lookup(index):
+    hits = index.prefix("kylian mba")
+    assert hits[0].player == "Kylian Mbappé" and hits[0].match == PREFIX
+    assert all(normalize_name(h.player).startswith("kylian mba") or h.match != PREFIX for h in hits)
+
+def test_fuzzy_lookup(index):
+    hits = index.fuzzy("kylain mbape")
+    assert hits and hits[0].player == "Kylian Mbappé" and hits[0].match == FUZZY
+    assert index.search("Mbappee")[0].player == "Kylian Mbappé"
+
+def test_ids_are_stable():
+    assert player_id("Kylian Mbappé", "Real Madrid", "es La Liga") == player_id("kylian mbappe", "Real Madrid", "es La Liga")
+    assert player_ids(["Kylian Mbappé"], ["Real Madrid"], ["es La Liga"], [""])[0] == \
+        player_id("Kylian Mbappé", "Real Madrid", "es La Liga")
+
+def test_namesakes_at_one_club_get_distinct_ids(frames):
+    fw = frames["FW"]
+    twin = fw.iloc[[0]].assign(Min=fw["Min"].iloc[0] - 1)
+    frames = {**frames, "FW": pd.concat([fw, twin], ignore_index=True)}
+    index = PlayerIndex(frames)
+    hits = index.exact(fw["Player"].iloc[0], role="FW", limit=None)
+    ids = [h.player_id for h in hits if h.squad == fw["Squad"].iloc[0]]
+    assert len(ids) == 2 and len(set(ids)) == 2
+    assert len(index.by_id) == len(index.meta)
+    # The first row keeps the plain ID; the namesake gets its own row back
+    assert ids[0] == player_id(fw["Player"].iloc[0], fw["Squad"].iloc[0], fw["Comp"].iloc[0])
+    assert index.row(ids[1])["Min"] == fw["Min"].iloc[0] - 1
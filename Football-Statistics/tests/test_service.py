@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+import service
+
+@pytest.fixture(scope="module")
+def svc():
+    s = service.Service(workers=1)
+    yield s
+    s.pool.shutdown()
+
+def player(svc, role="FW"):
+    return svc.state.frames[role]["Player"].iloc[0]
+
+@pytest.mark.parametrize("path, query, status", [
+    ("/compare", "role=XX&a=A&b=B", 400),
+    ("/compare", "role=FW&a=Nobody&b=Nobody", 404),
+    ("/player", "name=Nobody", 404),
+    ("/player", "id=nope", 404),
+    ("/rankings", "role=FW&n=0", 400),
+    ("/rankings", "role=FW&n=-3", 400),
+    ("/score", "role=FW&weights=1,1,1,1&n=-1", 400),
+    ("/rows", "role=FW&limit=-5", 400),
+    ("/rows", "role=FW&offset=-10", 400),
+    ("/players", "q=a&limit=0", 400),
+    ("/rankings", "role=FW&weights=score:1,xG_per90_pct_adj:-1", 400),
+    ("/rankings", "role=FW&weights=score:0", 400),
+    ("/rankings", "role=FW&weights=score:nan", 400),
+    ("/rankings", "role=FW&weights=score:2,xG_per90_pct_adj:1", 200),
+    ("/rankings", "role=FW&n=3", 200),
+    ("/rows", "role=FW&offset=0&limit=1", 200),
+])
+def test_status_codes(svc, path, query, status):
+    assert svc.handle(path, query)[0] == status
+
+def test_known_player_and_rankings_size(svc):
+    status, body = svc.handle("/player", f"name={player(svc)}&role=FW")
+    assert status == 200 and body["card"]["Player"] == player(svc)
+    assert len(svc.handle("/rankings", "role=FW&n=3")[1]["rows"]) == 3
+
+def test_internal_key_error_is_500(svc, monkeypatch):
+    def broken(state, query):
+        return {}["missing"]
+    monkeypatch.setitem(service.ROUTES, "/broken", broken)
+    status, _ = asyncio.run(svc.respond("GET", "/broken"))
+    assert status == 500
+
+def test_failed_refresh_keeps_serving(svc, monkeypatch):
+    calls = []
+    def failing_refresh():
+        calls.append(1)
+        raise OSError("source mid-write")
+    monkeypatch.setattr(service.shared, "refresh", failing_refresh)
+    monkeypatch.setattr(svc, "refresh_every", 0.01)
+    version = svc.state.version
+
+    async def run():
+        task = asyncio.create_task(svc.watch_version())
+        await asyncio.sleep(0.2)
+        assert not task.done()
+        task.cancel()
+    asyncio.run(run())
+    assert len(calls) > 1 and svc.state.version == version
+
+@pytest.mark.parametrize("length", ["abc", "-1", "1.5"])
+def test_bad_content_length_is_400(svc, length):
+    async def run():
+        server = await asyncio.start_server(svc.connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET /rankings?role=FW HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        server.close()
+        await server.wait_closed()
+        return response
+    response = asyncio.run(run())
+    assert response.startswith(b"HTTP/1.1 400 ") and b"Connection: close" in response
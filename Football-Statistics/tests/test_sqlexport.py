@@ -0,0 +1,57 @@
+import pandas as pd
+import pytest
+
+import preprocessor as pp
+import sqlexport
+
+@pytest.fixture(scope="module")
+def frames():
+    return pp.process_all(pp.load_data(pp.resolve_path()))
+
+def table(db_path):
+    return pd.DataFrame(sqlexport.query(f"SELECT * FROM {sqlexport.TABLE}", db_path=db_path))
+
+def expected(frames):
+    df = sqlexport._rows_frame(frames)
+    return df.set_index("row_key").sort_index()
+
+def assert_exported(db_path, frames):
+    got = table(db_path).set_index("row_key").sort_index()
+    want = expected(frames)
+    assert list(got.index) == list(want.index)
+    pd.testing.assert_frame_equal(got[["Player", "Squad", "Role"]], want[["Player", "Squad", "Role"]], check_dtype=False)
+    pd.testing.assert_series_equal(got["score"], want["score"], check_dtype=False)
+    assert (got["row_hash"] == want["row_hash"]).all()
+
+def test_export_round_trip(frames, tmp_path):
+    db = str(tmp_path / "players.sqlite")
+    total = sum(len(df) for df in frames.values())
+
+    counts = sqlexport.export(db, frames, version="v1")
+    assert counts == {"inserted": total, "updated": 0, "deleted": 0, "unchanged": 0}
+    assert_exported(db, frames)
+    assert sqlexport.meta(db)["version"] == "v1"
+    assert sqlexport.meta(db)["rows"] == {role: len(df) for role, df in frames.items()}
+
+    counts = sqlexport.export(db, frames, version="v1")
+    assert counts == {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": total}
+
+    # Three edited, two removed and one new player
+    new = {role: df.copy() for role, df in frames.items()}
+    fw = new["FW"]
+    fw.loc[fw.index[:3], "score"] += 1.0
+    added = fw.iloc[[0]].assign(Player="Someone New")
+    new["FW"] = pd.concat([fw, added], ignore_index=True)
+    new["GK"] = new["GK"].drop(new["GK"].index[:2])
+    counts = sqlexport.export(db, new, version="v2")
+    assert counts == {"inserted": 1, "updated": 3, "deleted": 2, "unchanged": total - 5}
+    assert_exported(db, new)
+    assert sqlexport.meta(db)["version"] == "v2"
+    assert sqlexport.player("Someone New", db)[0]["Role"] == "FW"
+
+def test_force_rewrites_every_row(frames, tmp_path):
+    db = str(tmp_path / "players.sqlite")
+    sqlexport.export(db, frames)
+    total = sum(len(df) for df in frames.values())
+    assert sqlexport.export(db, frames, force=True)["inserted"] == total
+    assert len(table(db)) == total
@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import preprocessor as pp
+from squads import SquadProfiles
+
+@pytest.fixture(scope="module")
+def frames():
+    return pp.process_all(pp.load_data(pp.resolve_path()))
+
+def changed(frames):
+    """A new set of role tables: edited, moved, dropped and added players."""
+    out = {role: df.copy() for role, df in frames.items()}
+    fw, mf, gk = out["FW"], out["MF"], out["GK"]
+    fw.loc[fw.index[:5], "Gls_per90_pct_adj"] += 3.0
+    fw.loc[fw.index[5:8], "Min"] *= 2
+    fw.loc[fw.index[8], "xG_per90_pct_adj"] = np.nan
+    mf.loc[mf.index[:4], "Squad"] = mf["Squad"].iloc[-1]  # transfers
+    out["MF"] = mf.drop(mf.index[10:30])
+    # A squad in a league of its own, with forwards only
+    new = fw.iloc[:3].copy()
+    new["Squad"], new["Comp"] = "Newcomers", "xx Test League"
+    new["Player"] = new["Player"] + " (new)"
+    out["FW"] = pd.concat([fw, new], ignore_index=True)
+    out["GK"] = gk.drop(gk.index[gk["Squad"] == gk["Squad"].iloc[0]])
+    return out
+
+def labelled(profiles, keys):
+    return profiles.set_index(keys).sort_index()
+
+@pytest.mark.parametrize("role", [None, "FW", "MF", "GK"])
+@pytest.mark.parametrize("level", ["squad", "league"])
+def test_update_matches_fresh_build(frames, role, level):
+    profiles = SquadProfiles(frames)
+    profiles.profiles(role, level)  # cached before the update
+    new = changed(frames)
+    assert profiles.update(new) > 0
+    fresh = SquadProfiles(new)
+    keys = fresh.keys if level == "squad" else fresh.keys[1:]
+    pd.testing.assert_frame_equal(labelled(profiles.profiles(role, level), keys),
+                                  labelled(fresh.profiles(role, level), keys), check_exact=False, rtol=1e-9)
+    pd.testing.assert_frame_equal(labelled(profiles.components(role, level), keys),
+                                  labelled(fresh.components(role, level), keys), check_exact=False, rtol=1e-9)
+
+def test_update_without_changes_touches_nothing(frames):
+    profiles = SquadProfiles(frames)
+    assert profiles.update({role: df.copy() for role, df in frames.items()}) == 0
+
+def test_gaps_without_league_baseline(frames):
+    profiles = SquadProfiles(changed(frames))
+    gaps = profiles.gaps("Newcomers", "GK")
+    assert gaps["league"].isna().all() and gaps["gap"].isna().all()
+    assert (gaps["squad"] == 0).all()
+    # Roles the league does have keep real baselines
+    assert profiles.gaps("Newcomers", "FW")["league"].notna().all()
@@ -0,0 +1,25 @@
+import pandas as pd
+
+import preprocessor as pp
+import store
+
+def test_store_reads_like_the_csv(tmp_path, monkeypatch):
+    csv = pp.resolve_path()
+    store.ingest(csv, "2024_2025", columns=pp.required_cols, store_dir=str(tmp_path))
+    monkeypatch.setattr(store, "STORE_DIR", str(tmp_path))
+    assert pp.use_store()
+
+    from_csv = pp.load_data(csv)
+    from_store = pp.load_data().drop(columns="Season")
+    pd.testing.assert_frame_equal(from_store, from_csv)
+
+    for role, a, b in zip(pp.roles, pp.process_all(from_store).values(), pp.process_all(from_csv).values()):
+        pd.testing.assert_frame_equal(a, b, obj=role)
+
+def test_filtered_read_keeps_file_order(tmp_path):
+    csv = pp.resolve_path()
+    store.ingest(csv, "2024_2025", columns=pp.required_cols, store_dir=str(tmp_path))
+    raw = pd.read_csv(csv, usecols=lambda c: c in pp.required_cols)
+    expected = raw[raw["Min"] >= 1500].reset_index(drop=True)
+    got = store.read(min_minutes=1500, columns=list(raw.columns), store_dir=str(tmp_path))
+    pd.testing.assert_frame_equal(got, expected)
@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import preprocessor as pp
+from whatif import WhatIf, total_cols
+
+@pytest.fixture(scope="module")
+def clean():
+    return pp.load_data(pp.resolve_path())
+
+@pytest.fixture(scope="module")
+def frames(clean):
+    return pp.process_all(clean)
+
+def candidates(clean):
+    """One new player per role: a copy of a real row with changed totals."""
+    codes = pp.role_codes(clean)
+    rows = []
+    for i, role in enumerate(pp.roles):
+        row = clean[codes == i].iloc[[len(clean[codes == i]) // 2]].copy()
+        row["Player"] = f"New {role}"
+        row["Squad"] = "Nowhere FC"
+        row[["Gls", "Ast", "KP", "Tkl"]] = row[["Gls", "Ast", "KP", "Tkl"]].to_numpy() + 2
+        rows.append(row)
+    return pd.concat(rows, ignore_index=True)
+
+def rerun(clean, row):
+    """The row as process_all ranks it after being appended to the data."""
+    out = pp.process_all(pd.concat([clean, row], ignore_index=True))
+    for df in out.values():
+        hit = df[df["Player"] == row["Player"].iloc[0]]
+        if len(hit): return hit.iloc[0]
+
+def current_rank(frames, role, score):
+    return int((frames[role]["score"] > score).sum()) + 1
+
+def test_lookup_and_batch_match_appending_the_row(clean, frames):
+    whatif = WhatIf(frames)
+    new = candidates(clean)
+    batch = whatif.batch(new)
+    rank_cols = [c for c in frames["FW"].columns if c.endswith(("_per90", "_pct", "_pct_adj"))] + ["score"]
+    for i, role in enumerate(pp.roles):
+        row = new.iloc[[i]]
+        expected = rerun(clean, row)
+        totals = row.iloc[0][[c for c in total_cols if c in row.columns]].to_dict()
+        looked = whatif.lookup(role, totals, row["Comp"].iloc[0])
+        got = batch.iloc[i]
+        assert got["Role"] == role
+        for col in rank_cols:
+            assert looked[col] == pytest.approx(expected[col], rel=1e-12, nan_ok=True), (role, col)
+            assert got[col] == pytest.approx(expected[col], rel=1e-12, nan_ok=True), (role, col)
+        rank = current_rank(frames, role, expected["score"])
+        assert looked["rank"] == got["rank"] == rank
+        assert looked["out_of"] == len(frames[role]) + 1
+
+def test_unscored_rows_get_no_rank(clean, frames):
+    whatif = WhatIf(frames)
+    new = candidates(clean).iloc[:2].copy()
+    new.loc[1, "Pos"] = "XX"  # no role table
+    batch = whatif.batch(new)
+    assert batch.loc[0, "rank"] >= 1
+    assert np.isnan(batch.loc[1, "score"]) and np.isnan(batch.loc[1, "rank"])
+    assert batch.loc[1, [c for c in batch.columns if c.endswith("_pct")]].isna().all()
+    assert np.isnan(whatif._rank("FW", np.array([np.nan, np.inf]))[0])
+
+def test_lookup_without_a_score(clean, frames, monkeypatch):
+    whatif = WhatIf(frames)
+    monkeypatch.setattr(whatif, "_score", lambda role, adj: float("nan"))
+    out = whatif.lookup("FW", {"Min": 900, "Gls": 5}, "es La Liga")
+    assert out["rank"] is None
+    assert np.isnan(out["Gls_per90_pct"]) and np.isnan(out["Gls_per90_pct_adj"])
@@ -0,0 +1,182 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import preprocessor as pp
+
+# ============================================================
+# SIMULATED SEASONS
+# ============================================================
+# Each draw replays every player's season with the same minutes: event
+# counts are Poisson around the observed totals, success rates binomial
+# over their attempts. Re-ranking the whole role group per draw gives the
+# spread of each percentile and of the score.
+poisson_counts = ["Gls", "Ast", "Sh", "SoT", "KP", "CrsPA", "Carries", "PrgC", "PrgP", "PrgR",
+                  "Tkl", "Int", "Clr", "SoTA", "GA"]
+count_sums = {"G+A": ("Gls", "Ast"), "Tkl+Int": ("Tkl", "Int")}
+# Expected-goal totals: value per event held, event volume simulated
+per_event = {"xG": "Sh", "xAG": "KP", "PSxG": "SoTA"}
+
+interval_level = 0.9
+default_draws = 1000
+
+def _counts(rng, totals, draws):
+    ok = np.isfinite(totals) & (totals >= 0)
+    sim = rng.poisson(np.where(ok, totals, 0.0), size=(draws, len(totals))).astype(float)
+    sim[:, ~ok] = np.nan
+    return sim
+
+def _binomial(rng, trials, rate):
+    # trials: (draws, m) or (m,); rate in percent
+    ok = np.isfinite(rate) & np.all(np.isfinite(np.atleast_2d(trials)), axis=0)
+    n = np.where(np.isfinite(trials), np.round(trials), 0).astype(np.int64)
+    p = np.clip(np.where(ok, rate, 0.0) / 100, 0, 1)
+    return np.where(ok, rng.binomial(n, p), np.nan).astype(float), ok
+
+def nineties(df):
+    return (df["90s"] if "90s" in df.columns else df["Min"] / 90).to_numpy(dtype=float)
+
+def simulate(df, draws, rng):
+    """Simulated raw columns {name: (draws, rows) array} for one role frame."""
+    col = lambda c: df[c].to_numpy(dtype=float) if c in df.columns else None
+    sim = {c: _counts(rng, col(c), draws) for c in poisson_counts if c in df.columns}
+    for name, (a, b) in count_sums.items():
+        if a in sim and b in sim: sim[name] = sim[a] + sim[b]
+    for name, events in per_event.items():
+        if name in df.columns and events in sim:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                per = np.where(col(events) > 0, col(name) / col(events), 0.0)
+            sim[name] = sim[events] * per
+
+    if "Save%" in df.columns and "SoTA" in sim:
+        saves, ok = _binomial(rng, sim["SoTA"], col("Save%"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sim["Save%"] = np.where(ok & (sim["SoTA"] > 0), saves / sim["SoTA"] * 100, col("Save%"))
+        sim["Saves"] = saves
+    if "Cmp%" in df.columns and "Att" in df.columns:
+        done, ok = _binomial(rng, np.broadcast_to(col("Att"), (draws, len(df))), col("Cmp%"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sim["Cmp%"] = np.where(ok & (col("Att") > 0), done / col("Att") * 100, col("Cmp%"))
+    if "CS%" in df.columns:
+        # Matches implied by CS / CS%, else one per full 90
+        games = nineties(df)
+        if "CS" in df.columns:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                games = np.where(col("CS%") > 0, col("CS") / col("CS%") * 100, games)
+        cs, ok = _binomial(rng, np.broadcast_to(games, (draws, len(df))), col("CS%"))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sim["CS%"] = np.where(ok & (np.round(games) > 0), cs / np.round(games) * 100, col("CS%"))
+    if "GA" in sim:
+        sim["GA90"] = sim["GA"] / nineties(df)
+        if "PSxG" in sim: sim["PSxG+/-"] = sim["PSxG"] - sim["GA"]
+    return sim
+
+
+# ============================================================
+# RE-RANKING
+# ============================================================
+def rank_values(df, sim, rank_cols, draws):
+    """(draws, metrics, rows) values ready to rank, prepared as metric_rows does."""
+    per90_sources = {v: k for k, v in pp.per90_map.items()}
+    n90 = nineties(df)
+    out = np.empty((draws, len(rank_cols), len(df)))
+    for i, c in enumerate(rank_cols):
+        source = per90_sources.get(c)
+        if source is None:
+            out[:, i] = sim[c] if c in sim else df[c].to_numpy(dtype=float)
+        elif source in sim:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[:, i] = sim[source] / n90
+        elif source in df.columns:
+            with np.errstate(invalid="ignore", divide="ignore"):
+                out[:, i] = df[source].to_numpy(dtype=float) / n90
+        else:
+            out[:, i] = 0.0
+
+    missing = np.isnan(out)
+    if "GA90" in rank_cols:
+        ga = rank_cols.index("GA90")
+        missing[:, ga] = False
+        out[:, ga] = -out[:, ga]  # lower is better
+    out[missing] = 0.0
+    return out
+
+def pct_of(values, pick):
+    """
+    Percentile (0-100) of columns `pick` within every row of `values`.
+    Same numbers as group_pct_rank on the whole row (average ties, NaN left
+    out), but only the reported players are located in the sorted row.
+    """
+    if 4 * len(pick) > values.shape[1]:
+        # Most of the row is reported: ranking all of it is cheaper
+        return pp.group_pct_rank(values, np.array([0, values.shape[1]]))[:, pick]
+    ordered = np.sort(values, axis=1)  # NaN sorts last
+    targets = values[:, pick]
+    ranks = np.empty(targets.shape)
+    for r in range(len(values)):
+        below = ordered[r].searchsorted(targets[r], "left")
+        upto = ordered[r].searchsorted(targets[r], "right")
+        ranks[r] = (below + upto + 1) / 2
+    nobs = values.shape[1] - np.isnan(values).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pct = ranks / nobs[:, None] * 100
+    pct[np.isnan(targets)] = np.nan
+    return pct
+
+def rescore(df, role, values, rank_cols, pick):
+    """_pct_adj (draws, metrics, picked) and score (draws, picked) for stacked draws of one role."""
+    draws, k, m = values.shape
+    pct = pct_of(values.reshape(draws * k, m), pick).reshape(draws, k, len(pick))
+    adj = pct * pp.league_weight_vector(df["Comp"])[pick]
+    flat = adj.transpose(1, 0, 2).reshape(k, draws * len(pick))
+    codes = np.full(draws * len(pick), pp.roles.index(role))
+    return adj, pp.score_rows(flat, rank_cols, codes).reshape(draws, len(pick))
+
+
+# ============================================================
+# INTERVALS
+# ============================================================
+def intervals(df, role, rows=None, draws=default_draws, level=interval_level, seed=0,
+              batch_size=100, workers=None):
+    """
+    Bootstrap intervals for `score` and every `_pct_adj` metric of role
+    frame `df`. `rows` picks the players reported (positions or a boolean
+    mask; default all), but the whole role is resampled and re-ranked in
+    every draw. Returns one row per reported player with <col>_lo and
+    <col>_hi columns, indexed like `df`.
+    """
+    _, rank_cols, _ = pp.derived_layout(df)
+    pick = np.arange(len(df)) if rows is None else np.arange(len(df))[np.asarray(rows)]
+    sizes = [min(batch_size, draws - s) for s in range(0, draws, batch_size)]
+    streams = np.random.SeedSequence(seed).spawn(len(sizes))
+
+    def batch(n, stream):
+        rng = np.random.default_rng(stream)
+        return rescore(df, role, rank_values(df, simulate(df, n, rng), rank_cols, n), rank_cols, pick)
+
+    if workers is None: workers = min(len(sizes), os.cpu_count() or 1)
+    if workers > 1:
+        # Sorting and the array maths release the GIL
+        with ThreadPoolExecutor(workers) as pool:
+            parts = list(pool.map(batch, sizes, streams))
+    else:
+        parts = [batch(n, s) for n, s in zip(sizes, streams)]
+    adj = np.concatenate([a for a, _ in parts])
+    score = np.concatenate([s for _, s in parts])
+
+    q = [(1 - level) / 2, (1 + level) / 2]
+    adj_q = np.quantile(adj, q, axis=0)
+    score_q = np.quantile(score, q, axis=0)
+    out = {"score_lo": score_q[0], "score_hi": score_q[1]}
+    for i, c in enumerate(rank_cols):
+        out[c + "_pct_adj_lo"] = adj_q[0, i]
+        out[c + "_pct_adj_hi"] = adj_q[1, i]
+    return pd.DataFrame(out, index=df.index[pick])
+
+def player_intervals(df, role, name, **kwargs):
+    """intervals() for one player by name (None when not found)."""
+    hits = np.flatnonzero(df["Player"].to_numpy() == name)
+    if not len(hits): return None
+    return intervals(df, role, rows=hits[:1], **kwargs).iloc[0]
@@ -0,0 +1,90 @@
+import time
+import logging
+import threading
+
+import instrument
+
+# Only the standard library is imported here: app.py imports this module
+# before its first paint, and pandas / matplotlib / the pipeline load on
+# the warm-up thread (or on the first page that needs them).
+
+# ============================================================
+# BACKGROUND WARM-UP
+# ============================================================
+# One thread per process, started once the first page has been sent. It
+# imports the data stack, makes sure the processed frames are cached and
+# published, maps them, and draws the charts a visitor is most likely to
+# ask for first into helper.chart_cache. Pages that need data before it
+# finishes wait on the same lock instead of processing the data twice.
+log = logging.getLogger("football_analytics.warmup")
+
+ready = threading.Event()        # frames loaded (or the attempt failed, see `error`)
+done = threading.Event()         # charts drawn too
+timings = {}                     # step -> seconds since start()
+error = None
+
+_lock = threading.Lock()         # serialises shared.refresh() between the thread and pages
+_thread = None
+_start_lock = threading.Lock()
+
+def refresh():
+    """shared.refresh() under the warm-up lock; returns the published data version."""
+    import shared
+    with _lock:
+        return shared.refresh()
+
+def load():
+    """(version, role frames) of the current data, processing it first if needed."""
+    import shared
+    version = refresh()
+    return version, shared.frames(version)
+
+def common_charts(frames):
+    """(kind, df, args) of the charts the pages draw first, as app.py requests them."""
+    import preprocessor as pp
+    import helper
+    charts = []
+    for role, df in zip(pp.roles, frames):
+        charts.append(("top10", df, ("score", ())))
+        if len(df):
+            best = df["Player"].iloc[int(df["score"].to_numpy().argmax())]
+            charts.append(("radar", df, ([best], helper.ROLE_RADAR_METRICS[role])))
+    fw = frames[pp.roles.index("FW")]
+    if (fw["Player"] == "Kylian Mbappé").any():  # the Single Player page's default
+        charts.append(("radar", fw, (["Kylian Mbappé"], helper.ROLE_RADAR_METRICS["FW"])))
+    return charts
+
+def _run(started, charts):
+    global error
+    try:
+        with instrument.stage("warmup_imports"):
+            import helper
+        timings["imports"] = time.perf_counter() - started
+        with instrument.stage("warmup_data"):
+            _, frames = load()
+        timings["data"] = time.perf_counter() - started
+        ready.set()
+        if charts:
+            with instrument.stage("warmup_charts"):
+                for kind, df, args in common_charts(frames):
+                    helper.render_chart(kind, df, *args)
+            timings["charts"] = time.perf_counter() - started
+    except Exception as e:  # pages load the data themselves and report the error there
+        error = e
+        log.exception("warm-up failed")
+    finally:
+        ready.set()
+        done.set()
+
+def start(charts=True):
+    """Start the warm-up thread unless it already ran in this process; returns it."""
+    global _thread
+    with _start_lock:
+        if _thread is None:
+            _thread = threading.Thread(target=_run, args=(time.perf_counter(), charts), name="warmup", daemon=True)
+            _thread.start()
+        return _thread
+
+def wait(timeout=None, charts=False):
+    """Block until the frames (charts=True: and the charts) are warm; False on timeout."""
+    return (done if charts else ready).wait(timeout)
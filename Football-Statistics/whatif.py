@@ -0,0 +1,208 @@
+import bisect
+
+import numpy as np
+import pandas as pd
+
+import preprocessor as pp
+
+# ============================================================
+# WHAT-IF LOOKUP (PLAYERS OUTSIDE THE DATASET)
+# ============================================================
+# Each role's ranking values are sorted once. A hypothetical player's
+# percentiles come from two binary searches per metric, giving the numbers
+# the engine would produce for that row had it been appended to the role
+# table and everything re-run. The table itself is never touched, so
+# nobody else's percentile moves and the score rank is against the
+# current scores.
+summed = {"G+A": ("Gls", "Ast"), "Tkl+Int": ("Tkl", "Int")}
+rates = {"Save%": ("Saves", "SoTA"), "Cmp%": ("Cmp", "Att"), "CS%": ("CS", "MP")}  # percent
+total_cols = [c for c in pp.required_cols if c not in ("Player", "Nation", "Pos", "Squad", "Comp", "Season", "Age")]
+
+def totals_matrix(data, columns):
+    """
+    {column: (n,) float array} from a mapping of arrays or a DataFrame
+    ({column: float} from a mapping of scalars), with combined totals
+    (G+A, Tkl+Int, PSxG+/-) and rates (GA90, Save%, Cmp%, CS%) filled in
+    from their parts when not given.
+    """
+    if np.ndim(data["Min"]) == 0:
+        cols = {c: np.float64(data[c]) for c in columns if c in data}
+    else:
+        n = len(data["Min"])
+        cols = {c: np.broadcast_to(np.asarray(data[c], dtype=float), (n,)) for c in columns if c in data}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name, (a, b) in summed.items():
+            if name not in cols and a in cols and b in cols: cols[name] = cols[a] + cols[b]
+        if "PSxG+/-" not in cols and "PSxG" in cols and "GA" in cols: cols["PSxG+/-"] = cols["PSxG"] - cols["GA"]
+        if "GA90" not in cols and "GA" in cols: cols["GA90"] = cols["GA"] / (cols["Min"] / 90)
+        for name, (a, b) in rates.items():
+            if name not in cols and a in cols and b in cols: cols[name] = np.where(cols[b] > 0, cols[a] / cols[b] * 100, np.nan)
+    return cols
+
+class WhatIf:
+    """
+    Percentiles, league-adjusted percentiles, score and score rank for
+    players who are not in the processed tables. `lookup()` answers one
+    player, `batch()` ranks a whole frame of candidates at once.
+    """
+    def __init__(self, frames):
+        if not isinstance(frames, dict):
+            frames = dict(zip(pp.roles, frames))
+        self.per90_cols, self.rank_cols, _ = pp.derived_layout(next(iter(frames.values())))
+        self.sources = {v: k for k, v in pp.per90_map.items()}
+        self.sorted = {}   # role -> one sorted array per rank col (NaN left out)
+        self.scores = {}   # role -> sorted scores
+        for role, df in frames.items():
+            _, to_rank = pp.metric_rows(df, self.per90_cols, self.rank_cols)
+            ordered = np.sort(to_rank, axis=1)
+            nobs = (~np.isnan(to_rank)).sum(axis=1)
+            self.sorted[role] = [row[:n].copy() for row, n in zip(ordered, nobs)]
+            score = df["score"].to_numpy(dtype=float)
+            self.scores[role] = np.sort(score[~np.isnan(score)])
+        # Plain-list copies for single lookups (bisect beats numpy calls on one value)
+        self.lists = {role: [arr.tolist() for arr in arrs] for role, arrs in self.sorted.items()}
+        self.score_lists = {role: arr.tolist() for role, arr in self.scores.items()}
+        where = {c + "_pct_adj": i for i, c in enumerate(self.rank_cols)}
+        self.components = {name: [where[c] for c in cols if c in where]
+                           for name, cols in {**pp.score_components, **pp.gk_components}.items()}
+
+    def values(self, data):
+        """Per-90 and ranking matrices for columns of raw totals, as pp.metric_rows prepares them."""
+        cols = totals_matrix(data, total_cols)
+        n = len(cols["Min"])
+        nineties = cols["90s"] if "90s" in cols else cols["Min"] / 90
+        per90 = np.zeros((len(self.per90_cols), n))
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for i, c in enumerate(self.per90_cols):
+                if self.sources[c] in cols: per90[i] = cols[self.sources[c]] / nineties
+
+        to_rank = np.empty((len(self.rank_cols), n))
+        for i, c in enumerate(self.rank_cols):
+            to_rank[i] = per90[self.per90_cols.index(c)] if c in self.sources else cols.get(c, np.nan)
+        missing = np.isnan(to_rank)
+        if "GA90" in self.rank_cols:
+            ga = self.rank_cols.index("GA90")
+            missing[ga] = False
+            to_rank[ga] = -to_rank[ga]  # lower is better
+        to_rank[missing] = 0.0
+        return per90, to_rank
+
+    def percentiles(self, role, to_rank):
+        """_pct (rank_cols x players): each player ranked as if added to the role table."""
+        pct = np.empty(to_rank.shape)
+        for i, arr in enumerate(self.sorted[role]):
+            v = to_rank[i]
+            below = arr.searchsorted(v, "left")
+            upto = arr.searchsorted(v, "right")
+            # The new row joins its tie run: average of ranks below+1 .. upto+1
+            pct[i] = (below + upto + 2) / 2 / (len(arr) + 1) * 100
+        pct[np.isnan(to_rank)] = np.nan
+        return pct
+
+    def _rank(self, role, score):
+        # 1 + number of current players scoring strictly higher; no score, no rank
+        scores = self.scores[role]
+        rank = (len(scores) - scores.searchsorted(score, "right") + 1).astype(float)
+        rank[np.isnan(score)] = np.nan
+        return rank
+
+    def _score(self, role, adj):
+        # pp.score_rows for one player, same operations in the same order
+        def mean(idx):
+            total, count = 0.0, 0
+            for i in idx:
+                if adj[i] == adj[i]:
+                    total += adj[i]
+                    count += 1
+            return total / count if count else float("nan")
+        comp = {name: mean(idx) for name, idx in self.components.items()}
+        if role == "GK":
+            w_stop, w_stab = pp.gk_weights
+            return w_stop * comp["stopping"] + w_stab * comp["stability"]
+        w = pp.position_weights.get(role, (0.25, 0.25, 0.25, 0.25))
+        return (w[0] * comp["finishing"] + w[1] * comp["creation"]
+                + w[2] * comp["progression"] + w[3] * comp["defending"])
+
+    def lookup(self, role, totals, comp="other"):
+        """
+        One hypothetical player: raw season totals (Min plus whatever is
+        known, e.g. Gls, xG, KP, Tkl, Cmp/Att) in `role`, playing in `comp`.
+        Returns a dict with score, rank, out_of and every per-90 / _pct /
+        _pct_adj; the same numbers batch() gives for that row. A row
+        without a score gets rank None and NaN percentiles.
+        """
+        if role not in self.lists:
+            raise ValueError(f"role must be one of {list(self.lists)}, not {role!r}")
+        cols = totals_matrix(totals, total_cols)
+        nineties = float(cols["90s"]) if "90s" in cols else float(cols["Min"]) / 90
+        if not nineties > 0:
+            raise ValueError("Min (or 90s) must be positive")
+        out = {"role": role, "Comp": comp}
+        for c in self.per90_cols:
+            source = self.sources[c]
+            out[c] = float(cols[source]) / nineties if source in cols else 0.0
+
+        weight = pp.league_weights.get(comp, 0.60)
+        pct, adj = [], []
+        for c, lst in zip(self.rank_cols, self.lists[role]):
+            v = out[c] if c in self.sources else float(cols.get(c, np.nan))
+            if c == "GA90":
+                v = -v  # lower is better; a missing GA90 stays unranked
+            elif v != v:
+                v = 0.0
+            if v != v:
+                p = float("nan")
+            else:
+                p = (bisect.bisect_left(lst, v) + bisect.bisect_right(lst, v) + 2) / 2 / (len(lst) + 1) * 100
+            pct.append(p)
+            adj.append(p * weight)
+        score = self._score(role, adj)
+        scores = self.score_lists[role]
+        if score == score:
+            rank = len(scores) - bisect.bisect_right(scores, score) + 1
+        else:
+            # Unscored rows are unranked, as batch() reports them
+            rank, pct, adj = None, [float("nan")] * len(pct), [float("nan")] * len(adj)
+        out.update({"league_weight": weight, "score": score, "rank": rank, "out_of": len(scores) + 1})
+        out.update(zip([c + "_pct" for c in self.rank_cols], pct))
+        out.update(zip([c + "_pct_adj" for c in self.rank_cols], adj))
+        return out
+
+    def batch(self, df, role=None):
+        """
+        Rank every row of `df` (FBref-style season totals). `role` applies
+        one role to all rows; None derives it from Pos / CrsPA as the
+        engine does. Each row is ranked on its own against the tables, as
+        if it were the only one added. Rows without a score (no role) get
+        NaN rank and percentiles.
+        """
+        codes = np.full(len(df), pp.roles.index(role)) if role is not None else pp.role_codes(df)
+        per90, to_rank = self.values(df)
+        pct = np.full(to_rank.shape, np.nan)
+        rank = np.full(len(df), np.nan)
+        for r, name in enumerate(pp.roles):
+            rows = np.flatnonzero(codes == r)
+            if len(rows) and name in self.sorted:
+                pct[:, rows] = self.percentiles(name, to_rank[:, rows])
+        comp = df["Comp"] if "Comp" in df.columns else pd.Series("other", index=df.index)
+        weight = pp.league_weight_vector(comp)
+        adj = pct * weight
+        ok = codes >= 0
+        score = np.full(len(df), np.nan)
+        score[ok] = pp.score_rows(adj[:, ok], self.rank_cols, codes[ok])
+        for r, name in enumerate(pp.roles):
+            rows = np.flatnonzero(codes == r)
+            if len(rows) and name in self.scores:
+                rank[rows] = self._rank(name, score[rows])
+        # Rows without a score (no role table) get no rank or percentiles
+        unscored = np.isnan(score)
+        pct[:, unscored] = np.nan
+        adj[:, unscored] = np.nan
+
+        derived = {"Role": np.append(np.array(pp.roles, dtype=object), None)[codes], "score": score,
+                   "rank": rank, "league_weight": weight}
+        derived.update(zip(self.per90_cols, per90))
+        derived.update(zip([c + "_pct" for c in self.rank_cols], pct))
+        derived.update(zip([c + "_pct_adj" for c in self.rank_cols], adj))
+        df = df.drop(columns=[c for c in derived if c in df.columns])
+        return pd.concat([df, pd.DataFrame(derived, index=df.index)], axis=1)